@@ -1,54 +1,80 @@
-import json
 import os
 from video_engine.extract_frames import extract_frames
+from video_engine.frame_cache import video_digest
 from core.intent_engine import interpret_intent
-from video_engine.frame_graph_api import build_frame_graph, traverse_frame_graph
+from core.state_manager import StateStore
+from video_engine.frame_graph_api import build_frame_graph, build_semantic_graph, traverse_frame_graph
 from video_engine.regenerate_api import regenerate_video
+from video_engine.stream_pipeline import run_streaming_pipeline
 
 DATA_INPUT = os.path.join("data", "input_videos")
 DATA_FRAMES = os.path.join("data", "frames")
 DATA_OUTPUTS = os.path.join("data", "outputs")
 DATA_STATES = os.path.join("data", "states")
 
-os.makedirs(DATA_STATES, exist_ok=True)
-
 VIDEO_PATH = os.path.join(DATA_INPUT, "326677_small.mp4")
 FRAME_DIR = DATA_FRAMES
 OUTPUT_VIDEO = os.path.join(DATA_OUTPUTS, "output.mp4")
 
-# Step 1: Extract frames
-extract_frames(VIDEO_PATH, FRAME_DIR)
-
-# Step 2: User input
-user_input = input("Describe the style you want (cinematic / fast / reel): ")
-fps_input = input("Optional FPS (press Enter to use default): ").strip()
-fps = int(fps_input) if fps_input else None
-
-# Step 3: Intent Understanding
-intent = interpret_intent(user_input)
-if fps is not None:
-    intent["fps"] = fps
-
-# Step 4: Frame Graph Traversal
-frames = build_frame_graph(FRAME_DIR)
-frame_path = traverse_frame_graph(frames, intent)
-
-# Step 5: Regenerate Video
-regenerate_video(
-    FRAME_DIR,
-    frame_path,
-    OUTPUT_VIDEO,
-    intent
-)
-
-# Step 6: Save Creative State
-state = {
-    "intent": intent,
-    "frame_path_length": len(frame_path),
-    "output_video": OUTPUT_VIDEO
-}
-
-with open(os.path.join(DATA_STATES, "state_1.json"), "w") as f:
-    json.dump(state, f, indent=2)
-
-print("[DONE] Creative state saved")
+# Set SCRIPTORIA_STREAMING=1 to decode -> select -> encode in memory instead of
+# dumping every frame to FRAME_DIR first.
+STREAMING = os.environ.get("SCRIPTORIA_STREAMING") == "1"
+# Set SCRIPTORIA_SEMANTIC=1 to walk the visual-similarity graph instead of every Nth frame.
+SEMANTIC = os.environ.get("SCRIPTORIA_SEMANTIC") == "1"
+# Number of processes decoding keyframe-aligned segments in parallel; 1 decodes
+# the whole video in this process.
+EXTRACT_WORKERS = int(os.environ.get("SCRIPTORIA_EXTRACT_WORKERS", 1))
+# Number of processes encoding GOP-aligned chunks of the render in parallel.
+ENCODE_WORKERS = int(os.environ.get("SCRIPTORIA_ENCODE_WORKERS", 1))
+
+
+def main():
+    os.makedirs(DATA_STATES, exist_ok=True)
+
+    # Step 1: User input
+    user_input = input("Describe the style you want (cinematic / fast / reel): ")
+    fps_input = input("Optional FPS (press Enter to use default): ").strip()
+    fps = int(fps_input) if fps_input else None
+
+    # Step 2: Intent Understanding
+    intent = interpret_intent(user_input)
+    if fps is not None:
+        intent["fps"] = fps
+    if ENCODE_WORKERS > 1:
+        intent["render_workers"] = ENCODE_WORKERS
+
+    # Step 3: Extract only the frames the intent keeps
+    digest = video_digest(VIDEO_PATH)
+    if not STREAMING:
+        extract_frames(VIDEO_PATH, FRAME_DIR, step=intent["step"], workers=EXTRACT_WORKERS)
+
+    frame_path = None
+    if STREAMING:
+        # Steps 4-5: Stream frames straight from the capture into the encoder
+        frame_path_length = run_streaming_pipeline(VIDEO_PATH, OUTPUT_VIDEO, intent)
+    else:
+        # Step 4: Frame Graph Traversal
+        frames = build_frame_graph(FRAME_DIR)
+        graph = build_semantic_graph(FRAME_DIR, frames, video_digest=digest) if SEMANTIC else None
+        frame_path = traverse_frame_graph(frames, intent, graph=graph)
+        frame_path_length = len(frame_path)
+
+        # Step 5: Regenerate Video
+        regenerate_video(
+            FRAME_DIR,
+            frame_path,
+            OUTPUT_VIDEO,
+            intent
+        )
+
+    # Step 6: Save Creative State (appended to the run history)
+    run_id = StateStore(os.path.join(DATA_STATES, "runs.sqlite")).record(
+        intent, video_hash=digest, frame_path=frame_path, output_path=OUTPUT_VIDEO,
+        frame_path_length=frame_path_length)
+
+    print(f"[DONE] Creative state saved (run {run_id})")
+
+
+# Worker processes re-import this module on platforms that spawn them (Windows)
+if __name__ == "__main__":
+    main()
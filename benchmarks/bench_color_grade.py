@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Benchmark - 3D LUT colour grading against the encode it feeds
+
+Run from the repository root:
+    python -m benchmarks.bench_color_grade [--frames 120] [--size 1920x1080]
+
+Times LUT construction once per grade, then grades a stream of
+`--frames` synthetic frames in place and encodes the same stream with and
+without grading (ffmpeg backend), so the grade's share of render time
+can be read directly.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from video_engine.color_grade import GRADES, grader_for
+from video_engine.encoders import encode_frames
+
+
+def synthetic_frames(count, width, height):
+    """Gradients with moving text, so the LUT sees a realistic spread of colours."""
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack([np.broadcast_to(x, (height, width)), np.broadcast_to(y, (height, width)),
+                     (x + y) / 2], axis=-1).astype(np.uint8)
+    for i in range(count):
+        frame = np.roll(base, i * 8, axis=1)
+        cv2.putText(frame, f"{i:05d}", (width // 3, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 3, (255, 255, 255), 6)
+        yield frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--size", default="1920x1080", help="WIDTHxHEIGHT (default: 1920x1080)")
+    parser.add_argument("--preset", default="veryfast", help="x264 preset for the encode (default: veryfast)")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.split("x"))
+
+    builds = {}
+    for grade in GRADES:
+        start = time.perf_counter()
+        grader_for({"color_grade": grade, "mood": "dramatic"})
+        builds[grade] = time.perf_counter() - start
+
+    grader = grader_for({"color_grade": "warm", "mood": "dramatic"})
+    frames = list(synthetic_frames(args.frames, width, height))
+    start = time.perf_counter()
+    for frame in frames:
+        grader.apply(frame)
+    grade = (time.perf_counter() - start) / args.frames
+
+    tmp_dir = tempfile.mkdtemp(prefix="scriptoria_grade_")
+    intent = {"encoder": "ffmpeg", "preset": args.preset}
+    try:
+        encodes = {}
+        for graded in (False, True):
+            stream = synthetic_frames(args.frames, width, height)
+            if graded:
+                stream = (grader.apply(frame, out=frame) for frame in stream)
+            start = time.perf_counter()
+            encode_frames(stream, os.path.join(tmp_dir, f"graded{graded:d}.mp4"), 24, intent)
+            encodes[graded] = (time.perf_counter() - start) / args.frames
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print("=" * 60)
+    print(f"COLOUR GRADING BENCHMARK ({args.frames} frames, {width}x{height})")
+    print("=" * 60)
+    for name, seconds in builds.items():
+        print(f"  build LUT table ({name:>6})   {seconds:8.2f} s")
+    print(f"  grade one frame             {grade * 1e3:8.2f} ms  ({1 / grade:,.0f} fps)")
+    print(f"  render, no grade            {encodes[False] * 1e3:8.2f} ms/frame")
+    print(f"  render, graded              {encodes[True] * 1e3:8.2f} ms/frame  "
+          f"(+{(encodes[True] / encodes[False] - 1) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
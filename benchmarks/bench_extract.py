@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Benchmark - step-aware extraction vs full extraction
+
+Run from the repository root:
+    python -m benchmarks.bench_extract [--video path.mp4]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.synthetic_video import make_synthetic_video
+from video_engine.extract_frames import extract_frames
+
+STEPS = (1, 8, 24)
+
+
+def run(video_path, steps=STEPS, workers=1):
+    results = []
+    for step in steps:
+        out_dir = tempfile.mkdtemp(prefix=f"scriptoria_step{step}_")
+        try:
+            start = time.perf_counter()
+            stats = extract_frames(video_path, out_dir, step=step, workers=workers)
+            elapsed = time.perf_counter() - start
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+        results.append({"step": step, "decoded": stats["decoded"], "seconds": elapsed})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", help="Input video (default: synthetic 1280x720, 720 frames)")
+    parser.add_argument("--workers", type=int, default=1, help="Extraction processes (default: 1)")
+    args = parser.parse_args()
+
+    tmp_dir = None
+    video_path = args.video
+    if not video_path:
+        tmp_dir = tempfile.mkdtemp(prefix="scriptoria_bench_")
+        video_path = make_synthetic_video(os.path.join(tmp_dir, "synthetic.mp4"), 1280, 720, 720)
+
+    try:
+        results = run(video_path, workers=args.workers)
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    baseline = results[0]["seconds"]
+    print("=" * 60)
+    print(f"EXTRACTION BENCHMARK (workers={args.workers})")
+    print("=" * 60)
+    print(f"  {'step':>4}  {'decoded':>8}  {'seconds':>8}  {'speedup':>8}")
+    for r in results:
+        print(f"  {r['step']:>4}  {r['decoded']:>8}  {r['seconds']:>8.3f}  {baseline / r['seconds']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
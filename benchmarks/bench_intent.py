@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+"""
+Benchmark - compiled intent rules and batch API vs the original if/elif parser
+
+Run from the repository root:
+    python -m benchmarks.bench_intent [--prompts 200000] [--unique 5000] [--log prompts.txt]
+
+Every prompt's output is compared against the original implementation
+(`legacy_interpret_intent`, kept verbatim below) before timings are reported.
+"""
+import argparse
+import random
+import re
+import time
+from typing import Optional
+
+from core.intent_engine import interpret_intent, interpret_intents
+
+WORDS = (
+    "make a cinematic noir trailer with dramatic dark lighting smooth dissolve voiceover narration "
+    "24fps 30s 2 min every 6 frames city night rain slow fast energetic instagram reel short bright "
+    "vibrant warm cool cold moody intense cut crossfade shortcut fastrailer voicevery breakfast 15 fps "
+    "10 seconds 3m 1 mins every 12 of the and"
+).split()
+
+
+def legacy_interpret_intent(user_input: str, defaults: Optional[dict] = None) -> dict:
+    """`interpret_intent(..., use_llm=False)` as it was before the rule table."""
+
+    # Local parsing fallback
+    if defaults is None:
+        defaults = {}
+
+    text = (user_input or "").lower()
+
+    intent = {
+        "style": defaults.get("style", "reel"),
+        "pace": defaults.get("pace", "medium"),
+        "fps": defaults.get("fps", 12),
+        "step": defaults.get("step", 8),
+        "target_duration": None,
+        "mood": None,
+        "color_grade": None,
+        "transitions": None,
+        "narration": None,
+    }
+
+    # Style / pace shortcuts
+    if "cinematic" in text:
+        intent.update({"style": "cinematic", "pace": "slow", "fps": 8, "step": 12})
+    elif "trailer" in text or "fast" in text or "energetic" in text:
+        intent.update({"style": "trailer", "pace": "fast", "fps": 15, "step": 6})
+    elif "reel" in text or "instagram" in text or "short" in text:
+        intent.update({"style": "reel", "pace": "medium", "fps": 12, "step": 8})
+
+    # FPS explicit
+    m = re.search(r"(\d+)\s*fps", text)
+    if m:
+        try:
+            intent["fps"] = int(m.group(1))
+        except ValueError:
+            pass
+
+    # Target duration (e.g., 10s, 30s, 1m)
+    m = re.search(r"(\d+)\s*(s|sec|secs|seconds)\b", text)
+    if m:
+        intent["target_duration"] = int(m.group(1))
+    else:
+        m = re.search(r"(\d+)\s*(m|min|mins|minutes)\b", text)
+        if m:
+            intent["target_duration"] = int(m.group(1)) * 60
+
+    # Step (select every Nth frame)
+    m = re.search(r"every\s+(\d+)\b", text)
+    if m:
+        try:
+            intent["step"] = int(m.group(1))
+        except ValueError:
+            pass
+
+    # Mood / color hints
+    if "dramatic" in text or "intense" in text:
+        intent["mood"] = "dramatic"
+    if "bright" in text or "vibrant" in text:
+        intent["color_grade"] = "bright"
+    if "dark" in text or "moody" in text:
+        intent["color_grade"] = "dark"
+    if "warm" in text:
+        intent["color_grade"] = "warm"
+    if "cool" in text or "cold" in text:
+        intent["color_grade"] = "cool"
+
+    # Transitions and narration
+    if "cut" in text and "smooth" not in text:
+        intent["transitions"] = "cut"
+    if "smooth" in text or "dissolve" in text or "crossfade" in text:
+        intent["transitions"] = "dissolve"
+    if "voice" in text or "narration" in text or "voiceover" in text:
+        intent["narration"] = True
+
+    # Build explanation
+    expl_parts = [f"style={intent['style']}", f"pace={intent['pace']}", f"fps={intent['fps']}", f"step={intent['step']}"]
+    if intent["target_duration"]:
+        expl_parts.append(f"target_duration={intent['target_duration']}s")
+    if intent["mood"]:
+        expl_parts.append(f"mood={intent['mood']}")
+    if intent["color_grade"]:
+        expl_parts.append(f"color_grade={intent['color_grade']}")
+    if intent["transitions"]:
+        expl_parts.append(f"transitions={intent['transitions']}")
+    if intent["narration"]:
+        expl_parts.append("narration=yes")
+
+    intent["explanation"] = ", ".join(expl_parts)
+
+    return intent
+
+
+
+def make_prompts(count, unique, seed=0):
+    rng = random.Random(seed)
+    pool = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 14))) for _ in range(unique)]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=200000, help="Prompts to classify (default: 200000)")
+    parser.add_argument("--unique", type=int, default=5000, help="Distinct prompts among them (default: 5000)")
+    parser.add_argument("--log", help="Classify the lines of this file instead of synthetic prompts")
+    args = parser.parse_args()
+
+    if args.log:
+        with open(args.log, "r", encoding="utf-8") as f:
+            prompts = [line.rstrip("\n") for line in f]
+    else:
+        prompts = make_prompts(args.prompts, args.unique)
+
+    legacy, legacy_s = timed(lambda: [legacy_interpret_intent(p) for p in prompts])
+    compiled, compiled_s = timed(lambda: [interpret_intent(p) for p in prompts])
+    batch, batch_s = timed(lambda: list(interpret_intents(prompts)))
+
+    mismatches = [p for p, a, b, c in zip(prompts, legacy, compiled, batch) if not a == b == c]
+    print("=" * 60)
+    print(f"INTENT BENCHMARK ({len(prompts)} prompts, {len(set(p.lower() for p in prompts))} distinct)")
+    print("=" * 60)
+    print(f"  {'variant':<22}  {'seconds':>8}  {'prompts/s':>10}  {'speedup':>8}")
+    for name, seconds in (("legacy if/elif", legacy_s), ("compiled rules", compiled_s),
+                          ("interpret_intents", batch_s)):
+        print(f"  {name:<22}  {seconds:>8.3f}  {len(prompts) / seconds:>10.0f}  {legacy_s / seconds:>7.1f}x")
+    print(f"  identical outputs: {'yes' if not mismatches else f'NO ({len(mismatches)} differ)'}")
+    for p in mismatches[:5]:
+        print(f"    {p!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Benchmark - single-stream encode vs GOP-aligned chunks encoded in parallel
+
+Run from the repository root:
+    python -m benchmarks.bench_parallel_render [--video path.mp4] [--workers 1,2,4]
+
+Extracts every frame of the video once, then renders the whole frame path
+with `render_workers` = 1 (one libx264 stream) and each other worker count
+(chunks joined by the concat demuxer). Every render uses the same fixed
+GOP, and each output is decoded again to check its frame count.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+
+from benchmarks.synthetic_video import make_synthetic_video
+from video_engine.extract_frames import extract_frames
+from video_engine.regenerate_api import regenerate_video
+
+GOP = 48
+
+
+def count_frames(path):
+    cap = cv2.VideoCapture(path)
+    count = 0
+    while cap.grab():
+        count += 1
+    cap.release()
+    return count
+
+
+def run(frame_dir, frame_path, out_dir, workers_list, preset):
+    results = []
+    for workers in workers_list:
+        output_path = os.path.join(out_dir, f"render_w{workers}.mp4")
+        intent = {"fps": 24, "encoder": "ffmpeg", "preset": preset, "gop": GOP, "render_workers": workers}
+        start = time.perf_counter()
+        report = regenerate_video(frame_dir, frame_path, output_path, intent)
+        elapsed = time.perf_counter() - start
+        results.append({"workers": workers, "seconds": elapsed, "frames": report["frames_written"],
+                        "decoded": count_frames(output_path), "bytes": os.path.getsize(output_path)})
+    return results
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", help="Input video (default: synthetic 1280x720, 720 frames)")
+    parser.add_argument("--workers", default=",".join(str(w) for w in sorted({1, 2, cpus})),
+                        help=f"Comma-separated worker counts (default: 1,2,{cpus})")
+    parser.add_argument("--preset", default="medium", help="x264 preset (default: medium)")
+    args = parser.parse_args()
+    workers_list = [int(w) for w in args.workers.split(",")]
+    if 1 not in workers_list:
+        workers_list.insert(0, 1)
+
+    tmp_dir = tempfile.mkdtemp(prefix="scriptoria_bench_")
+    try:
+        video_path = args.video or make_synthetic_video(os.path.join(tmp_dir, "synthetic.mp4"), 1280, 720, 720)
+        frame_dir = os.path.join(tmp_dir, "frames")
+        frame_path = extract_frames(video_path, frame_dir, detect_shots=False)["frames"]
+        results = run(frame_dir, frame_path, tmp_dir, workers_list, args.preset)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    baseline = results[0]["seconds"]
+    print("=" * 60)
+    print(f"PARALLEL RENDER BENCHMARK ({len(frame_path)} frames, gop {GOP}, {cpus} CPUs)")
+    print("=" * 60)
+    print(f"  {'workers':>7}  {'seconds':>8}  {'speedup':>8}  {'frames':>7}  {'decoded':>7}  {'MB':>6}")
+    for r in results:
+        print(f"  {r['workers']:>7}  {r['seconds']:>8.2f}  {baseline / r['seconds']:>7.2f}x  "
+              f"{r['frames']:>7}  {r['decoded']:>7}  {r['bytes'] / 1e6:>6.2f}")
+    if any(r["decoded"] != r["frames"] for r in results):
+        print("[WARN] An output decodes to a different frame count than was encoded")
+
+
+if __name__ == "__main__":
+    main()
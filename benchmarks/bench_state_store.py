@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+Benchmark - "last render of this video with this intent" lookups in the state store
+
+Run from the repository root:
+    python -m benchmarks.bench_state_store [--runs 100000] [--lookups 2000]
+
+Fills a fresh `StateStore` with `--runs` runs spread over 1,000 videos and
+every style preset, then times `latest(video_hash, intent)` for random
+video/intent pairs.
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from core.intent_engine import interpret_intent
+from core.state_manager import StateStore
+
+PROMPTS = ["cinematic dramatic", "fast trailer", "instagram reel", "moody dark 24fps", "smooth warm short"]
+VIDEOS = 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    intents = [interpret_intent(prompt) for prompt in PROMPTS]
+    rng = random.Random(0)
+    tmp_dir = tempfile.mkdtemp(prefix="scriptoria_states_")
+    try:
+        store = StateStore(os.path.join(tmp_dir, "runs.sqlite"))
+        start = time.perf_counter()
+        store.record_many({"intent": rng.choice(intents), "video_hash": f"video{rng.randrange(VIDEOS)}",
+                           "frame_path": range(0, 2400, 8), "output_path": f"out/{i}.mp4",
+                           "timings": {"extract": 1.0, "render": 4.0}, "created": 1.7e9 + i}
+                          for i in range(args.runs))
+        fill = time.perf_counter() - start
+
+        pairs = [(f"video{rng.randrange(VIDEOS)}", rng.choice(intents)) for _ in range(args.lookups)]
+        start = time.perf_counter()
+        found = sum(store.latest(video, intent) is not None for video, intent in pairs)
+        lookup = (time.perf_counter() - start) / args.lookups
+        size = os.path.getsize(store.path)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print("=" * 60)
+    print(f"STATE STORE BENCHMARK ({args.runs} runs)")
+    print("=" * 60)
+    print(f"  fill (one transaction)   {fill:8.2f} s   ({args.runs / fill:,.0f} runs/s)")
+    print(f"  latest(video, intent)    {lookup * 1e3:8.3f} ms  ({found}/{args.lookups} found)")
+    print(f"  database size            {size / 1e6:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+"""
+Benchmark suite - every pipeline stage on synthetic footage
+
+Run from the repository root:
+    python -m benchmarks.bench_suite [--sizes 640x360,1280x720] [--frames 240,720]
+                                     [--output results.json] [--compare baseline.json]
+
+For each video size and length a synthetic clip is written with
+`cv2.VideoWriter`, then extraction, frame selection (build + traverse) and
+rendering are timed on it; intent parsing and preproduction (with a stubbed
+LLM) are timed on a fixed prompt set. Each stage runs in its own process so
+its peak RSS is its own. Results are written as JSON; `--compare` reports the
+change against an earlier run and exits with status 1 on a slowdown beyond
+`--threshold`.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.synthetic_video import make_synthetic_video
+
+DEFAULT_SIZES = "640x360,1280x720"
+DEFAULT_FRAMES = "240,720"
+# Slowdowns smaller than this many seconds are treated as noise by --compare
+MIN_DELTA = 0.05
+DEFAULT_PROMPT = "fast energetic trailer with smooth dissolves, 30s"
+PROMPTS = [
+    "cinematic noir city at night, dramatic and dark, 24fps",
+    "fast trailer with cut transitions every 4 frames",
+    "instagram reel, bright vibrant colours, 15s",
+    "smooth dissolve travel diary with voiceover narration, 2 min",
+    "moody cold short film, every 12 frames",
+]
+
+STUB_PLAN = {
+    "screenplay": {"title": "Benchmark", "scenes": [{"id": 1, "description": "Opening", "rough_duration_s": 5}]},
+    "workflow": {"style": "trailer", "pace": "fast", "total_steps": 1, "steps": []},
+    "characters": {"count": 0, "primary_mood": None, "characters": []},
+    "sound_design": {"track_count": 0, "style": "trailer", "has_narration": False, "tracks": []},
+}
+
+
+def _tree_size(path) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def _peak_rss_mb():
+    """Peak RSS of this stage process in MB, or None where it cannot be measured."""
+    try:
+        import resource
+    except ImportError:
+        # Windows: psutil's peak working set if installed (this process only)
+        try:
+            import psutil
+        except ImportError:
+            return None
+        memory = psutil.Process().memory_info()
+        return round(getattr(memory, "peak_wset", memory.rss) / (1 << 20), 1)
+    # ru_maxrss is in KiB on Linux; extraction workers count via RUSAGE_CHILDREN
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(peak / (1 << 10 if sys.platform != "darwin" else 1 << 20), 1)
+
+
+def _measure(stage, fn):
+    """Run `fn() -> (items, bytes_written)` and return its result row."""
+    start = time.perf_counter()
+    items, written = fn()
+    seconds = time.perf_counter() - start
+    return {"stage": stage, "seconds": round(seconds, 4), "items": items,
+            "items_per_s": round(items / seconds, 1) if seconds > 0 else None,
+            "bytes_written": written, "peak_rss_mb": _peak_rss_mb()}
+
+
+def stage_extract(video_path, frame_dir, step, workers):
+    from video_engine.extract_frames import extract_frames
+
+    def run():
+        stats = extract_frames(video_path, frame_dir, step=step, workers=workers)
+        return stats["decoded"], _tree_size(frame_dir)
+
+    return _measure("extract", run)
+
+
+def stage_select(frame_dir, intent):
+    from video_engine.frame_graph_api import build_frame_graph, traverse_frame_graph
+    from video_engine.shot_detector import load_shots
+
+    def run():
+        frames = build_frame_graph(frame_dir)
+        traverse_frame_graph(frames, intent, shots=load_shots(frame_dir))
+        return len(frames), 0
+
+    return _measure("select", run)
+
+
+def stage_render(frame_dir, output_path, intent):
+    from video_engine.frame_graph_api import build_frame_graph, traverse_frame_graph
+    from video_engine.regenerate_api import regenerate_video
+
+    frame_path = traverse_frame_graph(build_frame_graph(frame_dir), intent)
+
+    def run():
+        report = regenerate_video(frame_dir, frame_path, output_path, intent)
+        return report["frames_written"], sum(_tree_size(p) for p in report["renditions"].values())
+
+    return _measure("render", run)
+
+
+def stage_intent(count):
+    from core.intent_engine import interpret_intent
+
+    def run():
+        for i in range(count):
+            interpret_intent(PROMPTS[i % len(PROMPTS)])
+        return count, 0
+
+    return _measure("intent", run)
+
+
+def stage_preproduction(count, llm_latency):
+    from core import llm_client
+    from core.intent_engine import interpret_intent
+    from preproduction_engine.preprod_controller import run_preproduction
+
+    def stub_llm(prompt, intent=None, **kwargs):
+        time.sleep(llm_latency)
+        return json.loads(json.dumps(STUB_PLAN))
+
+    llm_client.request_preproduction_from_llm = stub_llm
+    intents = [interpret_intent(p) for p in PROMPTS]
+
+    def run():
+        for i in range(count):
+            run_preproduction(PROMPTS[i % len(PROMPTS)], intents[i % len(PROMPTS)], use_llm=True,
+                              latency_budget=0)
+        return count, 0
+
+    return _measure("preproduction", run)
+
+
+def _in_child(fn, *args):
+    """Run one stage in a fresh interpreter so peak RSS covers that stage only."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def run(sizes, lengths, prompt=DEFAULT_PROMPT, workers=1, prompt_count=20000, preprod_count=200,
+        llm_latency=0.0):
+    from core.intent_engine import interpret_intent
+
+    intent = interpret_intent(prompt)
+    results = []
+    for width, height in sizes:
+        for frame_count in lengths:
+            case = f"{width}x{height}x{frame_count}"
+            tmp_dir = tempfile.mkdtemp(prefix="scriptoria_suite_")
+            try:
+                video_path = make_synthetic_video(os.path.join(tmp_dir, "synthetic.mp4"), width, height, frame_count)
+                frame_dir = os.path.join(tmp_dir, "frames")
+                rows = [
+                    _in_child(stage_extract, video_path, frame_dir, intent["step"], workers),
+                    _in_child(stage_select, frame_dir, intent),
+                    _in_child(stage_render, frame_dir, os.path.join(tmp_dir, "render.mp4"), intent),
+                ]
+            finally:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            for row in rows:
+                row["case"] = case
+                print(f"[INFO] {case} {row['stage']}: {row['seconds']:.3f}s")
+            results.extend(rows)
+
+    for row in (_in_child(stage_intent, prompt_count), _in_child(stage_preproduction, preprod_count, llm_latency)):
+        row["case"] = "prompts"
+        results.append(row)
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print per-stage changes against `baseline`; returns the rows that slowed beyond `threshold`."""
+    previous = {(row["case"], row["stage"]): row for row in baseline["results"]}
+    regressions = []
+    print(f"\n  compared with {baseline['meta'].get('revision') or 'baseline'} ({baseline['meta']['created']})")
+    for row in results:
+        old = previous.get((row["case"], row["stage"]))
+        if not old or not old["seconds"]:
+            continue
+        change = row["seconds"] / old["seconds"] - 1
+        flag = "  REGRESSION" if change > threshold and row["seconds"] - old["seconds"] > MIN_DELTA else ""
+        if flag:
+            regressions.append(row)
+        print(f"  {row['case']:<18} {row['stage']:<14} {old['seconds']:>8.3f} -> {row['seconds']:>8.3f}s "
+              f"({change:+.0%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma-separated WxH (default: {DEFAULT_SIZES})")
+    parser.add_argument("--frames", default=DEFAULT_FRAMES, help=f"Comma-separated lengths (default: {DEFAULT_FRAMES})")
+    parser.add_argument("--prompt", default=DEFAULT_PROMPT, help="Prompt whose intent drives extract/select/render")
+    parser.add_argument("--workers", type=int, default=1, help="Extraction processes (default: 1)")
+    parser.add_argument("--prompts", type=int, default=20000, help="interpret_intent calls (default: 20000)")
+    parser.add_argument("--preprod", type=int, default=200, help="run_preproduction calls (default: 200)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Stub LLM delay in seconds (default: 0)")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown flagged as a regression (default: 0.10)")
+    args = parser.parse_args()
+
+    sizes = [tuple(int(v) for v in size.lower().split("x")) for size in args.sizes.split(",")]
+    lengths = [int(n) for n in args.frames.split(",")]
+    results = run(sizes, lengths, args.prompt, args.workers, args.prompts, args.preprod, args.llm_latency)
+
+    report = {
+        "meta": {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "revision": _git_revision(),
+                 "python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "prompt": args.prompt, "workers": args.workers},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print("=" * 78)
+    print("PIPELINE BENCHMARK")
+    print("=" * 78)
+    print(f"  {'case':<18} {'stage':<14} {'seconds':>8} {'items/s':>10} {'peak MB':>8} {'written MB':>11}")
+    for row in results:
+        peak = f"{row['peak_rss_mb']:>8.1f}" if row["peak_rss_mb"] is not None else f"{'n/a':>8}"
+        print(f"  {row['case']:<18} {row['stage']:<14} {row['seconds']:>8.3f} {row['items_per_s'] or 0:>10.1f} "
+              f"{peak} {row['bytes_written'] / 1e6:>11.2f}")
+    print(f"  results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
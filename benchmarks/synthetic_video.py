@@ -0,0 +1,27 @@
+"""
+Synthetic footage for benchmarks - no sample videos need to be checked in
+"""
+import os
+
+import cv2
+import numpy as np
+
+
+def make_synthetic_video(path, width=640, height=360, frame_count=240, fps=24, shot_length=48):
+    """Write an MP4 with moving text and a hard colour change every `shot_length` frames."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    rng = np.random.default_rng(0)
+    noise = rng.integers(0, 40, size=(height, width, 3), dtype=np.uint8)
+
+    for i in range(frame_count):
+        shot = i // shot_length
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[:] = ((shot * 67) % 256, (shot * 131 + 80) % 256, (shot * 29 + 160) % 256)
+        cv2.add(frame, noise, dst=frame)
+        x = int((i % shot_length) / shot_length * (width - 120))
+        cv2.putText(frame, f"{i:05d}", (x, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 2)
+        writer.write(frame)
+
+    writer.release()
+    return path
@@ -1,38 +1,128 @@
 from typing import Optional
+import functools
 import re
 
 
-def interpret_intent(user_input: str, defaults: Optional[dict] = None, use_llm: bool = False) -> dict:
-    """Parse a free-text user intent into a structured dict of video requirements.
-
-    If `use_llm` is True and Groq is configured via `GROQ_API_KEY`, this
-    will attempt to request a richer intent from the remote service and fall back
-    to local parsing on error.
+DEFAULT_BATCH_CACHE = 65536
+
+# --- Rule table -------------------------------------------------------------
+# Keywords are matched as substrings of the lower-cased prompt.
+
+# Style presets: the first preset (in table order) with a keyword present wins.
+STYLE_PRESETS = [
+    (("cinematic",), {"style": "cinematic", "pace": "slow", "fps": 8, "step": 12}),
+    (("trailer", "fast", "energetic"), {"style": "trailer", "pace": "fast", "fps": 15, "step": 6}),
+    (("reel", "instagram", "short"), {"style": "reel", "pace": "medium", "fps": 12, "step": 8}),
+]
+
+# (field, value, keywords): every rule with a keyword present is applied, in
+# table order, so later rules override earlier ones for the same field.
+KEYWORD_RULES = [
+    ("mood", "dramatic", ("dramatic", "intense")),
+    ("color_grade", "bright", ("bright", "vibrant")),
+    ("color_grade", "dark", ("dark", "moody")),
+    ("color_grade", "warm", ("warm",)),
+    ("color_grade", "cool", ("cool", "cold")),
+    ("transitions", "cut", ("cut",)),
+    ("transitions", "dissolve", ("smooth", "dissolve", "crossfade")),
+    ("narration", True, ("voice", "narration", "voiceover")),
+]
+
+# Numeric patterns; the leftmost match of each kind is used. A number matches
+# its digits plus the first letter of the unit (checked in full by lookahead),
+# which tells the kinds apart: (kind, first letter, unit pattern).
+NUMBER_UNITS = [
+    ("fps", "f", r"fps"),
+    ("seconds", "s", r"(?:s|sec|secs|seconds)\b"),
+    ("minutes", "m", r"(?:m|min|mins|minutes)\b"),
+]
+STEP_PATTERN = r"every\s+(\d+)\b"
+
+
+def _compile_rules():
+    """Compile the rule table into the regexes scanned once per prompt.
+
+    Every alternative starts with a literal character so that `re` can skip
+    ahead to the next possible first letter instead of trying each
+    alternative at every position. Numbers are therefore spelled out as one
+    alternative per leading ASCII digit; prompts with other characters use a
+    `\\d` variant. Keywords are alternated longest first.
+
+    `findall` does not report overlapping matches, so `implied` maps a
+    keyword to the rules of every keyword it contains, and `overlaps` maps
+    each token (a keyword, "every" or a unit letter) to the tokens that
+    could start inside it and run past its end; those are looked up in the
+    prompt directly when the token is found.
     """
-    # Try remote first if requested
-    if use_llm:
-        try:
-            from .llm_client import request_intent_from_llm
-        except Exception:
-            request_intent_from_llm = None
-
-        if request_intent_from_llm is not None:
-            remote = request_intent_from_llm(user_input)
-            if isinstance(remote, dict):
-                if defaults:
-                    merged = dict(defaults)
-                    merged.update(remote)
-                    remote = merged
-                if "explanation" not in remote:
-                    remote["explanation"] = f"LLM-provided intent for: {user_input}"
-                return remote
-
-    # Local parsing fallback
-    if defaults is None:
-        defaults = {}
-
-    text = (user_input or "").lower()
-
+    rules = {}
+    for index, (keywords, _) in enumerate(STYLE_PRESETS):
+        for keyword in keywords:
+            rules.setdefault(keyword, set()).add(("style", index))
+    for index, (_, _, keywords) in enumerate(KEYWORD_RULES):
+        for keyword in keywords:
+            rules.setdefault(keyword, set()).add(("rule", index))
+
+    keywords = sorted(rules, key=len, reverse=True)
+    implied = {k: frozenset().union(*(rules[other] for other in keywords if other in k)) for k in keywords}
+    tokens = keywords + ["every"]
+    overlaps = {
+        k: tuple(token for token in tokens
+                 if any(token.startswith(k[offset:]) and token != k[offset:] for offset in range(1, len(k))))
+        for k in tokens
+    }
+    for _, letter, _ in NUMBER_UNITS:
+        overlaps[letter] = tuple(token for token in tokens if token.startswith(letter))
+
+    units = "(?=" + "|".join(pattern for _, _, pattern in NUMBER_UNITS) + ")[" + "".join(
+        letter for _, letter, _ in NUMBER_UNITS) + "]"
+    words = [re.escape(k) for k in keywords] + [r"every\s+(?=\d+\b)"]
+    matcher = re.compile("|".join(words + [rf"{digit}\d*\s*{units}" for digit in range(10)]))
+    unicode_matcher = re.compile("|".join(words + [rf"\d+\s*{units}"]))
+    return matcher, unicode_matcher, implied, overlaps
+
+
+_MATCHER, _UNICODE_MATCHER, _IMPLIED, _OVERLAPS = _compile_rules()
+_STEP = re.compile(STEP_PATTERN)
+_UNIT_KINDS = {letter: kind for kind, letter, _ in NUMBER_UNITS}
+
+
+def _scan(text: str):
+    """Rules hit by `text` and the first value of each numeric pattern."""
+    hits = set()
+    numbers = {}
+    found = set()
+    matcher = _MATCHER if text.isascii() else _UNICODE_MATCHER
+    for token in matcher.findall(text):
+        if token in _IMPLIED:
+            hits.update(_IMPLIED[token])
+            found.add(token)
+        elif token[0] == "e":
+            found.add("every")
+        else:
+            kind = _UNIT_KINDS[token[-1]]
+            if kind not in numbers:
+                numbers[kind] = int(token[:-1])
+            found.add(token[-1])
+
+    # Tokens hidden inside another match are looked up directly
+    pending = [hidden for token in found for hidden in _OVERLAPS[token]]
+    while pending:
+        token = pending.pop()
+        if token not in found and token in text:
+            found.add(token)
+            if token in _IMPLIED:
+                hits.update(_IMPLIED[token])
+            pending.extend(_OVERLAPS[token])
+
+    if "every" in found:
+        step = _STEP.search(text)
+        if step is not None:
+            numbers["step"] = int(step.group(1))
+    return hits, numbers
+
+
+def _local_intent(text: str, defaults: dict) -> dict:
+    """Rule-based intent for an already lower-cased prompt."""
     intent = {
         "style": defaults.get("style", "reel"),
         "pace": defaults.get("pace", "medium"),
@@ -45,58 +135,24 @@ def interpret_intent(user_input: str, defaults: Optional[dict] = None, use_llm:
         "narration": None,
     }
 
-    # Style / pace shortcuts
-    if "cinematic" in text:
-        intent.update({"style": "cinematic", "pace": "slow", "fps": 8, "step": 12})
-    elif "trailer" in text or "fast" in text or "energetic" in text:
-        intent.update({"style": "trailer", "pace": "fast", "fps": 15, "step": 6})
-    elif "reel" in text or "instagram" in text or "short" in text:
-        intent.update({"style": "reel", "pace": "medium", "fps": 12, "step": 8})
-
-    # FPS explicit
-    m = re.search(r"(\d+)\s*fps", text)
-    if m:
-        try:
-            intent["fps"] = int(m.group(1))
-        except ValueError:
-            pass
-
-    # Target duration (e.g., 10s, 30s, 1m)
-    m = re.search(r"(\d+)\s*(s|sec|secs|seconds)\b", text)
-    if m:
-        intent["target_duration"] = int(m.group(1))
-    else:
-        m = re.search(r"(\d+)\s*(m|min|mins|minutes)\b", text)
-        if m:
-            intent["target_duration"] = int(m.group(1)) * 60
-
-    # Step (select every Nth frame)
-    m = re.search(r"every\s+(\d+)\b", text)
-    if m:
-        try:
-            intent["step"] = int(m.group(1))
-        except ValueError:
-            pass
-
-    # Mood / color hints
-    if "dramatic" in text or "intense" in text:
-        intent["mood"] = "dramatic"
-    if "bright" in text or "vibrant" in text:
-        intent["color_grade"] = "bright"
-    if "dark" in text or "moody" in text:
-        intent["color_grade"] = "dark"
-    if "warm" in text:
-        intent["color_grade"] = "warm"
-    if "cool" in text or "cold" in text:
-        intent["color_grade"] = "cool"
-
-    # Transitions and narration
-    if "cut" in text and "smooth" not in text:
-        intent["transitions"] = "cut"
-    if "smooth" in text or "dissolve" in text or "crossfade" in text:
-        intent["transitions"] = "dissolve"
-    if "voice" in text or "narration" in text or "voiceover" in text:
-        intent["narration"] = True
+    hits, numbers = _scan(text)
+    for index, (_, preset) in enumerate(STYLE_PRESETS):
+        if ("style", index) in hits:
+            intent.update(preset)
+            break
+
+    if "fps" in numbers:
+        intent["fps"] = numbers["fps"]
+    if "seconds" in numbers:
+        intent["target_duration"] = numbers["seconds"]
+    elif "minutes" in numbers:
+        intent["target_duration"] = numbers["minutes"] * 60
+    if "step" in numbers:
+        intent["step"] = numbers["step"]
+
+    for index, (field, value, _) in enumerate(KEYWORD_RULES):
+        if ("rule", index) in hits:
+            intent[field] = value
 
     # Build explanation
     expl_parts = [f"style={intent['style']}", f"pace={intent['pace']}", f"fps={intent['fps']}", f"step={intent['step']}"]
@@ -115,3 +171,78 @@ def interpret_intent(user_input: str, defaults: Optional[dict] = None, use_llm:
 
     return intent
 
+
+def _positive_int(value) -> Optional[int]:
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def merge_remote_intent(remote: dict, user_input: str, defaults: Optional[dict] = None) -> dict:
+    """Complete an intent returned by the LLM with `defaults` and an explanation.
+
+    Nulls do not override `defaults`, and `fps` / `step` that are missing or
+    not positive integers fall back to the local parse of `user_input`.
+    """
+    merged = dict(defaults or {})
+    merged.update((key, value) for key, value in remote.items() if value is not None)
+    remote = merged
+    local = None
+    for key in ("fps", "step"):
+        value = _positive_int(remote.get(key))
+        if value is None:
+            local = local or _local_intent((user_input or "").lower(), defaults or {})
+            value = local[key]
+        remote[key] = value
+    if "explanation" not in remote:
+        remote["explanation"] = f"LLM-provided intent for: {user_input}"
+    return remote
+
+
+def interpret_intent(user_input: str, defaults: Optional[dict] = None, use_llm: bool = False,
+                     latency_budget: Optional[float] = None) -> dict:
+    """Parse a free-text user intent into a structured dict of video requirements.
+
+    If `use_llm` is True and Groq is configured via `GROQ_API_KEY`, this
+    will attempt to request a richer intent from the remote service and fall back
+    to local parsing on error. With a `latency_budget` (seconds, default
+    `SCRIPTORIA_LLM_LATENCY_BUDGET`) the local parse runs alongside the request
+    and is used whenever the remote intent is not back within the budget.
+    """
+    # Try remote first if requested
+    if use_llm:
+        try:
+            from .llm_client import LLM_LATENCY_BUDGET, hedged_call, record_fallback, request_intent_from_llm
+        except Exception:
+            request_intent_from_llm = None
+
+        if request_intent_from_llm is not None:
+            def remote_intent():
+                remote = request_intent_from_llm(user_input)
+                return merge_remote_intent(remote, user_input, defaults) if isinstance(remote, dict) else None
+
+            budget = latency_budget if latency_budget is not None else LLM_LATENCY_BUDGET
+            if budget:
+                return hedged_call(remote_intent, lambda: interpret_intent(user_input, defaults), budget)
+            remote = remote_intent()
+            if remote is not None:
+                return remote
+            record_fallback()
+
+    return _local_intent((user_input or "").lower(), defaults or {})
+
+
+def interpret_intents(user_inputs, defaults: Optional[dict] = None, cache_size: int = DEFAULT_BATCH_CACHE):
+    """Yield the local intent of each prompt in `user_inputs` (any iterable).
+
+    Meant for offline classification of large prompt logs: prompts go
+    through the compiled rule matcher only (no LLM), and repeated prompts
+    (compared case-insensitively) are served from an LRU memo of up to
+    `cache_size` results. Each yielded dict is a fresh copy.
+    """
+    defaults = defaults or {}
+    parse = functools.lru_cache(maxsize=cache_size)(lambda text: _local_intent(text, defaults))
+    for user_input in user_inputs:
+        yield dict(parse((user_input or "").lower()))
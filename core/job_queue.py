@@ -0,0 +1,289 @@
+import contextlib
+import importlib
+import json
+import os
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from . import tracing
+
+
+DEFAULT_JOBS_DB = os.path.join("data", "jobs.sqlite")
+DEFAULT_WORKERS = 2
+# Progress rows are rewritten at most this often (seconds) per job; the cancel
+# flag is checked on every write.
+PROGRESS_INTERVAL = 0.5
+
+# Win32 constants for the worker liveness check
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+ERROR_ACCESS_DENIED = 5
+STILL_ACTIVE = 259
+
+ACTIVE_STATES = ("queued", "running")
+FINAL_STATES = ("done", "failed", "cancelled")
+
+# Job kinds and the "module:function" that runs them inside a worker process.
+# A handler is called as `handler(params, job)` with a `JobContext` and returns
+# a JSON-serialisable result.
+JOB_HANDLERS = {
+    "render": "core.render_job:run_render_job",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    progress TEXT NOT NULL DEFAULT '{}',
+    params TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    cancel INTEGER NOT NULL DEFAULT 0,
+    pid INTEGER,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created);
+"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker once its job has been cancelled."""
+
+
+@contextlib.contextmanager
+def _connect(db_path):
+    """Short-lived connection that commits on success and is always closed.
+
+    Connections are never kept around: the queue is shared with forked worker
+    processes and SQLite connections must not cross a fork.
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _row_to_job(row) -> dict:
+    job = dict(row)
+    job["progress"] = json.loads(job["progress"] or "{}")
+    job["params"] = json.loads(job["params"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    job["cancel"] = bool(job["cancel"])
+    return job
+
+
+class JobContext:
+    """Handle a running job uses to report progress and publish partial results.
+
+    `progress(stage, done, total)` records per-stage counters and raises
+    `JobCancelled` once the job has been cancelled, so it can be passed
+    straight to the `progress` callbacks of the video engine. `publish(**kw)`
+    makes values (e.g. a preview path) visible before the job finishes.
+    Each stage is also a tracing span; a finished stage's duration is stored
+    as `seconds` in its progress entry.
+    """
+
+    def __init__(self, db_path, job_id):
+        self.db_path = db_path
+        self.id = job_id
+        self.stages = {}
+        self.partial = {}
+        self._last_write = 0.0
+        self._span = None
+
+    def stage(self, name):
+        self.end_stage()
+        self._span = tracing.start_span(name, stage=True)
+        self.stages.setdefault(name, {"done": 0, "total": None})
+        self._write(name, force=True)
+
+    def end_stage(self):
+        """Close the current stage's span and record its duration."""
+        if self._span is not None:
+            entry = self.stages[self._span.name]
+            entry["seconds"] = round(entry.get("seconds", 0) + self._span.end(), 3)
+            self._span = None
+
+    def timings(self) -> dict:
+        """Seconds per finished stage."""
+        return {name: entry["seconds"] for name, entry in self.stages.items() if "seconds" in entry}
+
+    def progress(self, stage, done, total=None):
+        self.stages.setdefault(stage, {}).update(done=done, total=total)
+        self._write(stage, force=total is not None and done >= total)
+
+    def callback(self, stage):
+        """`progress(done, total)` callback bound to `stage`."""
+        return lambda done, total=None: self.progress(stage, done, total)
+
+    def publish(self, **values):
+        self.partial.update(values)
+        self._write(None, force=True)
+
+    def _write(self, stage, force=False):
+        now = time.time()
+        if not force and now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        with _connect(self.db_path) as conn:
+            fields = {"progress": json.dumps(self.stages), "result": json.dumps({"partial": self.partial}),
+                      "updated": now}
+            if stage is not None:
+                fields["stage"] = stage
+            conn.execute(f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?",
+                         (*fields.values(), self.id))
+            cancelled = conn.execute("SELECT cancel FROM jobs WHERE id = ?", (self.id,)).fetchone()
+        if cancelled is None or cancelled["cancel"]:
+            raise JobCancelled(self.id)
+
+
+def _process_alive(pid) -> bool:
+    if not pid:
+        return False
+    if os.name == "nt":
+        return _windows_process_alive(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _windows_process_alive(pid) -> bool:
+    # os.kill(pid, 0) sends CTRL_C_EVENT on Windows, so ask the kernel instead
+    import ctypes
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        # Access denied means the process exists but belongs to someone else
+        return ctypes.get_last_error() == ERROR_ACCESS_DENIED
+    try:
+        code = ctypes.c_ulong()
+        return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(code))) and code.value == STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _load_handler(kind):
+    module_name, func_name = JOB_HANDLERS[kind].split(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def _finish(db_path, job, status, result=None, error=None):
+    job.end_stage()
+    result = dict(result or {"partial": job.partial}, timings=job.timings(), trace=tracing.finish_trace())
+    with _connect(db_path) as conn:
+        conn.execute("UPDATE jobs SET status = ?, progress = ?, result = ?, error = ?, updated = ? WHERE id = ?",
+                     (status, json.dumps(job.stages), json.dumps(result), error, time.time(), job.id))
+
+
+def _run_job(db_path, job_id, env=None):
+    """Worker entry point: run one job and record its outcome in the job table."""
+    os.environ.update(env or {})
+    with _connect(db_path) as conn:
+        # Claim the job atomically; another queue on the same table may have resubmitted it
+        claimed = conn.execute("UPDATE jobs SET status = 'running', pid = ?, updated = ? "
+                               "WHERE id = ? AND status = 'queued' AND cancel = 0",
+                               (os.getpid(), time.time(), job_id)).rowcount
+        if not claimed:
+            return
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    # Each job gets its own trace (`data/traces/<job id>.json`); its stage
+    # timings and the trace path are added to the job result.
+    tracing.start_trace(row["kind"], job_id)
+    job = JobContext(db_path, job_id)
+    try:
+        result = _load_handler(row["kind"])(json.loads(row["params"]), job)
+    except JobCancelled:
+        print(f"[INFO] Job {job_id} cancelled")
+        _finish(db_path, job, "cancelled")
+    except Exception as exc:
+        print(f"[ERROR] Job {job_id} failed: {exc}")
+        _finish(db_path, job, "failed", error=f"{type(exc).__name__}: {exc}")
+    else:
+        _finish(db_path, job, "done", result=result)
+
+
+class JobQueue:
+    """Persistent local job queue backed by SQLite and run on a process pool.
+
+    `submit` returns a job id straight away; the job runs in one of `workers`
+    processes, so several renders proceed without blocking the caller (or each
+    other, up to the pool size). `get` returns the job row with its status,
+    current stage, per-stage progress and result for polling UIs; `cancel`
+    stops a queued job or asks a running one to stop at its next progress
+    report. On start, jobs whose worker process is gone are marked failed and
+    queued ones are resubmitted.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_JOBS_DB, workers: int = DEFAULT_WORKERS):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self._futures = {}
+        with _connect(db_path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            running = conn.execute("SELECT id, pid FROM jobs WHERE status = 'running'").fetchall()
+            for row in running:
+                if not _process_alive(row["pid"]):
+                    conn.execute("UPDATE jobs SET status = 'failed', error = 'interrupted', updated = ? WHERE id = ?",
+                                 (time.time(), row["id"]))
+            queued = [row["id"] for row in conn.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created")]
+        for job_id in queued:
+            self._futures[job_id] = self.pool.submit(_run_job, db_path, job_id)
+
+    def submit(self, kind: str, params: dict, env: Optional[dict] = None) -> str:
+        """Queue a `kind` job with JSON `params`.
+
+        `env` is applied to the worker's environment before the job runs and
+        is not stored in the job table (use it for credentials).
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with _connect(self.db_path) as conn:
+            conn.execute("INSERT INTO jobs (id, kind, status, params, created, updated) VALUES (?, ?, 'queued', ?, ?, ?)",
+                         (job_id, kind, json.dumps(params), now, now))
+        self._futures[job_id] = self.pool.submit(_run_job, self.db_path, job_id, env)
+        print(f"[INFO] Queued {kind} job {job_id}")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with _connect(self.db_path) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def jobs(self, limit: int = 20) -> list:
+        """Most recent jobs first."""
+        with _connect(self.db_path) as conn:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,)).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; returns False if it already finished."""
+        with _connect(self.db_path) as conn:
+            updated = conn.execute("UPDATE jobs SET cancel = 1, updated = ? WHERE id = ? AND status IN (?, ?)",
+                                   (time.time(), job_id, *ACTIVE_STATES)).rowcount
+            if updated:
+                conn.execute("UPDATE jobs SET status = 'cancelled' WHERE id = ? AND status = 'queued'", (job_id,))
+        future = self._futures.get(job_id)
+        if future is not None:
+            future.cancel()
+        return bool(updated)
+
+    def shutdown(self, wait: bool = True):
+        self.pool.shutdown(wait=wait, cancel_futures=True)
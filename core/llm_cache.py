@@ -0,0 +1,126 @@
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Optional
+
+
+DEFAULT_CACHE_PATH = os.path.join("data", "llm_cache.sqlite")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_BUDGET_BYTES = 64 * 1024 ** 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def _normalize_text(text) -> str:
+    return " ".join(str(text).split())
+
+
+def cache_key(model: str, messages, temperature: float) -> str:
+    """Key for a chat request: model, messages with whitespace collapsed, temperature."""
+    normalized = [{"role": m.get("role"), "content": _normalize_text(m.get("content", ""))} for m in messages]
+    payload = json.dumps({"model": model, "messages": normalized, "temperature": round(float(temperature), 4)},
+                         sort_keys=True, ensure_ascii=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """On-disk cache of raw chat-completion responses.
+
+    Entries expire `ttl` seconds after they were stored and the least recently
+    used ones are evicted once the stored responses exceed `budget_bytes`.
+    Hit, miss and eviction counts are kept in the same database, so they add
+    up across processes (render jobs run in worker processes).
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_TTL_SECONDS,
+                 budget_bytes: int = DEFAULT_BUDGET_BYTES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.budget_bytes = budget_bytes
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _count(conn, name, amount=1):
+        conn.execute("INSERT INTO counters (name, value) VALUES (?, ?) "
+                     "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, amount))
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count(conn, "expired")
+                row = None
+            if row is None:
+                self._count(conn, "misses")
+                return None
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._count(conn, "hits")
+        return json.loads(row[0])
+
+    def put(self, key: str, model: str, response: dict):
+        data = json.dumps(response, ensure_ascii=True)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO responses (key, model, response, size, created, last_used) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", (key, model, data, len(data), now, now))
+            self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.budget_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            if total <= self.budget_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        self._count(conn, "evictions", evicted)
+
+    def stats(self) -> dict:
+        """Counters plus the current entry count and stored bytes."""
+        with self._connect() as conn:
+            stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+            stats.update(dict(conn.execute("SELECT name, value FROM counters").fetchall()))
+            stats["entries"], stats["bytes"] = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+            conn.execute("DELETE FROM counters")
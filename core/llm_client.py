@@ -1,43 +1,143 @@
 import json
 import os
 import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
 from typing import Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from . import tracing
+from .circuit_breaker import CircuitBreaker, backoff_delay
+from .llm_cache import DEFAULT_BUDGET_BYTES, DEFAULT_CACHE_PATH, DEFAULT_TTL_SECONDS, LLMCache, cache_key
 
 
 GROQ_CHAT_COMPLETIONS_URL = "https://api.groq.com/openai/v1/chat/completions"
 DEFAULT_GROQ_MODEL = "llama-3.3-70b-versatile"
+# Independent LLM requests (e.g. intent and preproduction) run concurrently on
+# this many threads, sharing one pooled session.
+LLM_MAX_WORKERS = int(os.environ.get("SCRIPTORIA_LLM_WORKERS", 4))
 
+# Transient failures (connection errors, timeouts, 429 and 5xx) are retried
+# this many times with jittered exponential backoff.
+LLM_RETRIES = int(os.environ.get("SCRIPTORIA_LLM_RETRIES", 2))
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# The breaker opens after this many failed calls in a row and lets a trial
+# call through again after the reset timeout (seconds).
+BREAKER_THRESHOLD = int(os.environ.get("SCRIPTORIA_LLM_BREAKER_THRESHOLD", 3))
+BREAKER_RESET_SECONDS = float(os.environ.get("SCRIPTORIA_LLM_BREAKER_RESET", 60))
+# Hedged mode: when set (seconds), callers compute the local result alongside
+# the LLM call and use the LLM answer only if it arrives within this budget.
+LLM_LATENCY_BUDGET = float(os.environ.get("SCRIPTORIA_LLM_LATENCY_BUDGET", 0)) or None
 
-def _post_groq(messages, timeout: int = 30, temperature: float = 0.2) -> Optional[dict]:
-    api_key = os.environ.get("GROQ_API_KEY")
-    if not api_key:
-        print("[LLM CLIENT] GROQ_API_KEY not found in environment variables.")
+_session = None
+_executor = None
+_caches = {}
+_lock = threading.Lock()
+_breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_RESET_SECONDS)
+_counters = {"retries": 0, "fallbacks": 0, "hedge_remote": 0, "hedge_local": 0}
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Response cache configured by `SCRIPTORIA_LLM_CACHE` (a path, or "off").
+
+    TTL and size budget come from `SCRIPTORIA_LLM_CACHE_TTL` (seconds) and
+    `SCRIPTORIA_LLM_CACHE_BYTES`.
+    """
+    path = os.environ.get("SCRIPTORIA_LLM_CACHE", DEFAULT_CACHE_PATH)
+    if path.lower() in ("", "0", "off", "false", "no"):
         return None
+    with _lock:
+        if path not in _caches:
+            _caches[path] = LLMCache(path, ttl=float(os.environ.get("SCRIPTORIA_LLM_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+                                     budget_bytes=int(os.environ.get("SCRIPTORIA_LLM_CACHE_BYTES", DEFAULT_BUDGET_BYTES)))
+        return _caches[path]
 
-    api_url = os.environ.get("GROQ_API_URL", GROQ_CHAT_COMPLETIONS_URL)
-    model = os.environ.get("GROQ_MODEL", DEFAULT_GROQ_MODEL)
 
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}",
-    }
-    payload = {
-        "model": model,
-        "temperature": temperature,
-        "messages": messages,
-    }
+def get_session() -> requests.Session:
+    """Shared HTTP session, so requests reuse pooled keep-alive connections.
+
+    One TLS handshake serves every later call to the same host instead of one
+    per request.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=LLM_MAX_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def submit_llm_request(fn, *args, **kwargs) -> Future:
+    """Run `fn(*args, **kwargs)` (one of the `request_*` helpers) on the LLM thread pool."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS, thread_name_prefix="scriptoria-llm")
+        executor = _executor
+    return executor.submit(fn, *args, **kwargs)
+
+
+def _reset_after_fork():
+    # Pooled sockets, the lock and the pool threads must not be shared with a
+    # forked child (render job workers); it builds its own on first use.
+    global _session, _executor, _lock, _breaker
+    _session = None
+    _executor = None
+    _lock = threading.Lock()
+    _breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_RESET_SECONDS)
+
+
+# POSIX only; Windows has no fork, so worker processes start fresh anyway
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _count(name: str, amount: int = 1):
+    with _lock:
+        _counters[name] += amount
+
+
+def record_fallback():
+    """Count a caller falling back to the local engines after an LLM miss."""
+    _count("fallbacks")
+
+
+def llm_metrics() -> dict:
+    """Circuit breaker state and counters, retry, fallback and hedge counts."""
+    with _lock:
+        counters = dict(_counters)
+    return {"breaker": _breaker.metrics(), **counters}
+
 
+def hedged_call(remote_fn, local_fn, latency_budget: float):
+    """Run `remote_fn` on the LLM pool and `local_fn` meanwhile.
+
+    Returns the remote result if it arrives (and is not None) within
+    `latency_budget` seconds of the call, otherwise the local one. The remote
+    call is left to finish in the background (its response still lands in
+    the cache).
+    """
+    start = time.monotonic()
+    future = submit_llm_request(remote_fn)
+    local = local_fn()
     try:
-        response = requests.post(api_url, headers=headers, json=payload, timeout=timeout)
-        if response.status_code != 200:
-            print(f"[LLM CLIENT] Groq request failed: {response.status_code} {response.text}")
-            return None
-        return response.json()
+        remote = future.result(timeout=max(0.0, latency_budget - (time.monotonic() - start)))
+    except FutureTimeout:
+        remote = None
     except Exception as exc:
-        print(f"[LLM CLIENT] Groq request error: {exc}")
-        return None
+        print(f"[LLM CLIENT] Hedged request error: {exc}")
+        remote = None
+    if remote is not None:
+        _count("hedge_remote")
+        return remote
+    _count("hedge_local")
+    return local
 
 
 def _extract_json_object(text: str) -> Optional[dict]:
@@ -73,7 +173,129 @@ def _extract_content(raw: dict) -> Optional[str]:
     return None
 
 
-def request_intent_from_llm(prompt: str, timeout: int = 30) -> Optional[dict]:
+def _open_cache(use_cache: bool) -> Optional[LLMCache]:
+    if not use_cache:
+        return None
+    try:
+        return get_llm_cache()
+    except Exception as exc:
+        print(f"[LLM CLIENT] Response cache unavailable: {exc}")
+        return None
+
+
+def _cache_get(cache: LLMCache, key: str) -> Optional[dict]:
+    # A broken cache database is a miss, not a failed request
+    try:
+        return cache.get(key)
+    except Exception as exc:
+        print(f"[LLM CLIENT] Response cache read failed: {exc}")
+        return None
+
+
+def _cache_put(cache: LLMCache, key: str, model: str, raw: dict):
+    try:
+        cache.put(key, model, raw)
+    except Exception as exc:
+        print(f"[LLM CLIENT] Response cache write failed: {exc}")
+
+
+def _post_groq(messages, timeout: int = 30, temperature: float = 0.2, use_cache: bool = True,
+               validate=_extract_content) -> Optional[dict]:
+    """POST a chat request and return the raw response JSON, or None on failure.
+
+    Responses for which `validate(raw)` is truthy are cached (see
+    `get_llm_cache`) under the model, normalized messages and temperature,
+    and a cached response is only used if it still validates;
+    `use_cache=False` bypasses the cache for both lookup and store.
+    """
+    api_key = os.environ.get("GROQ_API_KEY")
+    if not api_key:
+        print("[LLM CLIENT] GROQ_API_KEY not found in environment variables.")
+        return None
+
+    api_url = os.environ.get("GROQ_API_URL", GROQ_CHAT_COMPLETIONS_URL)
+    model = os.environ.get("GROQ_MODEL", DEFAULT_GROQ_MODEL)
+
+    cache = _open_cache(use_cache)
+    key = cache_key(model, messages, temperature) if cache is not None else None
+    if cache is not None:
+        cached = _cache_get(cache, key)
+        if cached is not None and validate(cached):
+            tracing.count("llm_cache_hits")
+            return cached
+        tracing.count("llm_cache_misses")
+
+    if not _breaker.allow():
+        tracing.count("llm_short_circuits")
+        print("[LLM CLIENT] Circuit open, skipping Groq request.")
+        return None
+
+    with tracing.span("llm_call", model=model):
+        raw = _post_with_retries(api_url, api_key, model, messages, timeout, temperature)
+    if raw is not None and cache is not None and validate(raw):
+        _cache_put(cache, key, model, raw)
+    return raw
+
+
+def _post_with_retries(api_url, api_key, model, messages, timeout, temperature) -> Optional[dict]:
+    """Send the request, retrying transient failures, and feed the outcome to the breaker.
+
+    `timeout` bounds the whole call: each attempt gets what is left of it,
+    and no retry starts once its backoff would run past it.
+    """
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}",
+    }
+    payload = {
+        "model": model,
+        "temperature": temperature,
+        "messages": messages,
+    }
+
+    deadline = time.monotonic() + timeout
+    for attempt in range(LLM_RETRIES + 1):
+        if attempt:
+            delay = backoff_delay(attempt - 1)
+            if time.monotonic() + delay >= deadline:
+                break
+            _count("retries")
+            time.sleep(delay)
+        tracing.count("llm_requests")
+        start = time.perf_counter()
+        try:
+            response = get_session().post(api_url, headers=headers, json=payload,
+                                          timeout=deadline - time.monotonic())
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            print(f"[LLM CLIENT] Groq request error: {exc}")
+            continue
+        except Exception as exc:
+            print(f"[LLM CLIENT] Groq request error: {exc}")
+            break
+        finally:
+            tracing.observe("llm_latency_seconds", time.perf_counter() - start)
+
+        if response.status_code in RETRYABLE_STATUS:
+            print(f"[LLM CLIENT] Groq request failed: {response.status_code} {response.text}")
+            continue
+        # Other errors (bad request, auth) are not the service being down
+        _breaker.record_success()
+        if response.status_code != 200:
+            print(f"[LLM CLIENT] Groq request failed: {response.status_code} {response.text}")
+            return None
+        try:
+            raw = response.json()
+        except ValueError as exc:
+            print(f"[LLM CLIENT] Groq request error: {exc}")
+            return None
+        return raw
+
+    tracing.count("llm_failures")
+    _breaker.record_failure()
+    return None
+
+
+def request_intent_from_llm(prompt: str, timeout: int = 30, use_cache: bool = True) -> Optional[dict]:
     """Return a structured video intent using Groq, or None on failure."""
     if not prompt:
         return None
@@ -89,38 +311,158 @@ def request_intent_from_llm(prompt: str, timeout: int = 30) -> Optional[dict]:
         {"role": "user", "content": prompt},
     ]
 
-    raw = _post_groq(messages=messages, timeout=timeout, temperature=0.1)
+    raw = _post_groq(messages=messages, timeout=timeout, temperature=0.1, use_cache=use_cache,
+                     validate=_parse_intent)
     if not raw:
         return None
+    return _parse_intent(raw)
 
-    content = _extract_content(raw)
-    if not content:
-        return None
 
-    parsed = _extract_json_object(content)
+def _parse_intent(raw: dict) -> Optional[dict]:
+    parsed = _extract_json_object(_extract_content(raw) or "")
     if not isinstance(parsed, dict):
         return None
-
     return parsed.get("intent") if isinstance(parsed.get("intent"), dict) else parsed
 
 
-def request_text_from_llm(prompt: str, timeout: int = 30) -> Optional[str]:
+def _text_messages(prompt: str) -> list:
+    return [
+        {"role": "system", "content": "You are a concise, practical assistant."},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def request_text_from_llm(prompt: str, timeout: int = 30, use_cache: bool = True) -> Optional[str]:
     """Return plain assistant text from Groq for a user prompt."""
     if not prompt:
         return None
 
-    messages = [
-        {"role": "system", "content": "You are a concise, practical assistant."},
-        {"role": "user", "content": prompt},
-    ]
-    raw = _post_groq(messages=messages, timeout=timeout, temperature=0.5)
+    raw = _post_groq(messages=_text_messages(prompt), timeout=timeout, temperature=0.5, use_cache=use_cache)
     if not raw:
         return None
 
     return _extract_content(raw)
 
 
-def request_preproduction_from_llm(prompt: str, intent: Optional[dict] = None, timeout: int = 45) -> Optional[dict]:
+def _iter_sse_data(response):
+    """Yield the `data:` payloads of an SSE response until `[DONE]`."""
+    # chunk_size=None hands over each transfer chunk as soon as it arrives
+    for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        yield data
+
+
+def stream_text_from_llm(prompt: str, timeout: int = 30, use_cache: bool = True, status: dict = None):
+    """Yield assistant text for a user prompt as it streams in from Groq.
+
+    Same request as `request_text_from_llm`, sent with `stream: true`; the
+    OpenAI-compatible SSE chunks are parsed and their `delta.content` pieces
+    yielded as they arrive. `timeout` bounds the connect and the wait between
+    chunks. On an error status, a timeout, a dropped connection or a stream
+    closed before a `finish_reason` the stream ends (after whatever text
+    already arrived), the error is logged and counts as a breaker failure.
+    If `status` is given it is filled with `complete` (the whole answer
+    arrived) and `error` (None, or why it did not), so callers can flag a
+    truncated answer. A complete answer is cached like
+    `request_text_from_llm`'s, and a cached answer is yielded in one piece.
+    """
+    if status is None:
+        status = {}
+    status.update({"complete": False, "error": None})
+    if not prompt:
+        return
+
+    api_key = os.environ.get("GROQ_API_KEY")
+    if not api_key:
+        print("[LLM CLIENT] GROQ_API_KEY not found in environment variables.")
+        status["error"] = "GROQ_API_KEY not set"
+        return
+
+    api_url = os.environ.get("GROQ_API_URL", GROQ_CHAT_COMPLETIONS_URL)
+    model = os.environ.get("GROQ_MODEL", DEFAULT_GROQ_MODEL)
+    messages = _text_messages(prompt)
+    temperature = 0.5
+
+    cache = _open_cache(use_cache)
+    key = cache_key(model, messages, temperature) if cache is not None else None
+    if cache is not None:
+        cached = _extract_content(_cache_get(cache, key) or {})
+        if cached:
+            status["complete"] = True
+            yield cached
+            return
+
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}",
+        "Accept": "text/event-stream",
+    }
+    payload = {
+        "model": model,
+        "temperature": temperature,
+        "messages": messages,
+        "stream": True,
+    }
+
+    if not _breaker.allow():
+        print("[LLM CLIENT] Circuit open, skipping Groq stream.")
+        status["error"] = "circuit open"
+        return
+
+    pieces = []
+    finished = False
+    failed = None
+    try:
+        with get_session().post(api_url, headers=headers, json=payload, timeout=timeout, stream=True) as response:
+            if response.status_code != 200:
+                print(f"[LLM CLIENT] Groq stream failed: {response.status_code} {response.text}")
+                status["error"] = f"HTTP {response.status_code}"
+                failed = response.status_code in RETRYABLE_STATUS
+                return
+            for data in _iter_sse_data(response):
+                try:
+                    choice = json.loads(data)["choices"][0]
+                except (ValueError, KeyError, IndexError, TypeError):
+                    continue
+                piece = (choice.get("delta") or {}).get("content")
+                if piece:
+                    pieces.append(piece)
+                    yield piece
+                if choice.get("finish_reason"):
+                    finished = True
+        if not finished:
+            print("[LLM CLIENT] Groq stream closed before the answer finished.")
+            status["error"] = "stream closed before the answer finished"
+            failed = True
+    except GeneratorExit:
+        # The consumer stopped reading; the service itself was answering
+        failed = False
+        raise
+    except Exception as exc:
+        print(f"[LLM CLIENT] Groq stream error: {exc}")
+        status["error"] = str(exc)
+        failed = True
+        return
+    finally:
+        # Also runs when the consumer closes the stream early, so a half-open
+        # breaker always gets its trial's outcome
+        if failed:
+            _breaker.record_failure()
+        else:
+            _breaker.record_success()
+        status["complete"] = finished
+
+    text = "".join(pieces).strip()
+    if cache is not None and finished and text:
+        _cache_put(cache, key, model, {"choices": [{"message": {"role": "assistant", "content": text}}]})
+
+
+def request_preproduction_from_llm(prompt: str, intent: Optional[dict] = None, timeout: int = 45,
+                                   use_cache: bool = True) -> Optional[dict]:
     """Return full preproduction plan JSON from Groq, or None on failure."""
     if not prompt:
         return None
@@ -144,15 +486,15 @@ def request_preproduction_from_llm(prompt: str, intent: Optional[dict] = None, t
         {"role": "user", "content": user_prompt},
     ]
 
-    raw = _post_groq(messages=messages, timeout=timeout, temperature=0.3)
+    raw = _post_groq(messages=messages, timeout=timeout, temperature=0.3, use_cache=use_cache,
+                     validate=_parse_preproduction)
     if not raw:
         return None
+    return _parse_preproduction(raw)
 
-    content = _extract_content(raw)
-    if not content:
-        return None
 
-    parsed = _extract_json_object(content)
+def _parse_preproduction(raw: dict) -> Optional[dict]:
+    parsed = _extract_json_object(_extract_content(raw) or "")
     if not isinstance(parsed, dict):
         return None
     required = {"screenplay", "workflow", "characters", "sound_design"}
@@ -0,0 +1,114 @@
+import os
+
+from core.llm_client import llm_metrics
+from core.state_manager import DEFAULT_STATE_DB, StateStore
+from preproduction_engine.preprod_controller import ProductionPlan
+from video_engine.frame_cache import DEFAULT_BUDGET_BYTES, FrameCache, video_digest
+from video_engine.frame_graph_api import build_frame_graph, build_semantic_graph, traverse_frame_graph
+from video_engine.regenerate_api import proxy_path, regenerate_video, render_proxy
+from video_engine.render_cache import DEFAULT_BUDGET_BYTES as DEFAULT_RENDER_CACHE_BYTES, RenderCache
+from video_engine.shot_detector import load_shots
+from video_engine.stream_pipeline import run_streaming_pipeline
+
+
+def run_render_job(params: dict, job) -> dict:
+    """Run the Scriptoria pipeline for one upload as a `JobQueue` "render" job.
+
+    `params` carries `input_path`, `style_text`, `output_dir` and the UI
+    options (`use_llm`, `use_llm_preprod`, `fps`, `semantic`, `shot_sampling`, `streaming`,
+    `renditions`, `frames_dir`, `frame_format`, `frame_cache_bytes`,
+    `extract_workers`, `encode_workers`, `lut` (a .cube file), `states_db`, `render_cache_dir`,
+    `render_cache_bytes` (0 disables the render cache)). Progress is reported per stage through
+    `job`. Finished renders are appended to the `StateStore`.
+    """
+    input_path = params["input_path"]
+    os.makedirs(params["output_dir"], exist_ok=True)
+    output_path = os.path.join(params["output_dir"], "output_remix.mp4")
+
+    job.stage("intent")
+    # The preproduction request goes out alongside the intent request and runs
+    # while frames are extracted
+    plan = ProductionPlan(params.get("style_text", ""), use_llm_intent=params.get("use_llm", True),
+                          use_llm_preprod=params.get("use_llm_preprod", True))
+    intent = dict(plan.intent())
+    if params.get("fps"):
+        intent["fps"] = int(params["fps"])
+    renditions = params.get("renditions") or ["full"]
+    if renditions != ["full"]:
+        intent["encoder"] = "ffmpeg"
+        intent["renditions"] = ["full"] + [r for r in renditions if r != "full"]
+    if params.get("lut"):
+        intent["lut"] = params["lut"]
+    if params.get("encode_workers", 1) > 1:
+        intent["render_workers"] = params["encode_workers"]
+    job.publish(intent=intent)
+
+    job.stage("ingest")
+    digest = video_digest(input_path)
+
+    frame_dir = None
+    if not params.get("streaming"):
+        job.stage("extract")
+        cache = FrameCache(params.get("frames_dir", os.path.join("data", "frames")),
+                           params.get("frame_cache_bytes", DEFAULT_BUDGET_BYTES), params.get("extract_workers", 1))
+        frame_dir = cache.get_or_extract(input_path, step=intent["step"], fmt=params.get("frame_format", "jpg"),
+                                         progress=job.callback("extract"), digest=digest)
+
+    job.stage("preproduction")
+    preprod = plan.preproduction()
+    job.publish(intent=intent, preproduction=preprod, llm=llm_metrics())
+
+    result = {"intent": intent, "preproduction": preprod, "llm": llm_metrics(), "output_path": output_path,
+              "frames_written": 0, "skipped": [], "renditions": {}}
+    if params.get("streaming"):
+        job.stage("render")
+        result["frames_written"] = run_streaming_pipeline(input_path, output_path, intent,
+                                                          progress=job.callback("render"))
+        result["renditions"] = {"full": output_path} if result["frames_written"] else {}
+        return _save_state(params, job, digest, result)
+
+    job.stage("select")
+    frames = build_frame_graph(frame_dir)
+    graph = build_semantic_graph(frame_dir, frames, video_digest=digest) if params.get("semantic") else None
+    shots, scene_count = None, None
+    if params.get("shot_sampling"):
+        # Sample per detected shot, one group of shots per screenplay scene
+        shots = load_shots(frame_dir)
+        scene_count = len(preprod["screenplay"].get("scenes", [])) or None
+    frame_path = traverse_frame_graph(frames, intent, graph=graph, shots=shots, scene_count=scene_count)
+    if not frame_path:
+        return result
+
+    render_cache = None
+    cache_bytes = params.get("render_cache_bytes", DEFAULT_RENDER_CACHE_BYTES)
+    if cache_bytes:
+        render_cache = RenderCache(params.get("render_cache_dir", os.path.join("data", "render_cache")), cache_bytes)
+
+    # A cached render is returned straight away, so it needs no preview
+    if render_cache is None or not render_cache.contains(digest, frame_path, output_path, intent):
+        job.stage("preview")
+        preview = render_proxy(frame_dir, frame_path, proxy_path(output_path), intent)
+        if preview["frames_written"]:
+            job.publish(intent=intent, preproduction=preprod, preview=preview["output_path"])
+            result["preview"] = preview["output_path"]
+
+    job.stage("render")
+    if render_cache is not None:
+        render = render_cache.regenerate(digest, frame_dir, frame_path, output_path, intent,
+                                         progress=job.callback("render"))
+        result["render_cache"] = render["cache"]
+    else:
+        render = regenerate_video(frame_dir, frame_path, output_path, intent, progress=job.callback("render"))
+    result.update(output_path=render["output_path"], frames_written=render["frames_written"],
+                  skipped=render["skipped"], renditions=render["renditions"])
+    return _save_state(params, job, digest, result, frame_path)
+
+
+def _save_state(params, job, digest, result, frame_path=None) -> dict:
+    job.end_stage()
+    store = StateStore(params.get("states_db", DEFAULT_STATE_DB))
+    result["state_id"] = store.record(result["intent"], video_hash=digest, frame_path=frame_path,
+                                      preproduction=result["preproduction"], output_path=result["output_path"],
+                                      timings=job.timings(), job_id=job.id, renditions=result["renditions"],
+                                      frames_written=result["frames_written"])
+    return result
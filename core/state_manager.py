@@ -1,7 +1,133 @@
+import contextlib
+import hashlib
 import json
 import os
+import sqlite3
+import time
+from typing import Optional
+
+
+DEFAULT_STATE_DB = os.path.join("data", "states", "runs.sqlite")
+# Free-text fields and execution settings that do not change what gets rendered
+FINGERPRINT_IGNORED = ("explanation", "render_workers")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_hash TEXT,
+    intent_fingerprint TEXT NOT NULL,
+    created REAL NOT NULL,
+    job_id TEXT,
+    output_path TEXT,
+    state TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_video_intent ON runs (video_hash, intent_fingerprint, created);
+CREATE INDEX IF NOT EXISTS runs_intent ON runs (intent_fingerprint, created);
+CREATE INDEX IF NOT EXISTS runs_created ON runs (created);
+"""
+_INSERT = ("INSERT INTO runs (video_hash, intent_fingerprint, created, job_id, output_path, state) "
+           "VALUES (?, ?, ?, ?, ?, ?)")
+
 
 def save_state(state: dict, states_dir: str, name: str = "state_1.json"):
+    """Write `state` as an indented JSON snapshot; run history belongs in `StateStore`."""
     os.makedirs(states_dir, exist_ok=True)
     with open(os.path.join(states_dir, name), "w") as f:
         json.dump(state, f, indent=2)
+
+
+def intent_fingerprint(intent: dict) -> str:
+    """Stable hash of the intent fields that affect a render (key order does not matter)."""
+    fields = {k: v for k, v in (intent or {}).items() if k not in FINGERPRINT_IGNORED}
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _row_to_run(row) -> dict:
+    run = json.loads(row["state"])
+    run.update(id=row["id"], video_hash=row["video_hash"], intent_fingerprint=row["intent_fingerprint"],
+               created=row["created"], job_id=row["job_id"], output_path=row["output_path"])
+    return run
+
+
+class StateStore:
+    """Append-only history of creative states, one row per run, in SQLite.
+
+    Each run keeps its intent, frame path, preproduction plan, output
+    location and stage timings. Rows are indexed by source video hash
+    (`frame_cache.video_digest`), intent fingerprint and creation time, so
+    `latest(video_hash, intent)` - the last render of this video with this
+    intent - is a single index probe however many runs are stored.
+    """
+
+    def __init__(self, path: str = DEFAULT_STATE_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _row(intent: dict, video_hash: Optional[str] = None, frame_path=None, preproduction=None,
+             output_path: Optional[str] = None, timings: Optional[dict] = None, job_id: Optional[str] = None,
+             created: Optional[float] = None, **extra) -> tuple:
+        state = {"intent": intent, "frame_path": list(frame_path) if frame_path is not None else None,
+                 "preproduction": preproduction, "timings": timings or {}, **extra}
+        return (video_hash, intent_fingerprint(intent), created or time.time(), job_id, output_path,
+                json.dumps(state, ensure_ascii=True, default=str))
+
+    def record(self, intent: dict, video_hash: Optional[str] = None, frame_path=None, preproduction=None,
+               output_path: Optional[str] = None, timings: Optional[dict] = None, job_id: Optional[str] = None,
+               **extra) -> int:
+        """Append one run and return its id. `extra` values are stored with the state."""
+        row = self._row(intent, video_hash, frame_path, preproduction, output_path, timings, job_id, **extra)
+        with self._connect() as conn:
+            return conn.execute(_INSERT, row).lastrowid
+
+    def record_many(self, runs) -> int:
+        """Append runs given as dicts of `record` arguments in one transaction (e.g. an import)."""
+        with self._connect() as conn:
+            return conn.executemany(_INSERT, (self._row(**run) for run in runs)).rowcount
+
+    def get(self, run_id: int) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return _row_to_run(row) if row else None
+
+    def latest(self, video_hash: str, intent: dict) -> Optional[dict]:
+        """The most recent run of `video_hash` with an intent matching `intent`, or None."""
+        runs = self.history(video_hash=video_hash, intent=intent, limit=1)
+        return runs[0] if runs else None
+
+    def history(self, video_hash: Optional[str] = None, intent: Optional[dict] = None,
+                since: Optional[float] = None, limit: int = 20) -> list:
+        """Runs matching the given video hash / intent / start time, newest first."""
+        clauses, args = [], []
+        if video_hash is not None:
+            clauses.append("video_hash = ?")
+            args.append(video_hash)
+        if intent is not None:
+            clauses.append("intent_fingerprint = ?")
+            args.append(intent_fingerprint(intent))
+        if since is not None:
+            clauses.append("created >= ?")
+            args.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT * FROM runs {where} ORDER BY created DESC, id DESC LIMIT ?",
+                                (*args, limit)).fetchall()
+        return [_row_to_run(row) for row in rows]
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
@@ -0,0 +1,288 @@
+import contextlib
+import functools
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+
+
+DEFAULT_TRACE_DIR = os.path.join("data", "traces")
+DEFAULT_METRICS_DB = os.path.join("data", "metrics.sqlite")
+DEFAULT_METRICS_FILE = os.path.join("data", "metrics.prom")
+METRIC_PREFIX = "scriptoria_"
+
+_METRICS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    name TEXT NOT NULL,
+    labels TEXT NOT NULL DEFAULT '',
+    value REAL NOT NULL,
+    PRIMARY KEY (name, labels)
+);
+"""
+
+
+class Span:
+    """One timed section of a trace; ended by `end()` or by leaving `Trace.span`.
+
+    A span started while no trace is active (`trace` None) is only timed.
+    """
+
+    def __init__(self, trace, span_id, parent, name, stage, attrs):
+        self.trace = trace
+        self.id = span_id
+        self.parent = parent
+        self.name = name
+        self.stage = stage
+        self.attrs = attrs
+        self.thread = threading.current_thread().name
+        self.start = time.perf_counter()
+        self.duration = None
+
+    def end(self):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.start
+            if self.trace is not None:
+                self.trace._pop(self)
+        return self.duration
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "parent": self.parent, "name": self.name, "stage": self.stage,
+                "start": round(self.start - self.trace.start, 6),
+                "duration": round(self.duration, 6) if self.duration is not None else None,
+                "thread": self.thread, "attrs": self.attrs}
+
+
+class Trace:
+    """Spans and counters collected for one run (e.g. one render job).
+
+    Spans nest per thread: a span started while another is open on the same
+    thread becomes its child. `stage=True` marks the pipeline stages shown in
+    the per-stage breakdown. `count` adds to a named counter and `observe`
+    records a sample (e.g. a latency) kept as count/sum/max. All methods are
+    thread-safe, so LLM calls on the request pool land in the same trace.
+    """
+
+    def __init__(self, name: str = "run", trace_id: Optional[str] = None):
+        self.id = trace_id or uuid.uuid4().hex[:12]
+        self.name = name
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.spans = []
+        self.counters = {}
+        self.observations = {}
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _pop(self, span):
+        stack = self._stack()
+        if span in stack:
+            stack.remove(span)
+
+    def start_span(self, name: str, stage: bool = False, **attrs) -> Span:
+        stack = self._stack()
+        with self._lock:
+            span = Span(self, next(self._ids), stack[-1].id if stack else None, name, stage, attrs)
+            self.spans.append(span)
+        stack.append(span)
+        return span
+
+    @contextlib.contextmanager
+    def span(self, name: str, stage: bool = False, **attrs):
+        span = self.start_span(name, stage, **attrs)
+        try:
+            yield span
+        except BaseException as exc:
+            span.attrs["error"] = type(exc).__name__
+            raise
+        finally:
+            span.end()
+
+    def count(self, name: str, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            stats = self.observations.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["sum"] += value
+            stats["max"] = max(stats["max"], value)
+
+    def stage_timings(self) -> dict:
+        """Seconds spent per stage, in the order the stages started."""
+        timings = {}
+        for span in self.spans:
+            if span.stage and span.duration is not None:
+                timings[span.name] = timings.get(span.name, 0.0) + span.duration
+        return timings
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {"id": self.id, "name": self.name, "started": self.started,
+                    "duration": round(time.perf_counter() - self.start, 6),
+                    "stages": {name: round(seconds, 6) for name, seconds in self.stage_timings().items()},
+                    "spans": [span.to_dict() for span in self.spans],
+                    "counters": dict(self.counters),
+                    "observations": {k: dict(v) for k, v in self.observations.items()}}
+
+    def save(self, trace_dir: str = None) -> str:
+        """Write the trace as JSON to `trace_dir/<id>.json` and return the path."""
+        trace_dir = trace_dir or os.environ.get("SCRIPTORIA_TRACE_DIR", DEFAULT_TRACE_DIR)
+        os.makedirs(trace_dir, exist_ok=True)
+        path = os.path.join(trace_dir, f"{self.id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+
+# The trace everything in this process reports to. None until `start_trace`
+# is called (job workers start one per job), and the module-level helpers
+# below do nothing then, so long-lived processes never accumulate spans.
+_current = None
+
+
+def current() -> Optional[Trace]:
+    return _current
+
+
+def start_trace(name: str = "run", trace_id: Optional[str] = None) -> Trace:
+    global _current
+    _current = Trace(name, trace_id)
+    return _current
+
+
+def start_span(name: str, stage: bool = False, **attrs) -> Span:
+    if _current is None:
+        return Span(None, None, None, name, stage, attrs)
+    return _current.start_span(name, stage, **attrs)
+
+
+def span(name: str, stage: bool = False, **attrs):
+    if _current is None:
+        return contextlib.nullcontext()
+    return _current.span(name, stage, **attrs)
+
+
+def traced(name: str):
+    """Decorator running the function inside a `name` span of the current trace."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name: str, value=1):
+    if _current is not None:
+        _current.count(name, value)
+
+
+def observe(name: str, value: float):
+    if _current is not None:
+        _current.observe(name, value)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsStore:
+    """Totals across runs and processes, kept in SQLite and exported as Prometheus text.
+
+    `record(trace)` adds a finished trace's counters (`scriptoria_<name>_total`),
+    span durations (`scriptoria_span_seconds` by span name) and observations
+    (`scriptoria_<name>` count/sum) to the table; the additions are atomic, so
+    several job workers can record at once.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.environ.get("SCRIPTORIA_METRICS_DB", DEFAULT_METRICS_DB)
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_METRICS_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, trace: Trace):
+        rows = [(f"{METRIC_PREFIX}{name}_total", "", value) for name, value in trace.counters.items()]
+        for span in trace.spans:
+            if span.duration is None:
+                continue
+            labels = f'name="{_label(span.name)}"'
+            rows.append((f"{METRIC_PREFIX}span_seconds_sum", labels, span.duration))
+            rows.append((f"{METRIC_PREFIX}span_seconds_count", labels, 1))
+        for name, stats in trace.observations.items():
+            rows.append((f"{METRIC_PREFIX}{name}_sum", "", stats["sum"]))
+            rows.append((f"{METRIC_PREFIX}{name}_count", "", stats["count"]))
+        rows.append((f"{METRIC_PREFIX}traces_total", f'name="{_label(trace.name)}"', 1))
+        with self._connect() as conn:
+            conn.executemany("INSERT INTO metrics (name, labels, value) VALUES (?, ?, ?) "
+                             "ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value", rows)
+
+    def values(self) -> dict:
+        with self._connect() as conn:
+            return {(name, labels): value
+                    for name, labels, value in conn.execute("SELECT name, labels, value FROM metrics ORDER BY name, labels")}
+
+    def prometheus_text(self) -> str:
+        lines = []
+        typed = set()
+        for (name, labels), value in self.values().items():
+            family = name.rsplit("_", 1)[0] if name.endswith(("_sum", "_count")) else name
+            if family not in typed:
+                typed.add(family)
+                lines.append(f"# TYPE {family} {'counter' if family == name else 'summary'}")
+            value = int(value) if float(value).is_integer() else value
+            lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str = None) -> str:
+        """Write the totals for a Prometheus textfile collector (atomically) and return the path."""
+        path = path or os.environ.get("SCRIPTORIA_METRICS_FILE", DEFAULT_METRICS_FILE)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+        return path
+
+
+def finish_trace(trace: Trace = None) -> Optional[str]:
+    """Save `trace` (default: the current one) as JSON and add it to the metrics file.
+
+    Returns the trace path; export errors are reported and never raised.
+    """
+    global _current
+    trace = trace or _current
+    if trace is None:
+        return None
+    if trace is _current:
+        _current = None
+    try:
+        path = trace.save()
+        store = MetricsStore()
+        store.record(trace)
+        store.write_prometheus()
+        return path
+    except (OSError, sqlite3.Error) as exc:
+        print(f"[WARN] Could not export trace {trace.id}: {exc}")
+        return None
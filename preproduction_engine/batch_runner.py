@@ -0,0 +1,202 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .preprod_controller import _accept_remote, _local_preproduction
+
+
+DEFAULT_WORKERS = 4
+DEFAULT_RPM = 30
+DEFAULT_TPM = 12000
+# Rough token estimate for budgeting: ~4 characters per prompt token plus the
+# completion size a preproduction plan usually comes back at.
+CHARS_PER_TOKEN = 4
+COMPLETION_TOKENS = 1200
+# Items submitted ahead of the results written, per worker; an interrupted
+# batch only finishes (and discards) these before stopping
+WINDOW_PER_WORKER = 2
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate_per_minute`, holding up to `capacity`."""
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` tokens now, going into debt if needed; returns the seconds to wait.
+
+        Requests larger than the capacity are clamped to it so they can still run.
+        """
+        amount = min(amount, self.capacity)
+        with self.lock:
+            self._refill()
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate) if self.rate > 0 else 0.0
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budgets shared by all batch workers."""
+
+    def __init__(self, rpm: float = DEFAULT_RPM, tpm: float = DEFAULT_TPM):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+    def acquire(self, tokens: int):
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(tokens))
+        if wait:
+            time.sleep(wait)
+
+
+def estimate_tokens(prompt: str, intent: dict) -> int:
+    return (len(prompt) + len(json.dumps(intent))) // CHARS_PER_TOKEN + COMPLETION_TOKENS
+
+
+def item_id(item: dict) -> str:
+    """The item's `id`, or a stable hash of its prompt and intent (used to resume)."""
+    if item.get("id") is not None:
+        return str(item["id"])
+    payload = json.dumps({"prompt": item.get("prompt"), "intent": item.get("intent")}, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def read_jsonl(path) -> list:
+    """Parse a JSONL file, skipping blank lines and a truncated final line."""
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                print(f"[WARN] Skipping unreadable line in {path}: {line[:60]}")
+    return items
+
+
+def completed_ids(output_path) -> set:
+    if not os.path.exists(output_path):
+        return set()
+    return {str(row["id"]) for row in read_jsonl(output_path) if "id" in row}
+
+
+def plan_one(item: dict, limiter: RateLimiter = None, use_llm: bool = True) -> dict:
+    """Preproduction for one batch item; falls back to the local generators on LLM failure."""
+    from core.intent_engine import interpret_intent
+
+    prompt = item.get("prompt") or ""
+    intent = item.get("intent") or interpret_intent(prompt)
+    row = {"id": item_id(item), "prompt": prompt, "intent": intent, "source": "local", "error": None}
+
+    plan = None
+    if use_llm:
+        from core.llm_client import request_preproduction_from_llm
+
+        if limiter is not None:
+            limiter.acquire(estimate_tokens(prompt, intent))
+        try:
+            plan = _accept_remote(prompt, request_preproduction_from_llm(prompt, intent=intent))
+        except Exception as exc:
+            row["error"] = f"{type(exc).__name__}: {exc}"
+        if plan is not None:
+            row["source"] = "llm"
+        elif row["error"] is None:
+            row["error"] = "no valid response from LLM"
+
+    row["preproduction"] = plan or _local_preproduction(prompt, intent)
+    return row
+
+
+def run_preproduction_batch(items, output_path, workers: int = DEFAULT_WORKERS, rpm: float = DEFAULT_RPM,
+                            tpm: float = DEFAULT_TPM, use_llm: bool = True) -> dict:
+    """Plan every item of `items` (dicts with `prompt`, optional `intent` and `id`).
+
+    Items run concurrently on `workers` threads, with LLM calls held to the
+    `rpm`/`tpm` budgets. Each result is appended to `output_path` as one JSON
+    line as soon as it completes; items whose id is already in the file are
+    skipped, so rerunning an interrupted batch resumes it. At most
+    `WINDOW_PER_WORKER * workers` items are in flight, and queued ones are
+    cancelled on Ctrl-C or an error, so an interrupted batch does not spend
+    the rate budget on results it throws away. Returns counts of `done`,
+    `skipped`, `llm` and `local` results.
+    """
+    done_ids = completed_ids(output_path)
+    pending, seen = [], set(done_ids)
+    for item in items:
+        key = item_id(item)
+        if key not in seen:
+            seen.add(key)
+            pending.append(item)
+    stats = {"done": 0, "skipped": len(items) - len(pending), "llm": 0, "local": 0}
+    if stats["skipped"]:
+        print(f"[INFO] Resuming batch: {stats['skipped']} items already in {output_path}")
+
+    limiter = RateLimiter(rpm, tpm) if use_llm else None
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "a+", encoding="utf-8") as out:
+        # Start on a fresh line if a previous run was cut off mid-write
+        if out.tell():
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                out.write("\n")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            queue = iter(pending)
+            running = set()
+            try:
+                while True:
+                    for item in queue:
+                        running.add(pool.submit(plan_one, item, limiter, use_llm))
+                        if len(running) >= WINDOW_PER_WORKER * workers:
+                            break
+                    if not running:
+                        break
+                    finished, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        row = future.result()
+                        out.write(json.dumps(row, ensure_ascii=True) + "\n")
+                        out.flush()
+                        stats["done"] += 1
+                        stats[row["source"]] += 1
+            except BaseException:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    print(f"[INFO] Batch complete: {stats['done']} planned ({stats['llm']} LLM, {stats['local']} local), "
+          f"{stats['skipped']} skipped")
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate preproduction plans for a JSONL of prompts.")
+    parser.add_argument("input", help="JSONL with one {\"prompt\": ..., \"intent\": {...}, \"id\": ...} per line")
+    parser.add_argument("output", help="JSONL results file (appended to; existing ids are skipped)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--rpm", type=float, default=DEFAULT_RPM, help="LLM requests per minute (0 = unlimited)")
+    parser.add_argument("--tpm", type=float, default=DEFAULT_TPM, help="LLM tokens per minute (0 = unlimited)")
+    parser.add_argument("--local", action="store_true", help="Use only the local generators")
+    args = parser.parse_args(argv)
+
+    run_preproduction_batch(read_jsonl(args.input), args.output, workers=args.workers, rpm=args.rpm,
+                            tpm=args.tpm, use_llm=not args.local)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,139 @@
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
 from .screenplay_generator import generate_screenplay
 from .workflow_planner import plan_workflow
 from .character_builder import build_characters
 from .sound_design_planner import plan_sound
 
 
-def run_preproduction(prompt: str, intent: dict = None, use_llm: bool = False):
-    """Run full preproduction pipeline with optional Groq enhancement."""
+# Intent fields the preproduction planners read; a plan made for one intent is
+# valid for another that agrees on all of them.
+PREPRODUCTION_KEYS = ("style", "pace", "mood", "color_grade", "narration", "target_duration")
+
+
+def _local_preproduction(prompt: str, intent: dict) -> dict:
+    return {
+        "prompt": prompt,
+        "screenplay": generate_screenplay(prompt, intent),
+        "workflow": plan_workflow(intent),
+        "characters": build_characters(intent),
+        "sound_design": plan_sound(intent),
+    }
+
+
+def _accept_remote(prompt: str, remote) -> dict:
+    if isinstance(remote, dict):
+        remote["prompt"] = prompt
+        return remote
+    return None
+
+
+def run_preproduction(prompt: str, intent: dict = None, use_llm: bool = False, latency_budget: float = None):
+    """Run full preproduction pipeline with optional Groq enhancement.
+
+    With a `latency_budget` (seconds, default `SCRIPTORIA_LLM_LATENCY_BUDGET`)
+    the local plan is built alongside the request and returned whenever the
+    remote plan is not back within the budget.
+    """
     if intent is None:
         intent = {}
 
     if use_llm:
         try:
-            from core.llm_client import request_preproduction_from_llm
+            from core.llm_client import LLM_LATENCY_BUDGET, hedged_call, record_fallback, request_preproduction_from_llm
         except Exception:
             request_preproduction_from_llm = None
 
         if request_preproduction_from_llm is not None:
-            remote = request_preproduction_from_llm(prompt, intent=intent)
-            if isinstance(remote, dict):
-                remote["prompt"] = prompt
+            def remote_plan():
+                return _accept_remote(prompt, request_preproduction_from_llm(prompt, intent=intent))
+
+            budget = latency_budget if latency_budget is not None else LLM_LATENCY_BUDGET
+            if budget:
+                return hedged_call(remote_plan, lambda: _local_preproduction(prompt, intent), budget)
+            remote = remote_plan()
+            if remote:
                 return remote
+            record_fallback()
 
-    result = {
-        "prompt": prompt,
-        "screenplay": generate_screenplay(prompt, intent),
-        "workflow": plan_workflow(intent),
-        "characters": build_characters(intent),
-        "sound_design": plan_sound(intent),
-    }
+    return _local_preproduction(prompt, intent)
+
+
+class ProductionPlan:
+    """Intent and preproduction for one prompt, with the LLM calls in flight together.
+
+    On construction the local intent is parsed straight away and the remote
+    intent request (`use_llm_intent`) is sent. The preproduction request
+    (`use_llm_preprod`) is sent at the same time, speculatively built on the
+    local intent. `intent()` waits for the remote intent only. `preproduction()`
+    keeps the speculative plan when the final intent agrees with the local one
+    on `PREPRODUCTION_KEYS`; otherwise it asks again with the final intent.
+    Both fall back to the local engines, as `interpret_intent` and
+    `run_preproduction` do; with a `latency_budget` (seconds from construction,
+    default `SCRIPTORIA_LLM_LATENCY_BUDGET`) they stop waiting for the LLM once
+    it is spent.
+    """
+
+    def __init__(self, prompt: str, use_llm_intent: bool = False, use_llm_preprod: bool = False,
+                 defaults: dict = None, latency_budget: float = None):
+        from core.intent_engine import interpret_intent
+        from core.llm_client import (LLM_LATENCY_BUDGET, request_intent_from_llm, request_preproduction_from_llm,
+                                     submit_llm_request)
+
+        self.prompt = prompt
+        self.defaults = defaults
+        self.use_llm_preprod = use_llm_preprod
+        budget = latency_budget if latency_budget is not None else LLM_LATENCY_BUDGET
+        self.deadline = time.monotonic() + budget if budget else None
+        self.local_intent = interpret_intent(prompt, defaults=defaults)
+        self._intent = None
+        self._intent_future = submit_llm_request(request_intent_from_llm, prompt) if use_llm_intent else None
+        self._preprod_future = None
+        if use_llm_preprod:
+            self._preprod_future = submit_llm_request(request_preproduction_from_llm, prompt,
+                                                      intent=dict(self.local_intent))
+
+    def intent(self) -> dict:
+        if self._intent is None:
+            from core.intent_engine import merge_remote_intent
+
+            remote = self._wait(self._intent_future)
+            if isinstance(remote, dict):
+                self._intent = merge_remote_intent(remote, self.prompt, self.defaults)
+            else:
+                self._intent = self.local_intent
+        return self._intent
+
+    def _wait(self, future):
+        """Result of an LLM future, or None once the latency budget is spent."""
+        from core.llm_client import record_fallback
+
+        if future is None:
+            return None
+        timeout = None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeout:
+            result = None
+        if result is None:
+            record_fallback()
+        return result
+
+    def speculation_valid(self) -> bool:
+        intent = self.intent()
+        return all(intent.get(key) == self.local_intent.get(key) for key in PREPRODUCTION_KEYS)
 
-    return result
+    def preproduction(self) -> dict:
+        intent = self.intent()
+        retry = False
+        if self._preprod_future is not None:
+            if self.speculation_valid():
+                remote = _accept_remote(self.prompt, self._wait(self._preprod_future))
+                if remote:
+                    return remote
+            else:
+                self._preprod_future.cancel()
+                print("[INFO] Remote intent changed the plan inputs; re-requesting preproduction")
+                retry = True
+        return run_preproduction(self.prompt, intent, use_llm=retry)
@@ -26,5 +26,8 @@ def plan_workflow(intent: dict):
     
     if mood:
         steps.append({"phase": 4, "name": f"mood: {mood}", "priority": "medium", "notes": f"apply {mood} tone"})
+    if intent.get("color_grade"):
+        steps.append({"phase": 4, "name": f"color grade: {intent['color_grade']}", "priority": "medium",
+                      "notes": "3D LUT applied to every rendered frame"})
     
     return {"style": style, "pace": pace, "total_steps": len(steps), "steps": steps}
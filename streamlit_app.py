@@ -1,27 +1,48 @@
 import json
 import os
 import shutil
+import uuid
 
 import streamlit as st
 
-from core.intent_engine import interpret_intent
-from core.llm_client import request_text_from_llm
-from preproduction_engine.preprod_controller import run_preproduction
-from video_engine.extract_frames import extract_frames
-from video_engine.frame_graph_api import build_frame_graph, traverse_frame_graph
-from video_engine.regenerate_api import regenerate_video
+from core.job_queue import ACTIVE_STATES, DEFAULT_WORKERS, JobQueue
+from core.llm_client import get_llm_cache, llm_metrics, stream_text_from_llm
+from video_engine.frame_cache import DEFAULT_BUDGET_BYTES
+from video_engine.encoders import RENDITIONS
+from video_engine.render_cache import DEFAULT_BUDGET_BYTES as DEFAULT_RENDER_CACHE_BYTES, RenderCache
 
 
 DATA_INPUT = os.path.join("data", "input_videos")
 DATA_FRAMES = os.path.join("data", "frames")
 DATA_OUTPUTS = os.path.join("data", "outputs")
 DATA_STATES = os.path.join("data", "states")
+DATA_RENDER_CACHE = os.path.join("data", "render_cache")
 
 os.makedirs(DATA_INPUT, exist_ok=True)
 os.makedirs(DATA_FRAMES, exist_ok=True)
 os.makedirs(DATA_OUTPUTS, exist_ok=True)
 os.makedirs(DATA_STATES, exist_ok=True)
 
+# Extracted frames are cached under data/frames/<digest>/ and reused across
+# runs; the least recently used extractions go once this budget is exceeded.
+FRAME_CACHE_BYTES = int(os.environ.get("SCRIPTORIA_FRAME_CACHE_BYTES", DEFAULT_BUDGET_BYTES))
+# Finished renders are kept under data/render_cache/<key>/ and returned as-is
+# when the same video, frames and settings are rendered again; 0 disables it.
+RENDER_CACHE_BYTES = int(os.environ.get("SCRIPTORIA_RENDER_CACHE_BYTES", DEFAULT_RENDER_CACHE_BYTES))
+# Extraction can split the upload into keyframe-aligned segments decoded on
+# this many processes; 1 decodes it in the render worker.
+EXTRACT_WORKERS = int(os.environ.get("SCRIPTORIA_EXTRACT_WORKERS", 1))
+# Renders are encoded as GOP-aligned chunks on this many processes and joined
+# without re-encoding; 1 keeps a single encoder stream.
+ENCODE_WORKERS = int(os.environ.get("SCRIPTORIA_ENCODE_WORKERS", 1))
+# "jpg" writes one image per frame; "store" writes a memory-mapped frame store.
+FRAME_FORMAT = os.environ.get("SCRIPTORIA_FRAME_FORMAT", "jpg")
+# Renders run as background jobs on this many worker processes.
+RENDER_WORKERS = int(os.environ.get("SCRIPTORIA_RENDER_WORKERS", DEFAULT_WORKERS))
+
+# Stages of a render job, in the order they report progress
+RENDER_STAGES = ["intent", "ingest", "extract", "preproduction", "select", "preview", "render"]
+
 
 st.set_page_config(page_title="Scriptoria - Theatrical Video Remix", layout="wide")
 
@@ -173,6 +194,51 @@ with st.sidebar:
     api_key_input = st.text_input("Groq API Key", type="password", help="Enter your Groq API Key here if not set in environment.")
     if api_key_input:
         os.environ["GROQ_API_KEY"] = api_key_input
+    llm_cache = get_llm_cache()
+    if llm_cache is not None:
+        cache_stats = llm_cache.stats()
+        st.caption(f"LLM cache: {cache_stats['entries']} responses, {cache_stats['hits']} hits / "
+                   f"{cache_stats['misses']} misses")
+    if RENDER_CACHE_BYTES:
+        render_stats = RenderCache(DATA_RENDER_CACHE, RENDER_CACHE_BYTES).stats()
+        st.caption(f"Render cache: {render_stats['entries']} renders, {render_stats['hit_rate']:.0%} hit rate, "
+                   f"{render_stats['bytes_saved'] / 1e6:.1f} MB not re-encoded")
+    metrics = llm_metrics()
+    st.caption(f"Groq circuit: {metrics['breaker']['state']} · {metrics['fallbacks']} local fallbacks · "
+               f"{metrics['retries']} retries")
+
+@st.cache_resource
+def get_job_queue():
+    # One queue (and worker pool) per server process, shared by every session
+    return JobQueue(os.path.join("data", "jobs.sqlite"), workers=RENDER_WORKERS)
+
+
+@st.fragment(run_every=1)
+def show_job_progress(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None or job["status"] not in ACTIVE_STATES:
+        st.rerun()
+
+    with st.status(f"Production in progress... ({job['status']})", expanded=True):
+        for stage in RENDER_STAGES:
+            if stage not in job["progress"]:
+                continue
+            counts = job["progress"][stage]
+            label = f"{stage}: {counts['done']} frames" if counts["done"] else stage
+            if "seconds" in counts:
+                label += f" ({counts['seconds']:.1f}s)"
+            if counts["total"]:
+                st.progress(min(1.0, counts["done"] / counts["total"]), text=f"{label} / {counts['total']}")
+            else:
+                st.write(("▶️ " if stage == job["stage"] else "✅ ") + label)
+        preview = (job["result"] or {}).get("partial", {}).get("preview")
+        if preview and os.path.exists(preview):
+            st.caption("Proxy preview (full quality still rendering)")
+            st.video(preview)
+    if st.button("✋ Cancel render", key=f"cancel_{job_id}"):
+        get_job_queue().cancel(job_id)
+        st.rerun()
+
 
 st.title("🎬 Scriptoria")
 st.caption("The AI-Powered Cinematic Video Remix Studio")
@@ -195,6 +261,11 @@ with col2:
     use_llm = st.toggle("Use AI for Intent", value=True)
     use_llm_preprod = st.toggle("Use AI for Planning", value=True)
     fps_input = st.number_input("Target FPS (0 = Auto)", min_value=0, max_value=60, value=0)
+    semantic = st.toggle("Semantic Frame Graph", value=False, help="Walk a visual-similarity graph shaped by mood and pace instead of taking every Nth frame.")
+    shot_sampling = st.toggle("Sample Per Shot", value=False, help="Spread the selected frames over the detected shots, one group of shots per screenplay scene.")
+    streaming = st.toggle("Streaming Render (no frame dump)", value=False, help="Decode, select and encode in one pass without writing frames to disk.")
+    lut_file = st.file_uploader("Custom LUT (.cube)", type=["cube"], help="Grade every frame with this 3D LUT instead of the prompt's color grade.")
+    renditions = st.multiselect("Renditions", list(RENDITIONS), default=["full"], help="Extra outputs (720p web, 9:16 reel) are encoded by ffmpeg in the same pass.")
 
 st.markdown("</div>", unsafe_allow_html=True)
 
@@ -210,72 +281,109 @@ if st.button("🚀 Action! (Generate Video & Plan)", use_container_width=True):
         if (use_llm or use_llm_preprod) and not os.environ.get("GROQ_API_KEY"):
             st.warning("⚠️ No Groq API Key detected. AI features may fail. Please enter it in the sidebar.")
 
-        # Processing Logic
-        with st.status("Production in progress...", expanded=True) as status:
-            st.write("📥 Ingesting daily rushes (saving upload)...")
-            input_path = os.path.join(DATA_INPUT, uploaded.name)
-            with open(input_path, "wb") as f:
-                shutil.copyfileobj(uploaded, f)
-
-            st.write("🎞️ Cutting negative (extracting frames)...")
-            try:
-                shutil.rmtree(DATA_FRAMES)
-            except Exception:
-                pass
-            os.makedirs(DATA_FRAMES, exist_ok=True)
-            extract_frames(input_path, DATA_FRAMES)
-
-            st.write("🧠 Director's interpretation (analyzing intent)...")
-            intent = interpret_intent(style_text, use_llm=use_llm)
-            if fps_input > 0:
-                intent["fps"] = int(fps_input)
-
-            st.write("📝 Writers' room (generating preproduction plan)...")
-            preprod_result = run_preproduction(style_text, intent, use_llm=use_llm_preprod)
-
-            status.update(label="Principal photography complete! Assembling final cut...", state="running")
-            
-            # Show Preprod Results in Tabs
-            st.divider()
-            t1, t2, t3, t4, t5 = st.tabs(["📜 Screenplay", "📋 Schedule", "🎭 Cast", "🎼 Score", "🍿 Final Cut"])
-
-            with t1:
-                st.subheader(preprod_result['screenplay'].get('title', 'Untitled Screenplay'))
-                for scene in preprod_result["screenplay"].get("scenes", []):
-                    st.markdown(f"**Scene {scene.get('id', '?')}**: {scene.get('description', '')} _({scene.get('rough_duration_s', 0)}s)_")
-
-            with t2:
-                wf = preprod_result.get("workflow", {})
-                st.write(f"**Style:** {wf.get('style', 'N/A')} | **Pace:** {wf.get('pace', 'N/A')}")
-                for step in wf.get("steps", []):
-                    st.markdown(f"- **Phase {step.get('phase', '?')}**: {step.get('name', '')} _({step.get('notes', '')})_")
-
-            with t3:
-                chars = preprod_result.get("characters", {})
-                st.write(f"**Mood:** {chars.get('primary_mood', 'N/A')}")
-                for ch in chars.get("characters", []):
-                    st.markdown(f"- **{ch.get('role', 'Unknown')}**: {ch.get('mood', '')} (Lighting: {ch.get('lighting', '')})")
-
-            with t4:
-                sound = preprod_result.get("sound_design", {})
-                st.write(f"**Audio Style:** {sound.get('style', 'N/A')}")
-                for track in sound.get("tracks", []):
-                    st.markdown(f"- 🎵 {track.get('name', '')} ({track.get('type', '')})")
-
-            with t5:
-                st.info("Rendering final cut...")
-                frames = build_frame_graph(DATA_FRAMES)
-                frame_path = traverse_frame_graph(frames, intent)
-
-                if not frame_path:
-                    st.error("Could not select frames for this style.")
-                else:
-                    output_path = os.path.join(DATA_OUTPUTS, "output_remix.mp4")
-                    regenerate_video(DATA_FRAMES, frame_path, output_path, intent)
-                    st.video(output_path)
-                    st.success(f"Cut! It's a wrap. ({len(frame_path)} frames)")
-
-            status.update(label="Output ready for premiere!", state="complete")
+        # Each run gets its own upload and output paths so queued renders never collide
+        run_id = uuid.uuid4().hex[:12]
+        input_path = os.path.join(DATA_INPUT, f"{run_id}_{uploaded.name}")
+        with open(input_path, "wb") as f:
+            shutil.copyfileobj(uploaded, f)
+        lut_path = None
+        if lut_file is not None:
+            lut_path = os.path.join(DATA_INPUT, f"{run_id}_{lut_file.name}")
+            with open(lut_path, "wb") as f:
+                shutil.copyfileobj(lut_file, f)
+
+        params = {
+            "input_path": input_path,
+            "output_dir": os.path.join(DATA_OUTPUTS, run_id),
+            "style_text": style_text,
+            "use_llm": use_llm,
+            "use_llm_preprod": use_llm_preprod,
+            "fps": int(fps_input),
+            "semantic": semantic,
+            "shot_sampling": shot_sampling,
+            "streaming": streaming,
+            "renditions": renditions,
+            "lut": lut_path,
+            "frames_dir": DATA_FRAMES,
+            "frame_format": FRAME_FORMAT,
+            "frame_cache_bytes": FRAME_CACHE_BYTES,
+            "render_cache_dir": DATA_RENDER_CACHE,
+            "render_cache_bytes": RENDER_CACHE_BYTES,
+            "extract_workers": EXTRACT_WORKERS,
+            "encode_workers": ENCODE_WORKERS,
+        }
+        env = {"GROQ_API_KEY": os.environ["GROQ_API_KEY"]} if os.environ.get("GROQ_API_KEY") else None
+        job_id = get_job_queue().submit("render", params, env=env)
+        st.session_state["job_id"] = job_id
+        # Keep the job in the URL so a browser refresh picks it back up
+        st.query_params["job"] = job_id
+
+job_id = st.session_state.get("job_id") or st.query_params.get("job")
+job = get_job_queue().get(job_id) if job_id else None
+if job and job["status"] in ACTIVE_STATES:
+    show_job_progress(job_id)
+elif job and job["status"] == "done":
+    result = job["result"]
+    preprod_result = result["preproduction"]
+
+    timings = result.get("timings") or {}
+    if timings:
+        with st.expander(f"⏱️ Stage timings ({sum(timings.values()):.1f}s total)"):
+            st.bar_chart(timings, horizontal=True)
+            st.table({"stage": list(timings), "seconds": [round(t, 2) for t in timings.values()]})
+            if result.get("trace"):
+                st.caption(f"Trace: `{result['trace']}`")
+
+    st.divider()
+    t1, t2, t3, t4, t5 = st.tabs(["📜 Screenplay", "📋 Schedule", "🎭 Cast", "🎼 Score", "🍿 Final Cut"])
+
+    with t1:
+        st.subheader(preprod_result['screenplay'].get('title', 'Untitled Screenplay'))
+        for scene in preprod_result["screenplay"].get("scenes", []):
+            st.markdown(f"**Scene {scene.get('id', '?')}**: {scene.get('description', '')} _({scene.get('rough_duration_s', 0)}s)_")
+
+    with t2:
+        wf = preprod_result.get("workflow", {})
+        st.write(f"**Style:** {wf.get('style', 'N/A')} | **Pace:** {wf.get('pace', 'N/A')}")
+        for step in wf.get("steps", []):
+            st.markdown(f"- **Phase {step.get('phase', '?')}**: {step.get('name', '')} _({step.get('notes', '')})_")
+
+    with t3:
+        chars = preprod_result.get("characters", {})
+        st.write(f"**Mood:** {chars.get('primary_mood', 'N/A')}")
+        for ch in chars.get("characters", []):
+            st.markdown(f"- **{ch.get('role', 'Unknown')}**: {ch.get('mood', '')} (Lighting: {ch.get('lighting', '')})")
+
+    with t4:
+        sound = preprod_result.get("sound_design", {})
+        st.write(f"**Audio Style:** {sound.get('style', 'N/A')}")
+        for track in sound.get("tracks", []):
+            st.markdown(f"- 🎵 {track.get('name', '')} ({track.get('type', '')})")
+
+    with t5:
+        frame_count = result["frames_written"]
+        if result["skipped"]:
+            st.warning(f"Skipped {len(result['skipped'])} unreadable frames.")
+            st.json(result["skipped"], expanded=False)
+        if not frame_count:
+            st.error("Could not select frames for this style.")
+        else:
+            st.video(result["output_path"])
+            st.success(f"Cut! It's a wrap. ({frame_count} frames)")
+            for name, path in result["renditions"].items():
+                if name != "full" and os.path.exists(path):
+                    with open(path, "rb") as f:
+                        st.download_button(f"Download {name}", f, file_name=os.path.basename(path))
+elif job and job["status"] == "failed":
+    st.error(f"Render failed: {job['error']}")
+elif job and job["status"] == "cancelled":
+    st.info("Render cancelled.")
+
+with st.sidebar:
+    st.subheader("🎬 Render Queue")
+    for queued in get_job_queue().jobs(limit=10):
+        stage = f" · {queued['stage']}" if queued["status"] == "running" else ""
+        st.caption(f"`{queued['id']}` {queued['status']}{stage}")
 
 
 # --- "Ask Scriptopia" Section ---
@@ -304,13 +412,13 @@ if consult_clicked:
         if not os.environ.get("GROQ_API_KEY"):
             st.error("🚫 Missing Groq API Key.")
         else:
-            with st.spinner("Consulting the archives..."):
-                answer = request_text_from_llm(user_prompt.strip())
-            
-            if answer:
-                st.markdown("### 🎭 Scriptopia's Vision")
-                st.success(answer)
-            else:
+            st.markdown("### 🎭 Scriptopia's Vision")
+            # Tokens are rendered as they stream in
+            stream_status = {}
+            answer = st.write_stream(stream_text_from_llm(user_prompt.strip(), status=stream_status))
+            if not answer:
                 st.error("No response from the oracle.")
+            elif not stream_status["complete"]:
+                st.warning(f"The answer was cut off ({stream_status['error']}).")
 
 st.markdown("</div>", unsafe_allow_html=True)
\ No newline at end of file
@@ -0,0 +1,69 @@
+import json
+import time
+
+import pytest
+
+from core import llm_client
+from preproduction_engine import batch_runner
+from preproduction_engine.batch_runner import TokenBucket, item_id, read_jsonl, run_preproduction_batch
+
+
+PLAN = {"screenplay": {"title": "Remote", "scenes": []}, "workflow": {}, "characters": {}, "sound_design": {}}
+
+
+def fake_llm(prompt, intent=None, **kwargs):
+    return None if "fail" in prompt else dict(PLAN)
+
+
+def test_token_bucket_waits_once_the_budget_is_spent():
+    bucket = TokenBucket(60, capacity=2)
+    assert bucket.reserve(1) == 0
+    assert bucket.reserve(1) == 0
+    assert 0.9 < bucket.reserve(1) <= 1.0
+    # Oversized requests are clamped to the capacity instead of waiting forever
+    assert bucket.reserve(100) <= 3.0
+
+
+def test_batch_falls_back_to_local_and_streams_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_client, "request_preproduction_from_llm", fake_llm)
+    items = [{"id": "a", "prompt": "cinematic noir"}, {"id": "b", "prompt": "fail fast trailer"}]
+    output = tmp_path / "plans.jsonl"
+
+    stats = run_preproduction_batch(items, str(output), workers=2, rpm=0, tpm=0)
+
+    rows = {row["id"]: row for row in read_jsonl(output)}
+    assert stats == {"done": 2, "skipped": 0, "llm": 1, "local": 1}
+    assert rows["a"]["preproduction"]["screenplay"]["title"] == "Remote"
+    assert rows["b"]["source"] == "local" and rows["b"]["error"]
+    assert rows["b"]["preproduction"]["workflow"]["style"] == "trailer"
+
+
+def test_batch_resumes_after_interruption(tmp_path):
+    items = [{"prompt": f"reel number {i}"} for i in range(5)]
+    output = tmp_path / "plans.jsonl"
+    first = {"id": item_id(items[0]), "source": "local", "preproduction": {}}
+    # One finished row and one cut off mid-write
+    output.write_text(json.dumps(first) + "\n" + '{"id": "trunc')
+
+    stats = run_preproduction_batch(items, str(output), use_llm=False)
+
+    ids = [row["id"] for row in read_jsonl(output)]
+    assert stats["skipped"] == 1 and stats["done"] == 4
+    assert sorted(ids) == sorted(item_id(item) for item in items)
+
+
+def test_interrupted_batch_does_not_run_the_remaining_items(tmp_path, monkeypatch):
+    calls = []
+
+    def interrupted(item, limiter=None, use_llm=True):
+        calls.append(item["id"])
+        time.sleep(0.01)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return {"id": item["id"], "source": "local", "preproduction": {}}
+
+    monkeypatch.setattr(batch_runner, "plan_one", interrupted)
+    items = [{"id": str(i), "prompt": "reel"} for i in range(50)]
+    with pytest.raises(KeyboardInterrupt):
+        run_preproduction_batch(items, str(tmp_path / "plans.jsonl"), workers=2, use_llm=False)
+    assert len(calls) <= batch_runner.WINDOW_PER_WORKER * 2 + 2
@@ -0,0 +1,34 @@
+import numpy as np
+
+from video_engine.color_grade import ColorGrader, build_lut, expand_lut, grader_for, identity_lut, load_cube
+
+
+def _write_cube(path, lut):
+    size = lut.shape[0]
+    rows = lut.transpose(2, 1, 0, 3).reshape(-1, 3)  # red varies fastest
+    with open(path, "w") as f:
+        f.write(f'TITLE "test"\n# comment\nLUT_3D_SIZE {size}\n')
+        f.writelines(f"{r:.6f} {g:.6f} {b:.6f}\n" for r, g, b in rows)
+
+
+def test_cube_round_trip_and_identity(tmp_path):
+    lut = build_lut("warm", "dramatic", size=9)
+    _write_cube(tmp_path / "warm.cube", lut)
+    assert np.allclose(load_cube(tmp_path / "warm.cube"), lut, atol=1e-5)
+
+    frame = np.random.default_rng(0).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+    assert np.array_equal(ColorGrader(expand_lut(identity_lut(9))).apply(frame), frame)
+    assert grader_for({"color_grade": None, "mood": None}) is None
+
+
+def test_grade_matches_lut_and_grades_in_place():
+    grader = grader_for({"color_grade": "cool"})
+    frame = np.array([[[0, 0, 0], [255, 255, 255], [128, 64, 200]]], dtype=np.uint8)
+    lut = build_lut("cool")
+    expected = np.rint(lut[[0, -1, 16], [0, -1, 8], [0, -1, 25]] * 255)
+    graded = grader.apply(frame.copy())
+    assert np.abs(graded[0, :2].astype(int) - expected[:2]).max() <= 1
+    assert graded[0, 2, 2] > frame[0, 2, 2] and graded[0, 2, 0] < frame[0, 2, 0]
+
+    out = grader.apply(frame, out=frame)
+    assert out is frame and np.array_equal(frame, graded)
@@ -0,0 +1,34 @@
+import os
+
+import cv2
+import numpy as np
+
+from video_engine.encoders import encode_frames
+
+
+def _noise(width, height, count=6):
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def _size(path):
+    cap = cv2.VideoCapture(path)
+    size = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+    return size
+
+
+def test_reel_rendition_is_9_16_for_landscape_and_portrait(tmp_path):
+    intent = {"encoder": "ffmpeg", "renditions": ["full", "reel"]}
+    for name, (width, height), expected in (("wide", (320, 180), (100, 180)), ("tall", (180, 400), (180, 320))):
+        _, paths = encode_frames(_noise(width, height), str(tmp_path / f"{name}.mp4"), 12, intent)
+        assert _size(paths["reel"]) == expected
+
+
+def test_moviepy_encoder_applies_crf(tmp_path):
+    sizes = []
+    for crf in (18, 40):
+        intent = {"encoder": "moviepy", "crf": crf}
+        _, paths = encode_frames(_noise(160, 96), str(tmp_path / f"crf{crf}.mp4"), 12, intent)
+        sizes.append(os.path.getsize(paths["full"]))
+    assert sizes[0] > 2 * sizes[1]
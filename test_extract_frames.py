@@ -0,0 +1,59 @@
+import os
+import sqlite3
+
+import cv2
+import numpy as np
+import pytest
+
+from video_engine.extract_frames import extract_frames
+from video_engine.frame_index import INDEX_FILE
+from video_engine.shot_detector import load_shots
+
+
+SCENES = ((40, 200, 40), (200, 40, 40), (40, 40, 200), (220, 220, 220))
+
+
+def _scenes(path, scenes=SCENES, length=30):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 24, (96, 64))
+    for colour in scenes:
+        for i in range(length):
+            frame = np.full((64, 96, 3), colour, dtype=np.uint8)
+            # A moving bar so frames within a shot differ a little
+            frame[:, i * 3:i * 3 + 6] = 128
+            writer.write(frame)
+    writer.release()
+    return path
+
+
+def _index_rows(frame_dir):
+    conn = sqlite3.connect(os.path.join(frame_dir, INDEX_FILE))
+    try:
+        return conn.execute("SELECT n, path, offset, ts, size FROM frames ORDER BY n").fetchall()
+    finally:
+        conn.close()
+
+
+def _files(frame_dir):
+    files = {}
+    for name in sorted(os.listdir(frame_dir)):
+        if name.endswith(".jpg"):
+            with open(os.path.join(frame_dir, name), "rb") as f:
+                files[name] = f.read()
+    return files
+
+
+# 3 x 40 frames puts both cuts exactly on the segment boundaries of 3 workers
+@pytest.mark.parametrize("step, scenes, length", [(1, 4, 30), (3, 4, 30), (1, 3, 40)])
+def test_parallel_extraction_matches_the_serial_path(tmp_path, step, scenes, length):
+    video = _scenes(str(tmp_path / "in.mp4"), SCENES[:scenes], length)
+    serial, parallel = str(tmp_path / "serial"), str(tmp_path / "parallel")
+
+    serial_stats = extract_frames(video, serial, step=step, workers=1)
+    parallel_stats = extract_frames(video, parallel, step=step, workers=3)
+
+    assert parallel_stats["frames"] == serial_stats["frames"]
+    assert len(serial_stats["frames"]) == -(-scenes * length // step)
+    assert _files(parallel) == _files(serial)
+    assert _index_rows(parallel) == _index_rows(serial)
+    assert load_shots(parallel) == load_shots(serial)
+    assert len(load_shots(serial)) == scenes
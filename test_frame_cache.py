@@ -0,0 +1,39 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from video_engine.frame_cache import BASE_STEP, FrameCache
+
+
+def _video(path, count=48):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 24, (96, 64))
+    for i in range(count):
+        writer.write(np.full((64, 96, 3), i % 50 * 5, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def test_one_extraction_serves_every_style_step(tmp_path):
+    video = _video(str(tmp_path / "in.mp4"))
+    cache = FrameCache(str(tmp_path / "frames"))
+
+    frame_dir = cache.get_or_extract(video, step=12)
+    assert len([name for name in os.listdir(frame_dir) if name.endswith(".jpg")]) == 48 // BASE_STEP
+    for step in (6, 8):
+        assert cache.get_or_extract(video, step=step) == frame_dir
+
+
+def test_cancelled_extraction_leaves_no_tmp_dir(tmp_path):
+    video = _video(str(tmp_path / "in.mp4"), count=240)
+    cache = FrameCache(str(tmp_path / "frames"), workers=2)
+    reports = []
+
+    def cancel(done, total):
+        reports.append(done)
+        raise RuntimeError("cancelled")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_extract(video, step=1, progress=cancel)
+    assert reports and os.listdir(cache.root) == []
@@ -0,0 +1,69 @@
+import cv2
+import numpy as np
+
+from video_engine import frame_graph_api
+from video_engine.frame_features import compute_features, knn_graph
+from video_engine.frame_graph_api import build_frame_graph, build_semantic_graph, traverse_frame_graph
+from video_engine.frame_index import FrameIndex
+
+
+def _frames(frame_dir, numbers):
+    frame_dir.mkdir(exist_ok=True)
+    for n in numbers:
+        cv2.imwrite(str(frame_dir / f"frame_{n}.jpg"), np.full((16, 16, 3), n, dtype=np.uint8))
+    return str(frame_dir)
+
+
+def test_frames_sort_by_number_not_name(tmp_path):
+    frame_dir = _frames(tmp_path / "frames", [10, 2, 1, 20, 3])
+    (tmp_path / "frames" / "shots.json").write_text("{}")
+
+    assert build_frame_graph(frame_dir) == ["frame_1.jpg", "frame_2.jpg", "frame_3.jpg", "frame_10.jpg", "frame_20.jpg"]
+    assert traverse_frame_graph(build_frame_graph(frame_dir), {"step": 2}) == [
+        "frame_2.jpg", "frame_10.jpg", "frame_20.jpg"]
+
+
+def test_manifest_orders_frames_by_number(tmp_path):
+    frame_dir = _frames(tmp_path / "frames", [10, 2, 1])
+    with FrameIndex(frame_dir) as index:
+        index.write([(10, "frame_10.jpg", 0, 10 / 24, 1), (2, "frame_2.jpg", 0, 2 / 24, 1),
+                     (1, "frame_1.jpg", 0, 1 / 24, 1)])
+
+    assert build_frame_graph(frame_dir) == ["frame_1.jpg", "frame_2.jpg", "frame_10.jpg"]
+    with FrameIndex(frame_dir) as index:
+        assert index.frame_numbers() == [1, 2, 10]
+        assert index.at_time(0.2)["path"] == "frame_2.jpg"
+
+
+def test_knn_graph_matches_brute_force():
+    rng = np.random.default_rng(0)
+    descriptor = rng.standard_normal((300, 16)).astype(np.float32)
+    descriptor /= np.linalg.norm(descriptor, axis=1, keepdims=True)
+
+    neighbors, similarity = knn_graph(descriptor, k=5, block=7, workers=3)
+
+    sims = descriptor @ descriptor.T
+    np.fill_diagonal(sims, -np.inf)
+    expected = np.argsort(-sims, axis=1, kind="stable")[:, :5]
+    assert np.array_equal(neighbors, expected)
+    assert np.allclose(similarity, np.take_along_axis(sims, expected, axis=1))
+    assert knn_graph(descriptor[:1], k=5)[0].shape == (1, 0)
+
+
+def test_semantic_graph_cache_is_keyed_by_video(tmp_path, monkeypatch):
+    frame_dir = _frames(tmp_path / "frames", range(0, 40, 2))
+    first = build_semantic_graph(frame_dir, k=4, video_digest="a")
+    assert len(first.walk({"step": 4})) == 10
+
+    calls = []
+
+    def counting(frame_dir, frames, **kwargs):
+        calls.append(len(frames))
+        return compute_features(frame_dir, frames, **kwargs)
+
+    monkeypatch.setattr(frame_graph_api, "compute_features", counting)
+    cached = build_semantic_graph(frame_dir, k=4, video_digest="a")
+    assert calls == [] and np.array_equal(cached.neighbors, first.neighbors)
+    build_semantic_graph(frame_dir, k=4, video_digest="b")
+    build_semantic_graph(frame_dir, k=3, video_digest="b")
+    assert calls == [20, 20]
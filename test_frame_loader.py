@@ -0,0 +1,52 @@
+import cv2
+import numpy as np
+import pytest
+
+from video_engine import frame_loader
+from video_engine.frame_index import FrameIndex
+from video_engine.frame_loader import load_frames
+
+
+def _write(frame_dir, name, value, shape=(64, 96, 3)):
+    cv2.imwrite(str(frame_dir / name), np.full(shape, value, dtype=np.uint8))
+    return name
+
+
+def test_loader_keeps_order_and_reports_bad_frames(tmp_path):
+    names = [_write(tmp_path, f"frame_{i}.jpg", i * 20) for i in range(8)]
+    _write(tmp_path, "small.jpg", 0, shape=(32, 32, 3))
+    (tmp_path / "frame_3.jpg").write_bytes((tmp_path / "frame_3.jpg").read_bytes()[:-50])
+    (tmp_path / "junk.jpg").write_bytes(b"\xff\xd8 not an image \xff\xd9")
+    frame_path = names[:3] + ["missing.jpg", "small.jpg"] + names[3:] + ["junk.jpg"]
+
+    results = list(load_frames(str(tmp_path), frame_path, workers=3, prefetch=2))
+
+    assert [r["frame"] for r in results] == frame_path
+    assert [r["position"] for r in results] == list(range(len(frame_path)))
+    statuses = {r["frame"]: r["status"] for r in results if r["status"] != "ok"}
+    assert statuses == {"missing.jpg": "missing", "small.jpg": "mismatch", "frame_3.jpg": "corrupt",
+                        "junk.jpg": "corrupt"}
+    means = [r["image"].mean() for r in results if r["status"] == "ok"]
+    assert len(means) == 7 and means == sorted(means)
+
+
+def test_loader_decodes_each_frame_once_and_resolves_frame_numbers(tmp_path, monkeypatch):
+    for i in range(6):
+        _write(tmp_path, f"frame_{i}.jpg", i * 40)
+    with FrameIndex(str(tmp_path)) as index:
+        index.write([(i, f"frame_{i}.jpg", 0, i / 24, 1) for i in range(6)])
+    decoded = []
+    decode_file = frame_loader._decode_file
+
+    def counting(position, frame, path, reduce=1):
+        decoded.append(position)
+        return decode_file(position, frame, path, reduce)
+
+    monkeypatch.setattr(frame_loader, "_decode_file", counting)
+    results = list(load_frames(str(tmp_path), [5, 1, 3], reduce=2))
+
+    assert sorted(decoded) == [0, 1, 2]
+    assert [r["path"].endswith(f"frame_{n}.jpg") for r, n in zip(results, [5, 1, 3])] == [True] * 3
+    assert results[0]["image"].shape == (32, 48, 3)
+    with pytest.raises(ValueError):
+        list(load_frames(str(tmp_path), [1], reduce=3))
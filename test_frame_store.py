@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from video_engine.extract_frames import extract_frames, iter_frames
+from video_engine.frame_graph_api import build_frame_graph
+from video_engine.frame_loader import load_frames
+from video_engine.frame_store import FrameStore, FrameStoreWriter, is_frame_store, write_store_header
+from test_frame_cache import _video
+
+
+def _frame(n, shape=(48, 400, 3)):
+    return np.full(shape, n, dtype=np.uint8)
+
+
+def test_store_round_trips_frames_across_chunks_and_parts(tmp_path):
+    path = str(tmp_path / "store")
+    first = FrameStoreWriter(path, chunk_frames=3, prefix="seg0000")
+    second = FrameStoreWriter(path, chunk_frames=3, prefix="seg0001")
+    for n in range(0, 10, 2):
+        first.append(n, _frame(n))
+    for n in range(10, 16, 2):
+        second.append(n, _frame(n))
+    write_store_header(path, [first.close(), second.close()], fps=24)
+
+    store = FrameStore(path)
+    assert is_frame_store(path) and len(store) == 8 and len(store.header["chunks"]) == 3
+    assert store.frame_numbers.tolist() == list(range(0, 16, 2))
+    assert [int(store[i][0, 0, 0]) for i in range(len(store))] == list(range(0, 16, 2))
+    assert store.frame(12).shape == (48, 400, 3) and int(store.frame(12)[0, 0, 0]) == 12
+    assert store.proxy(0).shape == (38, 320, 3)
+    with pytest.raises(KeyError):
+        store.frame(3)
+    with pytest.raises(IndexError):
+        store[8]
+
+
+def test_writer_rejects_frames_of_another_shape(tmp_path):
+    writer = FrameStoreWriter(str(tmp_path / "store"))
+    writer.append(0, _frame(0))
+    with pytest.raises(ValueError):
+        writer.append(1, _frame(1, (48, 200, 3)))
+    writer.close()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_extracted_store_holds_the_decoded_frames(tmp_path, workers):
+    video = _video(str(tmp_path / "in.mp4"))
+    frame_dir = str(tmp_path / "frames")
+    extract_frames(video, frame_dir, step=4, fmt="store", workers=workers)
+
+    decoded = dict(iter_frames(video, step=4))
+    store = FrameStore(frame_dir)
+    assert build_frame_graph(frame_dir) == sorted(decoded)
+    for n, frame in decoded.items():
+        assert np.array_equal(store.frame(n), frame)
+    results = list(load_frames(frame_dir, [8, 4, 99]))
+    assert [r["status"] for r in results] == ["ok", "ok", "missing"]
+    assert np.array_equal(results[0]["image"][..., ::-1], decoded[8])
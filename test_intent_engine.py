@@ -0,0 +1,26 @@
+from core.intent_engine import interpret_intent, interpret_intents, merge_remote_intent
+
+
+def test_keywords_hidden_inside_other_matches_are_found():
+    # "trailer" shares its "t" with "cut", "every" its "e" with "voice"
+    intent = interpret_intent("Cutrailer voicevery 5 frames, 10s")
+    assert intent["style"] == "trailer" and intent["transitions"] == "cut"
+    assert intent["narration"] is True
+    assert intent["step"] == 5 and intent["target_duration"] == 10
+
+
+def test_batch_matches_single_prompt_results_and_yields_copies():
+    prompts = ["cinematic 24fps", "Cinematic 24FPS", None, "every 3 frames, 2 min reel"]
+    results = list(interpret_intents(prompts))
+
+    assert results == [interpret_intent(p) for p in prompts]
+    assert results[0] == results[1] and results[0] is not results[1]
+
+
+def test_remote_intent_nulls_fall_back_to_local_values():
+    local = interpret_intent("cinematic city at night")
+    intent = merge_remote_intent({"style": "cinematic", "fps": None, "step": "0", "mood": None},
+                                 "cinematic city at night", {"mood": "calm"})
+    assert (intent["fps"], intent["step"], intent["mood"]) == (local["fps"], local["step"], "calm")
+    numeric = merge_remote_intent({"fps": "24", "step": 6.0}, "reel")
+    assert (numeric["fps"], numeric["step"]) == (24, 6)
@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from core import job_queue
+from core.job_queue import JobQueue
+
+
+def _counting_job(params, job):
+    job.stage("count")
+    for i in range(params["count"]):
+        time.sleep(params["delay"])
+        job.progress("count", i + 1, params["count"])
+    return {"counted": params["count"]}
+
+
+def _failing_job(params, job):
+    job.stage("count")
+    raise ValueError("bad input")
+
+
+def _wait(queue, job_id, statuses, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} still {queue.get(job_id)['status']}")
+
+
+@pytest.fixture
+def queue(monkeypatch, tmp_path):
+    # Workers are forked after this, so they see the test handlers
+    monkeypatch.setitem(job_queue.JOB_HANDLERS, "count", "test_job_queue:_counting_job")
+    monkeypatch.setitem(job_queue.JOB_HANDLERS, "fail", "test_job_queue:_failing_job")
+    monkeypatch.chdir(tmp_path)
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), workers=2)
+    yield queue
+    queue.shutdown(wait=True)
+
+
+def test_job_runs_and_reports_progress(queue):
+    job_id = queue.submit("count", {"count": 3, "delay": 0.01})
+    job = _wait(queue, job_id, job_queue.FINAL_STATES)
+
+    assert job["status"] == "done"
+    assert job["result"]["counted"] == 3
+    assert job["progress"]["count"]["done"] == job["progress"]["count"]["total"] == 3
+    assert "count" in job["result"]["timings"]
+    with pytest.raises(ValueError):
+        queue.submit("unknown", {})
+
+
+def test_running_job_is_cancelled_and_failures_are_recorded(queue):
+    job_id = queue.submit("count", {"count": 400, "delay": 0.01})
+    _wait(queue, job_id, ("running",))
+    assert queue.cancel(job_id)
+    assert _wait(queue, job_id, job_queue.FINAL_STATES)["status"] == "cancelled"
+    assert not queue.cancel(job_id)
+
+    job = _wait(queue, queue.submit("fail", {}), job_queue.FINAL_STATES)
+    assert job["status"] == "failed" and job["error"] == "ValueError: bad input"
+
+
+def test_running_job_of_a_dead_worker_is_marked_failed(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite")
+    JobQueue(db_path, workers=1).shutdown()
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    with job_queue._connect(db_path) as conn:
+        conn.execute("INSERT INTO jobs (id, kind, status, params, pid, created, updated) "
+                     "VALUES ('stale', 'count', 'running', '{}', ?, 0, 0)", (dead.pid,))
+
+    queue = JobQueue(db_path, workers=1)
+    try:
+        assert queue.get("stale")["status"] == "failed" and queue.get("stale")["error"] == "interrupted"
+        assert job_queue._process_alive(os.getpid())
+    finally:
+        queue.shutdown()
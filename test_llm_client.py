@@ -0,0 +1,365 @@
+import json
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core import llm_client
+from core.circuit_breaker import CircuitBreaker
+from core.llm_cache import LLMCache
+from core.intent_engine import interpret_intent
+from preproduction_engine.preprod_controller import ProductionPlan
+
+
+PROMPT = "cinematic dramatic city at night"
+DELAY = 0.3
+
+PLAN = {
+    "screenplay": {"title": "Stub", "scenes": [{"id": 1, "description": "Opening", "rough_duration_s": 5}]},
+    "workflow": {"style": "cinematic", "pace": "slow", "total_steps": 1, "steps": []},
+    "characters": {"count": 0, "primary_mood": "dramatic", "characters": []},
+    "sound_design": {"track_count": 0, "style": "cinematic", "has_narration": False, "tracks": []},
+}
+
+
+class StubGroq(BaseHTTPRequestHandler):
+    """Chat-completions stub: answers intent and preproduction prompts after `DELAY`."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        with server.lock:
+            server.connections.add(self.client_address)
+            server.requests.append(body)
+        time.sleep(DELAY)
+
+        system = body["messages"][0]["content"]
+        status = 503 if len(server.requests) <= server.fail_first else server.status
+        if status != 200:
+            content = ""
+        elif server.content is not None:
+            content = server.content
+        elif "preproduction" in system:
+            content = json.dumps(PLAN)
+        else:
+            content = json.dumps(server.intent)
+        data = json.dumps({"choices": [{"message": {"content": content}}]}).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def groq(monkeypatch, tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGroq)
+    server.lock = threading.Lock()
+    server.connections = set()
+    server.requests = []
+    server.status = 200
+    server.fail_first = 0
+    server.content = None
+    server.intent = dict(interpret_intent(PROMPT), explanation="stub")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setenv("GROQ_API_URL", f"http://127.0.0.1:{server.server_port}/v1/chat/completions")
+    monkeypatch.setenv("SCRIPTORIA_LLM_CACHE", str(tmp_path / "llm_cache.sqlite"))
+    monkeypatch.setattr(llm_client, "_session", None)
+    monkeypatch.setattr(llm_client, "_breaker", CircuitBreaker(3, 60))
+    monkeypatch.setattr(llm_client, "LLM_RETRIES", 0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_reuse_pooled_connection(groq):
+    assert llm_client.request_text_from_llm("one")
+    assert llm_client.request_text_from_llm("two")
+    assert len(groq.requests) == 2
+    assert len(groq.connections) == 1
+
+
+def test_intent_and_preproduction_run_concurrently(groq):
+    start = time.perf_counter()
+    plan = ProductionPlan(PROMPT, use_llm_intent=True, use_llm_preprod=True)
+    intent = plan.intent()
+    preprod = plan.preproduction()
+    elapsed = time.perf_counter() - start
+
+    assert intent["explanation"] == "stub"
+    assert preprod["screenplay"]["title"] == "Stub"
+    assert len(groq.requests) == 2
+    assert elapsed < 2 * DELAY
+
+
+def test_preproduction_rerequested_when_remote_intent_differs(groq):
+    groq.intent = dict(interpret_intent(PROMPT), style="trailer", pace="fast")
+    plan = ProductionPlan(PROMPT, use_llm_intent=True, use_llm_preprod=True)
+
+    assert plan.intent()["style"] == "trailer"
+    assert not plan.speculation_valid()
+    assert plan.preproduction()["screenplay"]["title"] == "Stub"
+    assert len(groq.requests) == 3
+    assert '"style": "trailer"' in groq.requests[-1]["messages"][1]["content"]
+
+
+def test_falls_back_to_local_engines_on_error(groq):
+    groq.status = 500
+    plan = ProductionPlan(PROMPT, use_llm_intent=True, use_llm_preprod=True)
+
+    assert plan.intent() == interpret_intent(PROMPT)
+    assert plan.preproduction()["screenplay"]["title"] != "Stub"
+
+
+def test_cached_responses_skip_the_server(groq):
+    first = llm_client.request_intent_from_llm(PROMPT)
+    start = time.perf_counter()
+    second = llm_client.request_intent_from_llm("  " + PROMPT.replace(" ", "   ") + "\n")
+    elapsed = time.perf_counter() - start
+
+    assert second == first
+    assert len(groq.requests) == 1
+    assert elapsed < DELAY
+    stats = llm_client.get_llm_cache().stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_cache_bypass_and_failures_are_not_cached(groq):
+    llm_client.request_text_from_llm("hello")
+    llm_client.request_text_from_llm("hello", use_cache=False)
+    assert len(groq.requests) == 2
+
+    groq.status = 500
+    assert llm_client.request_text_from_llm("other") is None
+    assert llm_client.request_text_from_llm("other") is None
+    assert len(groq.requests) == 4
+
+
+def test_unparseable_answers_are_not_cached_and_cache_errors_are_misses(groq, monkeypatch):
+    groq.content = "Sure! Here is a cinematic intent."
+    assert llm_client.request_intent_from_llm(PROMPT) is None
+    assert llm_client.request_preproduction_from_llm(PROMPT) is None
+    assert llm_client.get_llm_cache().stats()["entries"] == 0
+
+    groq.content = None
+
+    def broken(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(LLMCache, "get", broken)
+    monkeypatch.setattr(LLMCache, "put", broken)
+    assert llm_client.request_intent_from_llm(PROMPT)["explanation"] == "stub"
+    assert len(groq.requests) == 3
+
+
+def test_transient_errors_are_retried(groq, monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_RETRIES", 2)
+    monkeypatch.setattr(llm_client, "backoff_delay", lambda attempt: 0.01)
+    groq.fail_first = 2
+
+    assert llm_client.request_text_from_llm("hello")
+    assert len(groq.requests) == 3
+    assert llm_client.llm_metrics()["breaker"]["state"] == "closed"
+
+
+def test_retries_stop_at_the_call_timeout(groq, monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_RETRIES", 5)
+    monkeypatch.setattr(llm_client, "backoff_delay", lambda attempt: 0.01)
+    groq.status = 503
+
+    start = time.perf_counter()
+    assert llm_client.request_text_from_llm("hello", timeout=2 * DELAY + 0.1) is None
+    assert time.perf_counter() - start < 3 * DELAY
+    assert len(groq.requests) == 3
+
+
+def test_breaker_opens_and_short_circuits(groq):
+    groq.status = 503
+    for i in range(3):
+        assert interpret_intent(f"{PROMPT} {i}", use_llm=True) == interpret_intent(f"{PROMPT} {i}")
+    assert len(groq.requests) == 3
+
+    start = time.perf_counter()
+    assert interpret_intent(PROMPT, use_llm=True) == interpret_intent(PROMPT)
+    assert time.perf_counter() - start < DELAY
+    assert len(groq.requests) == 3
+
+    metrics = llm_client.llm_metrics()
+    assert metrics["breaker"]["state"] == "open"
+    assert metrics["breaker"]["short_circuited"] == 1
+
+
+def test_breaker_half_open_trial_closes_on_success(groq):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.metrics()["state"] == "closed"
+
+
+def test_hedged_mode_returns_local_within_budget(groq):
+    before = llm_client.llm_metrics()["hedge_local"]
+    start = time.perf_counter()
+    intent = interpret_intent(PROMPT, use_llm=True, latency_budget=DELAY / 3)
+
+    assert time.perf_counter() - start < DELAY
+    assert intent == interpret_intent(PROMPT)
+    assert llm_client.llm_metrics()["hedge_local"] == before + 1
+    assert interpret_intent(PROMPT, use_llm=True, latency_budget=3 * DELAY)["explanation"] == "stub"
+
+
+def test_cache_ttl_and_lru_budget(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite"), ttl=60, budget_bytes=250)
+    for name in ("a", "b", "c"):
+        cache.put(name, "model", {"text": name * 100})
+        time.sleep(0.01)
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+    cache.ttl = 0
+    assert cache.get("c") is None
+    assert cache.stats()["expired"] == 1
+
+
+class StubSSE(BaseHTTPRequestHandler):
+    """Streaming chat-completions stub: one SSE event per chunk, `server.gap` apart."""
+
+    protocol_version = "HTTP/1.1"
+
+    def send_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        server.requests.append(body)
+        if server.status != 200:
+            self.send_response(server.status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i, token in enumerate(server.tokens):
+                if i == server.stall_after:
+                    time.sleep(server.stall)
+                chunk = {"choices": [{"delta": {"content": token}, "finish_reason": None}]}
+                self.send_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+                time.sleep(server.gap)
+            if server.finish:
+                done = {"choices": [{"delta": {}, "finish_reason": "stop"}]}
+                self.send_chunk(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode())
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading (closed the stream or timed out)
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def sse(monkeypatch, tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubSSE)
+    server.requests = []
+    server.status = 200
+    server.tokens = ["The ", "villain ", "speaks ", "in ", "the ", "rain."]
+    server.gap = 0.1
+    server.stall_after = None
+    server.stall = 0
+    server.finish = True
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setenv("GROQ_API_URL", f"http://127.0.0.1:{server.server_port}/v1/chat/completions")
+    monkeypatch.setenv("SCRIPTORIA_LLM_CACHE", str(tmp_path / "llm_cache.sqlite"))
+    monkeypatch.setattr(llm_client, "_session", None)
+    monkeypatch.setattr(llm_client, "_breaker", CircuitBreaker(3, 60))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_stream_yields_tokens_as_they_arrive(sse):
+    start = time.perf_counter()
+    stream = llm_client.stream_text_from_llm("monologue")
+    first = next(stream)
+    first_at = time.perf_counter() - start
+    rest = list(stream)
+
+    assert first == "The "
+    assert first_at < sse.gap * len(sse.tokens) / 2
+    assert first + "".join(rest) == "The villain speaks in the rain."
+    assert sse.requests[0]["stream"] is True
+
+
+def test_completed_stream_is_cached(sse):
+    text = "".join(llm_client.stream_text_from_llm("monologue"))
+
+    assert llm_client.request_text_from_llm("monologue") == text
+    assert list(llm_client.stream_text_from_llm("monologue")) == [text]
+    assert len(sse.requests) == 1
+
+
+def test_stream_error_status_yields_nothing(sse):
+    sse.status = 503
+    assert list(llm_client.stream_text_from_llm("monologue")) == []
+
+
+def test_stream_timeout_keeps_partial_text_and_skips_cache(sse):
+    sse.stall_after = 2
+    sse.stall = 1.5
+
+    status = {}
+    pieces = list(llm_client.stream_text_from_llm("monologue", timeout=0.5, status=status))
+
+    assert pieces == ["The ", "villain "]
+    assert not status["complete"] and "timed out" in status["error"]
+    assert llm_client.get_llm_cache().stats()["entries"] == 0
+
+
+def test_stream_closed_without_finish_reason_is_a_failure(sse):
+    sse.finish = False
+    status = {}
+
+    assert "".join(llm_client.stream_text_from_llm("monologue", status=status)) == "The villain speaks in the rain."
+    assert not status["complete"] and status["error"]
+    assert llm_client.llm_metrics()["breaker"]["failures"] == 1
+
+    sse.finish = True
+    list(llm_client.stream_text_from_llm("monologue", status=status))
+    assert status == {"complete": True, "error": None}
+
+
+def test_closing_a_stream_early_settles_the_breaker(sse, monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    monkeypatch.setattr(llm_client, "_breaker", breaker)
+    time.sleep(0.02)
+
+    stream = llm_client.stream_text_from_llm("monologue")
+    assert next(stream) == "The "
+    stream.close()
+    assert breaker.metrics()["state"] == "closed"
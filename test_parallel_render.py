@@ -0,0 +1,41 @@
+import os
+
+import cv2
+import numpy as np
+
+from video_engine.parallel_render import plan_chunks
+from video_engine.regenerate_api import regenerate_video
+
+
+def test_chunks_are_whole_gops():
+    chunks = plan_chunks(250, 24, 2)
+    assert chunks[0][0] == 0 and chunks[-1][1] == 250
+    assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+    assert all((stop - start) % 24 == 0 for start, stop in chunks[:-1])
+    assert plan_chunks(0, 24, 4) == []
+
+
+def test_chunked_render_matches_frame_path(tmp_path):
+    frame_dir = tmp_path / "frames"
+    frame_dir.mkdir()
+    names = []
+    for i in range(30):
+        names.append(f"frame_{i}.jpg")
+        cv2.imwrite(str(frame_dir / names[-1]), np.full((64, 96, 3), i * 8, dtype=np.uint8))
+    cv2.imwrite(str(frame_dir / "small.jpg"), np.zeros((32, 32, 3), dtype=np.uint8))
+
+    intent = {"fps": 12, "encoder": "ffmpeg", "gop": 6, "render_workers": 2, "renditions": ["full", "web720"]}
+    report = regenerate_video(str(frame_dir), names[:15] + ["small.jpg"] + names[15:], str(tmp_path / "out.mp4"),
+                              intent)
+    assert report["frames_written"] == 30
+    assert [s["status"] for s in report["skipped"]] == ["mismatch"]
+    assert not [p for p in os.listdir(tmp_path) if p.startswith("chunks_")]
+
+    cap = cv2.VideoCapture(report["renditions"]["full"])
+    means = []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        means.append(frame.mean())
+    assert len(means) == 30 and all(a < b for a, b in zip(means, means[1:]))
@@ -0,0 +1,56 @@
+import os
+
+import cv2
+import numpy as np
+
+from video_engine.frame_store import FrameStoreWriter, write_store_header
+from video_engine.regenerate_api import proxy_path, regenerate_video, render_proxy
+
+
+def _noise(shape, count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 255, shape, dtype=np.uint8) for _ in range(count)]
+
+
+def _probe(path):
+    cap = cv2.VideoCapture(path)
+    size = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    count = 0
+    while cap.read()[0]:
+        count += 1
+    cap.release()
+    return size, count
+
+
+def test_proxy_is_a_smaller_single_encode_of_the_same_path(tmp_path):
+    frame_dir = tmp_path / "frames"
+    frame_dir.mkdir()
+    names = []
+    for i, frame in enumerate(_noise((192, 320, 3), 12)):
+        names.append(f"frame_{i}.jpg")
+        cv2.imwrite(str(frame_dir / names[-1]), frame)
+    output = str(tmp_path / "out.mp4")
+    intent = {"fps": 12, "encoder": "ffmpeg", "render_workers": 2, "renditions": ["full", "web720"]}
+
+    preview = render_proxy(str(frame_dir), names, proxy_path(output), intent)
+    full = regenerate_video(str(frame_dir), names, output, intent)
+
+    assert preview["output_path"] == str(tmp_path / "out_proxy.mp4")
+    assert list(preview["renditions"]) == ["full"] and preview["frames_written"] == 12
+    assert _probe(preview["output_path"]) == ((80, 48), 12)
+    assert _probe(full["renditions"]["full"]) == ((320, 192), 12)
+    assert os.path.getsize(preview["output_path"]) < os.path.getsize(full["renditions"]["full"]) / 4
+    assert not [p for p in os.listdir(tmp_path) if p.startswith("chunks_")]
+
+
+def test_proxy_of_a_frame_store_reads_the_proxy_plane(tmp_path):
+    store_dir = str(tmp_path / "store")
+    writer = FrameStoreWriter(store_dir)
+    for n, frame in enumerate(_noise((360, 640, 3), 6)):
+        writer.append(n * 2, frame)
+    write_store_header(store_dir, [writer.close()], fps=24)
+
+    preview = render_proxy(store_dir, [0, 4, 10], str(tmp_path / "preview.mp4"), {"fps": 12})
+
+    assert preview["frames_written"] == 3 and not preview["skipped"]
+    assert _probe(preview["output_path"]) == ((320, 180), 3)
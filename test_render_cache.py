@@ -0,0 +1,61 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from video_engine.render_cache import RenderCache
+
+
+def _frames(frame_dir, count=6):
+    os.makedirs(frame_dir)
+    for i in range(count):
+        image = np.full((64, 96, 3), i * 40, dtype=np.uint8)
+        cv2.imwrite(os.path.join(frame_dir, f"frame_{i:04d}.jpg"), image)
+    return sorted(os.listdir(frame_dir))
+
+
+def test_second_render_is_a_hit(tmp_path):
+    frame_dir = str(tmp_path / "frames")
+    names = _frames(frame_dir)
+    cache = RenderCache(str(tmp_path / "cache"))
+    intent = {"fps": 12}
+
+    first = cache.regenerate("v1", frame_dir, names, str(tmp_path / "out.mp4"), intent)
+    second = cache.regenerate("v1", frame_dir, names, str(tmp_path / "other.mp4"), intent)
+    assert first["cache"] == "miss" and second["cache"] == "hit"
+    assert second["output_path"] == first["output_path"] and os.path.exists(second["output_path"])
+    assert cache.regenerate("v1", frame_dir, names[:3], str(tmp_path / "out.mp4"), intent)["cache"] == "miss"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert stats["bytes_saved"] == os.path.getsize(first["output_path"])
+
+
+def test_uncached_and_failed_renders_leave_no_tmp_dirs(tmp_path):
+    frame_dir = str(tmp_path / "frames")
+    names = _frames(frame_dir)
+    cache = RenderCache(str(tmp_path / "cache"))
+    output_path = str(tmp_path / "out" / "out.mp4")
+
+    report = cache.regenerate("v1", frame_dir, names + ["frame_9999.jpg"], output_path, {"fps": 12})
+    assert report["skipped"] and report["output_path"] == output_path and os.path.exists(output_path)
+    assert cache.stats()["entries"] == 0
+
+    def cancel(done, total):
+        raise RuntimeError("cancelled")
+
+    with pytest.raises(RuntimeError):
+        cache.regenerate("v2", frame_dir, names, output_path, {"fps": 12}, progress=cancel)
+    assert [name for name in os.listdir(cache.root) if name.endswith(".tmp")] == []
+
+
+def test_least_recently_used_render_is_evicted(tmp_path):
+    frame_dir = str(tmp_path / "frames")
+    names = _frames(frame_dir)
+    cache = RenderCache(str(tmp_path / "cache"), budget_bytes=1)
+
+    old = cache.regenerate("v1", frame_dir, names, str(tmp_path / "out.mp4"), {"fps": 12})
+    new = cache.regenerate("v2", frame_dir, names, str(tmp_path / "out.mp4"), {"fps": 12})
+    assert not os.path.exists(old["output_path"]) and os.path.exists(new["output_path"])
+    assert cache.stats()["evictions"] == 1 and cache.stats()["entries"] == 1
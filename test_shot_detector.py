@@ -0,0 +1,64 @@
+import math
+
+import numpy as np
+import pytest
+
+from video_engine.frame_graph_api import group_shots, traverse_frame_graph
+from video_engine.shot_detector import ShotDetector, merge_shot_tables
+from test_extract_frames import SCENES
+
+
+def _clip(lengths=(30, 30, 30, 30)):
+    frames = []
+    for colour, length in zip(SCENES, lengths):
+        for i in range(length):
+            frame = np.full((64, 96, 3), colour, dtype=np.uint8)
+            frame[:, i * 3:i * 3 + 6] = 128
+            frames.append(frame)
+    return frames
+
+
+def _detect(frames, start=0):
+    detector = ShotDetector()
+    for n, frame in enumerate(frames, start):
+        detector.update(n, frame)
+    return detector
+
+
+def test_detector_finds_cuts_and_ignores_flashes():
+    frames = _clip()
+    # A flash just after a cut would make a shot shorter than the minimum
+    frames[32] = frames[33] = np.full((64, 96, 3), 255, dtype=np.uint8)
+
+    shots = _detect(frames).finish()
+
+    assert [(s["start"], s["end"]) for s in shots] == [(0, 30), (30, 60), (60, 90), (90, 120)]
+    assert shots[0]["score"] == 0.0 and all(s["score"] >= 0.3 for s in shots[1:])
+
+
+@pytest.mark.parametrize("split", [30, 45])
+def test_merged_segment_tables_match_one_pass(split):
+    frames = _clip()
+    merged = merge_shot_tables([_detect(frames[:split]), _detect(frames[split:], split)])
+    assert merged == _detect(frames).finish()
+
+
+def test_shot_traversal_samples_every_shot_from_its_first_frame():
+    frames = [f"frame_{n}.jpg" for n in range(120)]
+    shots = [{"start": 0, "end": 90, "score": 0.0}, {"start": 90, "end": 100, "score": 0.5},
+             {"start": 100, "end": 120, "score": 0.5}]
+
+    path = traverse_frame_graph(frames[::-1], {"step": 6}, shots=shots)
+
+    numbers = [int(name[6:-4]) for name in path]
+    assert len(path) == math.ceil(120 / 6)
+    assert numbers == sorted(numbers) and {0, 90, 100} <= set(numbers)
+    # Scenes get equal time, however unevenly the shots are spread
+    halves = traverse_frame_graph(frames, {"step": 6}, shots=shots, scene_count=2)
+    assert sum(int(name[6:-4]) < 90 for name in halves) == len(halves) // 2
+
+
+def test_group_shots_splits_long_shots_to_fill_the_scenes():
+    scenes = group_shots([{"start": 0, "end": 40, "score": 0.0}], 3)
+    assert len(scenes) == 3
+    assert [(s["start"], s["end"]) for scene in scenes for s in scene] == [(0, 10), (10, 20), (20, 40)]
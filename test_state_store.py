@@ -0,0 +1,32 @@
+import sqlite3
+
+from core.intent_engine import interpret_intent
+from core.state_manager import StateStore, intent_fingerprint
+
+
+def test_latest_run_per_video_and_intent(tmp_path):
+    store = StateStore(str(tmp_path / "runs.sqlite"))
+    noir = interpret_intent("cinematic dark 24fps")
+    reel = interpret_intent("instagram reel")
+    store.record(noir, video_hash="v1", frame_path=[0, 12, 24], output_path="a.mp4", timings={"render": 1.5})
+    store.record(reel, video_hash="v1", output_path="b.mp4")
+    last = store.record(dict(noir, explanation="edited"), video_hash="v1", output_path="c.mp4")
+    store.record(noir, video_hash="v2", output_path="d.mp4")
+
+    run = store.latest("v1", noir)
+    assert run["id"] == last and run["output_path"] == "c.mp4"
+    assert store.latest("v3", noir) is None
+    assert [r["output_path"] for r in store.history(intent=noir)] == ["d.mp4", "c.mp4", "a.mp4"]
+    assert store.get(1)["frame_path"] == [0, 12, 24] and store.get(1)["timings"] == {"render": 1.5}
+    assert intent_fingerprint({"fps": 8, "style": "x"}) == intent_fingerprint({"style": "x", "fps": 8})
+
+
+def test_lookups_use_the_indexes(tmp_path):
+    store = StateStore(str(tmp_path / "runs.sqlite"))
+    conn = sqlite3.connect(store.path)
+    for where, index in (("video_hash = 'v' AND intent_fingerprint = 'f'", "runs_video_intent"),
+                         ("intent_fingerprint = 'f'", "runs_intent"), ("created >= 0", "runs_created")):
+        plan = " ".join(row[-1] for row in conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT * FROM runs WHERE {where} ORDER BY created DESC, id DESC LIMIT 1"))
+        assert f"USING INDEX {index}" in plan and "TEMP B-TREE" not in plan
+    conn.close()
@@ -0,0 +1,43 @@
+import cv2
+import numpy as np
+
+from video_engine.stream_pipeline import run_streaming_pipeline
+
+
+def _video(path, count=48):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 24, (96, 64))
+    for i in range(count):
+        writer.write(np.full((64, 96, 3), i * 5, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def _means(path):
+    cap = cv2.VideoCapture(path)
+    means = []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        means.append(frame.mean())
+    cap.release()
+    return means
+
+
+def test_streaming_pipeline_writes_the_selected_frames_in_order(tmp_path):
+    video = _video(str(tmp_path / "in.mp4"))
+    output = str(tmp_path / "out.mp4")
+    reports = []
+
+    count = run_streaming_pipeline(video, output, {"step": 3, "fps": 12, "encoder": "ffmpeg"}, queue_size=2,
+                                   progress=lambda done, total: reports.append(done))
+
+    means = _means(output)
+    assert count == 16 and len(means) == 16
+    assert all(a < b for a, b in zip(means, means[1:]))
+    assert reports[-1] == 16
+
+
+def test_streaming_pipeline_reports_an_unreadable_video(tmp_path):
+    (tmp_path / "in.mp4").write_bytes(b"not a video")
+    assert run_streaming_pipeline(str(tmp_path / "in.mp4"), str(tmp_path / "out.mp4"), {"step": 1}) == 0
@@ -0,0 +1,43 @@
+import json
+import threading
+
+from core import tracing
+
+
+def test_spans_nest_per_thread_and_feed_stage_timings(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCRIPTORIA_TRACE_DIR", str(tmp_path / "traces"))
+    monkeypatch.setenv("SCRIPTORIA_METRICS_DB", str(tmp_path / "metrics.sqlite"))
+    monkeypatch.setenv("SCRIPTORIA_METRICS_FILE", str(tmp_path / "metrics.prom"))
+    trace = tracing.start_trace("render", "job1")
+
+    with tracing.span("extract", stage=True) as stage:
+        with tracing.span("extract_frames"):
+            tracing.count("frames_decoded", 120)
+        worker = threading.Thread(target=lambda: tracing.observe("llm_latency_seconds", 0.25))
+        worker.start()
+        worker.join()
+
+    spans = {span.name: span for span in trace.spans}
+    assert spans["extract_frames"].parent == stage.id
+    assert list(trace.stage_timings()) == ["extract"]
+
+    path = tracing.finish_trace()
+    assert tracing.current() is None
+    saved = json.load(open(path))
+    assert saved["counters"] == {"frames_decoded": 120}
+    assert saved["observations"]["llm_latency_seconds"]["count"] == 1
+
+    tracing.start_trace("render", "job2")
+    tracing.count("frames_decoded", 30)
+    tracing.finish_trace()
+    text = (tmp_path / "metrics.prom").read_text()
+    assert "scriptoria_frames_decoded_total 150\n" in text
+    assert 'scriptoria_traces_total{name="render"} 2' in text
+    assert "scriptoria_llm_latency_seconds_sum 0.25" in text
+
+
+def test_helpers_do_nothing_without_a_trace():
+    assert tracing.current() is None
+    with tracing.span("idle"):
+        tracing.count("frames_decoded")
+    assert tracing.start_span("stage", stage=True).end() >= 0
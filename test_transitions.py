@@ -0,0 +1,62 @@
+import numpy as np
+
+from video_engine.parallel_render import plan_chunks
+from video_engine.transitions import CROSSFADE_SHOT_FRACTION, TransitionEngine, shot_cuts, transition_for
+
+
+def _stream(values, cuts):
+    return [(cut, np.full((4, 6, 3), value, dtype=np.uint8)) for value, cut in zip(values, cuts)]
+
+
+def test_dissolve_and_crossfade_between_shots():
+    cuts = shot_cuts([0, 12, 24, 48, 60, 72], [{"start": 0, "end": 48}, {"start": 48, "end": 96}])
+    assert cuts == [False, False, False, True, False, False]
+    items = _stream([0, 0, 0, 200, 200, 200], cuts)
+
+    dissolve = TransitionEngine("dissolve", 3)
+    assert [int(f[0, 0, 0]) for f in dissolve.apply(items)] == [0, 0, 0, 50, 100, 150, 200, 200, 200]
+
+    long_items = _stream([0] * 8 + [200] * 8, [False] * 8 + [True] + [False] * 7)
+    crossfade = TransitionEngine("crossfade", 2, ring_size=2)
+    out = [f for f in crossfade.apply(long_items)]
+    assert [int(f[0, 0, 0]) for f in out] == [0] * 6 + [67, 133] + [200] * 6
+    # Blends land in the preallocated ring buffers, source frames pass through untouched
+    assert out[6] is crossfade._ring[0] and out[7] is crossfade._ring[1] and out[-1] is long_items[-1][1]
+    assert crossfade.transitions == dissolve.transitions == 1
+
+    assert [int(f[0, 0, 0]) for f in TransitionEngine("cut").apply(items)] == [0, 0, 0, 200, 200, 200]
+
+
+def test_crossfade_never_drops_frames_from_short_shots():
+    values = list(range(10, 16)) + [100, 101] + list(range(200, 206))
+    cuts = [False] * 6 + [True, False, True] + [False] * 5
+    out = [int(f[0, 0, 0]) for f in TransitionEngine("crossfade", 3).apply(_stream(values, cuts))]
+    # Shot B is too short to overlap, so every frame plays in order
+    assert out == values
+
+
+def test_crossfade_output_frame_count_against_selection():
+    # A cinematic selection (step 12) of a 480-frame clip with 48-frame shots: 4 frames per shot
+    cuts = [i > 0 and i % 4 == 0 for i in range(40)]
+    items = _stream([i * 6 for i in range(40)], cuts)
+
+    kind, frames = transition_for({"style": "cinematic"})
+    assert len(list(TransitionEngine(kind, frames).apply(items))) == 40
+
+    crossfade = TransitionEngine("crossfade", frames)
+    out = [int(f[0, 0, 0]) for f in crossfade.apply(items)]
+    assert len(out) == 40 - crossfade.transitions >= 40 * (1 - CROSSFADE_SHOT_FRACTION)
+    assert out == sorted(out)
+
+
+def test_transition_defaults_per_style_and_chunking():
+    assert transition_for({"style": "cinematic"}) == ("cut", 6)
+    assert transition_for({"style": "cinematic", "transitions": "crossfade"}) == ("crossfade", 6)
+    assert transition_for({"style": "trailer", "transitions": "dissolve"}) == ("dissolve", 2)
+    assert transition_for({"style": "reel", "transitions": "wipe"})[0] == "cut"
+
+    cuts = [False] * 100
+    assert plan_chunks(100, 12, 2) == [(0, 36), (36, 72), (72, 100)]
+    cuts[34] = True
+    # A chunk starting at 36 would split the crossfade around 34, so it starts after it
+    assert plan_chunks(100, 12, 2, cuts, (3, 3)) == [(0, 38), (38, 72), (72, 100)]
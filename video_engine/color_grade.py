@@ -0,0 +1,163 @@
+import functools
+import os
+
+import numpy as np
+
+
+# Grid points per axis of the built-in grade LUTs (the common .cube size)
+LUT_SIZE = 33
+# Rec. 709 luma weights, used for saturation changes
+LUMA = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+
+def _saturate(rgb, amount):
+    luma = rgb @ LUMA
+    return luma[..., None] + amount * (rgb - luma[..., None])
+
+
+def _contrast(rgb, amount):
+    """Blend towards a smoothstep S-curve around mid grey."""
+    return rgb + amount * (rgb * rgb * (3 - 2 * rgb) - rgb)
+
+
+# Grade name -> function from an (..., 3) array of RGB values in [0, 1] to graded values
+GRADES = {
+    "bright": lambda rgb: _saturate(1 - (1 - rgb) ** 1.3, 1.15),
+    "dark": lambda rgb: _saturate(0.92 * rgb ** 1.3, 0.9),
+    "warm": lambda rgb: rgb * np.array([1.08, 1.02, 0.88], dtype=np.float32) + np.array([0.02, 0.01, 0], dtype=np.float32),
+    "cool": lambda rgb: rgb * np.array([0.9, 1.0, 1.08], dtype=np.float32) + np.array([0, 0.01, 0.02], dtype=np.float32),
+}
+# Mood -> extra look applied after the grade
+MOODS = {
+    "dramatic": lambda rgb: _saturate(_contrast(rgb, 0.35), 1.05),
+}
+
+
+def identity_lut(size: int = LUT_SIZE) -> np.ndarray:
+    """(size, size, size, 3) float32 LUT indexed [r, g, b] that maps every colour to itself."""
+    axis = np.linspace(0, 1, size, dtype=np.float32)
+    return np.stack(np.meshgrid(axis, axis, axis, indexing="ij"), axis=-1)
+
+
+@functools.lru_cache(maxsize=8)
+def build_lut(grade=None, mood=None, size: int = LUT_SIZE) -> np.ndarray:
+    """3D LUT for a `color_grade` and `mood` from the intent (unknown names are left out)."""
+    lut = identity_lut(size)
+    for look in (GRADES.get(grade), MOODS.get(mood)):
+        if look is not None:
+            lut = look(lut)
+    lut = np.clip(lut, 0, 1).astype(np.float32)
+    lut.setflags(write=False)
+    return lut
+
+
+def load_cube(path) -> np.ndarray:
+    """Read a `.cube` 3D LUT (Adobe/Resolve format) as a [r, g, b] indexed float32 array."""
+    size = None
+    domain_min, domain_max = np.zeros(3, np.float32), np.ones(3, np.float32)
+    values = []
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if not parts or parts[0].startswith("#"):
+                continue
+            keyword = parts[0].upper()
+            if keyword == "LUT_3D_SIZE":
+                size = int(parts[1])
+            elif keyword == "DOMAIN_MIN":
+                domain_min = np.array(parts[1:4], np.float32)
+            elif keyword == "DOMAIN_MAX":
+                domain_max = np.array(parts[1:4], np.float32)
+            elif keyword == "LUT_1D_SIZE":
+                raise ValueError(f"{path}: 1D LUTs are not supported")
+            elif keyword[0].isalpha():
+                continue  # TITLE and other metadata
+            else:
+                values.append(parts[:3])
+    if size is None:
+        raise ValueError(f"{path}: missing LUT_3D_SIZE")
+    if len(values) != size ** 3:
+        raise ValueError(f"{path}: expected {size ** 3} entries, found {len(values)}")
+    # Red varies fastest in the file, so the rows reshape to [b, g, r]
+    lut = np.array(values, dtype=np.float32).reshape(size, size, size, 3).transpose(2, 1, 0, 3)
+    lut = (lut - domain_min) / (domain_max - domain_min)
+    return np.ascontiguousarray(np.clip(lut, 0, 1))
+
+
+def _axis_weights(size):
+    """Lower grid index and weight of the upper one for each 8-bit level along a LUT axis."""
+    position = np.arange(256, dtype=np.float32) * ((size - 1) / 255)
+    lower = np.minimum(position.astype(np.intp), size - 2)
+    return lower, (position - lower)[:, None]
+
+
+def expand_lut(lut: np.ndarray) -> np.ndarray:
+    """Resample `lut` to one uint8 RGB entry per 24-bit colour, indexed by `r << 16 | g << 8 | b`.
+
+    Trilinear interpolation on a regular grid is separable, so it is done as
+    one linear interpolation per axis; the last axis is filled one red level
+    at a time to keep the float working set small.
+    """
+    size = lut.shape[0]
+    lower, weight = _axis_weights(size)
+    # Along r, then g: (256, 256, size, 3)
+    lut = lut[lower] * (1 - weight[:, None, None]) + lut[lower + 1] * weight[:, None, None]
+    lut = lut[:, lower] * (1 - weight[None, :, None]) + lut[:, lower + 1] * weight[None, :, None]
+    table = np.empty((256, 256, 256, 3), dtype=np.uint8)
+    for r in range(256):
+        plane = lut[r][:, lower] * (1 - weight) + lut[r][:, lower + 1] * weight
+        np.rint(plane * 255, out=plane)
+        table[r] = plane
+    return table.reshape(-1, 3)
+
+
+@functools.lru_cache(maxsize=4)
+def _grade_table(grade, mood, lut_path, mtime):
+    lut = load_cube(lut_path) if lut_path else build_lut(grade, mood)
+    return expand_lut(lut)
+
+
+class ColorGrader:
+    """Apply a 3D LUT to RGB frames with one table lookup per pixel.
+
+    The LUT is expanded once to a 256^3 table (48 MB, shared by every grader
+    with the same grade); `apply` packs each pixel into a 24-bit index and
+    gathers from the table. The index buffers are kept between frames, so
+    grading a stream allocates nothing per frame once the size is known.
+    """
+
+    def __init__(self, table: np.ndarray):
+        self.table = table
+        self._shape = None
+
+    def _buffers(self, shape):
+        if self._shape != shape:
+            self._index = np.empty(shape[:2], dtype=np.uint32)
+            self._scratch = np.empty(shape[:2], dtype=np.uint32)
+            self._out = np.empty(shape, dtype=np.uint8)
+            self._shape = shape
+        return self._index, self._scratch
+
+    def apply(self, frame: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """Grade an (H, W, 3) uint8 RGB frame into `out` (may be `frame`; default a reused buffer)."""
+        index, scratch = self._buffers(frame.shape)
+        np.left_shift(frame[..., 0], 16, out=index, dtype=np.uint32)
+        np.left_shift(frame[..., 1], 8, out=scratch, dtype=np.uint32)
+        np.bitwise_or(index, scratch, out=index)
+        np.bitwise_or(index, frame[..., 2], out=index)
+        if out is None:
+            out = self._out
+        np.take(self.table, index.reshape(-1), axis=0, out=out.reshape(-1, 3))
+        return out
+
+
+def grader_for(intent):
+    """`ColorGrader` for the intent's `lut` (.cube path), or its `color_grade` and `mood`; None if neither applies."""
+    intent = intent if isinstance(intent, dict) else {}
+    lut_path = intent.get("lut")
+    if lut_path:
+        return ColorGrader(_grade_table(None, None, lut_path, os.path.getmtime(lut_path)))
+    grade, mood = intent.get("color_grade"), intent.get("mood")
+    if grade not in GRADES and mood not in MOODS:
+        return None
+    return ColorGrader(_grade_table(grade if grade in GRADES else None, mood if mood in MOODS else None, None, None))
@@ -0,0 +1,172 @@
+import os
+import subprocess
+import tempfile
+
+import numpy as np
+from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+
+
+DEFAULT_BACKEND = "moviepy"
+DEFAULT_CODEC = "libx264"
+DEFAULT_PRESET = "medium"
+DEFAULT_CRF = 23
+
+# Output variants the ffmpeg backend can produce from a single pass. `suffix`
+# is appended to the output file stem; `filter` is an ffmpeg filter chain
+# (commas inside expressions escaped for -filter_complex).
+RENDITIONS = {
+    "full": {"suffix": "", "filter": "scale=trunc(iw/2)*2:trunc(ih/2)*2"},
+    "web720": {"suffix": "_720p", "filter": "scale=-2:'min(720\\,trunc(ih/2)*2)'"},
+    # Centre 9:16 crop: narrows landscape sources, shortens tall portrait ones
+    "reel": {"suffix": "_reel", "filter": "crop=trunc(min(iw\\,ih*9/16)/2)*2:trunc(min(ih\\,iw*16/9)/2)*2"},
+}
+
+
+def encoder_options(intent) -> dict:
+    """Encoder settings from an intent dict.
+
+    Reads `encoder`, `codec`, `preset`, `crf`, `threads`, `renditions`,
+    `gop` (fixed keyframe interval in frames) and `render_workers` (chunks
+    encoded in parallel, see `parallel_render`).
+    """
+    intent = intent if isinstance(intent, dict) else {}
+    return {
+        "backend": intent.get("encoder") or DEFAULT_BACKEND,
+        "codec": intent.get("codec") or DEFAULT_CODEC,
+        "preset": intent.get("preset") or DEFAULT_PRESET,
+        "crf": intent.get("crf") if intent.get("crf") is not None else DEFAULT_CRF,
+        "threads": intent.get("threads"),
+        "renditions": list(intent.get("renditions") or ["full"]),
+        "gop": intent.get("gop"),
+        "workers": intent.get("render_workers") or 1,
+    }
+
+
+def rendition_paths(output_path, renditions) -> dict:
+    """Map rendition names to output files derived from `output_path`."""
+    stem, ext = os.path.splitext(output_path)
+    paths = {}
+    for name in renditions:
+        if name not in RENDITIONS:
+            raise ValueError(f"Unknown rendition: {name}")
+        paths[name] = f"{stem}{RENDITIONS[name]['suffix']}{ext}"
+    return paths
+
+
+def _ffmpeg_exe():
+    import imageio_ffmpeg
+
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+class MoviepyEncoder:
+    """moviepy's FFMPEG_VideoWriter (single output), with the intent's `crf`."""
+
+    def __init__(self, output_path, size, fps, options):
+        self.paths = {"full": output_path}
+        self.writer = FFMPEG_VideoWriter(output_path, size, fps, codec=options["codec"],
+                                         preset=options["preset"], threads=options["threads"],
+                                         ffmpeg_params=["-crf", str(options["crf"])])
+
+    def write(self, frame):
+        self.writer.write_frame(frame)
+
+    def close(self):
+        self.writer.close()
+
+
+class FFmpegPipeEncoder:
+    """Pipe raw RGB frames into one ffmpeg process that writes every rendition.
+
+    The input is split inside ffmpeg (`-filter_complex split`), so frames are
+    decoded and sent once however many renditions are requested.
+    """
+
+    def __init__(self, output_path, size, fps, options):
+        width, height = size
+        self.paths = rendition_paths(output_path, options["renditions"])
+        names = list(self.paths)
+
+        cmd = [
+            _ffmpeg_exe(), "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "rawvideo", "-vcodec", "rawvideo", "-pix_fmt", "rgb24",
+            "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+        ]
+        graph = [f"[0:v]split={len(names)}" + "".join(f"[in{i}]" for i in range(len(names)))]
+        graph += [f"[in{i}]{RENDITIONS[name]['filter']}[out{i}]" for i, name in enumerate(names)]
+        cmd += ["-filter_complex", ";".join(graph)]
+
+        for i, name in enumerate(names):
+            cmd += ["-map", f"[out{i}]", "-c:v", options["codec"], "-preset", options["preset"],
+                    "-crf", str(options["crf"]), "-pix_fmt", "yuv420p"]
+            if options["gop"]:
+                # Keyframes exactly every `gop` frames, never on scene changes
+                cmd += ["-g", str(options["gop"]), "-keyint_min", str(options["gop"]), "-sc_threshold", "0"]
+            if options["threads"]:
+                cmd += ["-threads", str(options["threads"])]
+            cmd.append(self.paths[name])
+
+        self._log = tempfile.TemporaryFile()
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self._log)
+
+    def write(self, frame):
+        try:
+            self.proc.stdin.write(np.ascontiguousarray(frame, dtype=np.uint8).data)
+        except BrokenPipeError:
+            self.close()
+
+    def close(self):
+        if self._log.closed:
+            return
+        if self.proc.stdin and not self.proc.stdin.closed:
+            try:
+                self.proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        code = self.proc.wait()
+        self._log.seek(0)
+        log = self._log.read().decode("utf-8", errors="replace").strip()
+        self._log.close()
+        if code != 0:
+            raise RuntimeError(f"ffmpeg exited with status {code}: {log}")
+
+
+ENCODER_BACKENDS = {
+    "moviepy": MoviepyEncoder,
+    "ffmpeg": FFmpegPipeEncoder,
+}
+
+
+def open_encoder(output_path, size, fps, intent=None):
+    options = encoder_options(intent)
+    backend = ENCODER_BACKENDS.get(options["backend"])
+    if backend is None:
+        raise ValueError(f"Unknown encoder backend: {options['backend']}")
+    if backend is MoviepyEncoder and (options["renditions"] != ["full"] or options["gop"]):
+        backend = FFmpegPipeEncoder
+    return backend(output_path, size, fps, options)
+
+
+def encode_frames(frames, output_path, fps, intent=None, progress=None):
+    """Encode an iterable of RGB arrays to `output_path`.
+
+    The backend and its settings come from `intent` (see `encoder_options`);
+    the encoder is opened on the first frame, once the size is known.
+    `progress(count)` is called after each frame is written. Returns
+    `(frame count, {rendition: path})`.
+    """
+    encoder = None
+    count = 0
+    try:
+        for frame in frames:
+            if encoder is None:
+                height, width = frame.shape[:2]
+                encoder = open_encoder(output_path, (width, height), fps, intent)
+            encoder.write(frame)
+            count += 1
+            if progress is not None:
+                progress(count)
+    finally:
+        if encoder is not None:
+            encoder.close()
+    return count, (encoder.paths if encoder is not None else {})
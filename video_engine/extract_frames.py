@@ -1,20 +1,266 @@
 import cv2
+import multiprocessing
 import os
+import re
+import subprocess
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
 
-def extract_frames(video_path, output_dir):
-    os.makedirs(output_dir, exist_ok=True)
+from core import tracing
+
+from .frame_index import FrameIndex
+from .frame_store import STORE_FORMAT, FrameStoreWriter, write_store_header
+from .shot_detector import ShotDetector, merge_shot_tables, save_shots
+
+
+# Gaps at least this long are crossed with a keyframe-aligned seek instead of
+# grabbing (demuxing without colour conversion) every skipped frame.
+DEFAULT_SEEK_THRESHOLD = 16
+# With parallel segments, progress is reported (and may cancel) this often (seconds)
+PROGRESS_POLL_SECONDS = 0.5
+
+_PTS_TIME_RE = re.compile(r"pts_time:\s*(-?[\d.]+)")
+
+
+def iter_frames(video_path, step: int = 1, seek_threshold: int = DEFAULT_SEEK_THRESHOLD, stats: dict = None,
+                start: int = 0, stop: int = None):
+    """Yield `(frame_id, frame)` pairs decoded from `video_path` as BGR arrays.
+
+    Only every `step`-th frame is retrieved. Frames in between are skipped with
+    `grab()`, or with a `CAP_PROP_POS_FRAMES` seek when `step` reaches
+    `seek_threshold`. `frame_id` is always the frame number in the source.
+    `start`/`stop` restrict decoding to the source range `[start, stop)`.
+    If `stats` is given it is filled with decoded/skipped/seek counters.
+    """
+    if stats is None:
+        stats = {}
+    stats.update({"decoded": 0, "skipped": 0, "seeks": 0})
+    step = max(1, int(step))
+    # First kept frame at or after `start`
+    frame_id = -(-start // step) * step
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if frame_id and cap.set(cv2.CAP_PROP_POS_FRAMES, frame_id):
+            stats["seeks"] += 1
+        else:
+            for _ in range(frame_id):
+                if not cap.grab():
+                    return
+                stats["skipped"] += 1
+
+        while stop is None or frame_id < stop:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            stats["decoded"] += 1
+            yield frame_id, frame
 
+            next_id = frame_id + step
+            if step >= seek_threshold and cap.set(cv2.CAP_PROP_POS_FRAMES, next_id):
+                stats["seeks"] += 1
+            else:
+                for _ in range(step - 1):
+                    if not cap.grab():
+                        return
+                    stats["skipped"] += 1
+            frame_id = next_id
+    finally:
+        cap.release()
+
+
+def probe_keyframes(video_path):
+    """Return the source frame numbers of keyframes in `video_path`.
+
+    Uses the ffmpeg binary bundled with moviepy (imageio-ffmpeg) and only
+    decodes keyframes. Returns an empty list if probing is not possible.
+    """
     cap = cv2.VideoCapture(video_path)
-    frame_id = 0
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    if not fps:
+        return []
+
+    try:
+        import imageio_ffmpeg
+
+        cmd = [
+            imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-nostats",
+            "-skip_frame", "nokey", "-i", video_path,
+            "-map", "0:v:0", "-vf", "showinfo", "-an", "-f", "null", "-",
+        ]
+        proc = subprocess.run(cmd, capture_output=True, text=True, errors="replace")
+    except Exception as exc:
+        print(f"[WARN] Keyframe probe failed: {exc}")
+        return []
+
+    times = [float(m.group(1)) for m in _PTS_TIME_RE.finditer(proc.stderr)]
+    if not times:
+        return []
+    origin = times[0]
+    return sorted({int(round((t - origin) * fps)) for t in times})
+
+
+def plan_segments(frame_count: int, keyframes, workers: int):
+    """Split `[0, frame_count)` into at most `workers` ranges starting on keyframes."""
+    if workers <= 1 or frame_count <= 0:
+        return [(0, None)]
+
+    candidates = [k for k in keyframes if 0 < k < frame_count]
+    if not candidates:
+        candidates = list(range(1, frame_count))
+
+    bounds = [0]
+    for i in range(1, workers):
+        target = frame_count * i // workers
+        nearest = min(candidates, key=lambda k: abs(k - target))
+        if nearest > bounds[-1]:
+            bounds.append(nearest)
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+    ends = bounds[1:] + [None]
+    return list(zip(bounds, ends))
 
-        frame_path = os.path.join(output_dir, f"frame_{frame_id}.jpg")
-        cv2.imwrite(frame_path, frame)
-        frame_id += 1
 
+def _extract_segment(args, progress=None):
+    video_path, output_dir, step, seek_threshold, size, fmt, detect_shots, segment, start, stop = args
+    stats = {}
+    written = []
+    rows = []
+    store = FrameStoreWriter(output_dir, prefix=f"seg{segment:04d}") if fmt == STORE_FORMAT else None
+    detector = ShotDetector() if detect_shots else None
+    for frame_id, frame in iter_frames(video_path, step=step, seek_threshold=seek_threshold, stats=stats,
+                                       start=start, stop=stop):
+        if detector is not None:
+            detector.update(frame_id, frame)
+        if size:
+            frame = cv2.resize(frame, tuple(size), interpolation=cv2.INTER_AREA)
+        if store is not None:
+            path, offset, nbytes = store.append(frame_id, frame)
+            written.append(frame_id)
+            rows.append((frame_id, path, offset, nbytes))
+            if progress is not None:
+                progress(len(written))
+            continue
+        name = f"frame_{frame_id}.{fmt}"
+        ok, encoded = cv2.imencode(f".{fmt}", frame)
+        if not ok:
+            raise ValueError(f"Could not encode frame {frame_id} as {fmt}")
+        with open(os.path.join(output_dir, name), "wb") as f:
+            f.write(encoded.data)
+        written.append(name)
+        rows.append((frame_id, name, 0, len(encoded)))
+        if progress is not None:
+            progress(len(written))
+    stats["frames"] = written
+    stats["rows"] = rows
+    if store is not None:
+        stats["part"] = store.close()
+    stats["detector"] = detector
+    return stats
+
+
+class ExtractionStopped(Exception):
+    """Raised inside a segment worker once the extraction was aborted."""
+
+
+_segment_state = None
+
+
+def _init_segment_worker(counts, stop):
+    global _segment_state
+    _segment_state = (counts, stop)
+
+
+def _extract_shared_segment(args):
+    # Publishes the segment's written count and stops at the next frame once aborted
+    counts, stop = _segment_state
+    segment = args[7]
+
+    def report(done):
+        counts[segment] = done
+        if stop.is_set():
+            raise ExtractionStopped(f"segment {segment}")
+
+    return _extract_segment(args, report)
+
+
+@tracing.traced("extract_frames")
+def extract_frames(video_path, output_dir, step: int = 1, seek_threshold: int = DEFAULT_SEEK_THRESHOLD,
+                   size=None, fmt: str = "jpg", workers: int = 1, detect_shots: bool = True, progress=None):
+    """Write every `step`-th frame of `video_path` to `output_dir` as `fmt` images.
+
+    Files are named after their source frame number, so traversal can tell
+    which frames an intent keeps. `size` optionally resizes frames to
+    `(width, height)`. With `fmt="store"` frames go into a memory-mapped
+    frame store (see `frame_store.py`) instead of one image per frame.
+    With `detect_shots` the decoded frames also feed a `ShotDetector` and the
+    shot table is saved next to the frames, at no extra decode cost. A
+    `FrameIndex` manifest (`index.sqlite`) records every written frame.
+
+    With `workers > 1` the video is split into keyframe-aligned ranges, each
+    decoded by its own process with its own capture; the files written are
+    identical to the serial path. Returns the decode counters from
+    `iter_frames` plus `frames`, the written file names (source frame numbers
+    for a store) in frame order.
+
+    `progress(done, total)` is called as frames are written (per frame on the
+    serial path, every `PROGRESS_POLL_SECONDS` with `workers > 1`); `total`
+    is the expected frame count. An exception raised from it aborts the
+    extraction, stopping every segment at its next frame.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    cap = cv2.VideoCapture(video_path)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
     cap.release()
-    print(f"[INFO] Extracted {frame_id} frames")
+
+    segments = [(0, None)]
+    if workers > 1:
+        segments = plan_segments(frame_count, probe_keyframes(video_path), workers)
+
+    jobs = [(video_path, output_dir, step, seek_threshold, size, fmt, detect_shots, i, start, stop)
+            for i, (start, stop) in enumerate(segments)]
+    total = -(-frame_count // step) if frame_count > 0 else 0
+    if len(jobs) == 1:
+        report = (lambda done: progress(done, total)) if progress is not None else None
+        results = [_extract_segment(jobs[0], report)]
+    else:
+        counts = multiprocessing.Array("q", len(jobs), lock=False)
+        stop = multiprocessing.Event()
+        with ProcessPoolExecutor(max_workers=len(jobs), initializer=_init_segment_worker,
+                                 initargs=(counts, stop)) as pool:
+            futures = [pool.submit(_extract_shared_segment, job) for job in jobs]
+            try:
+                pending = futures
+                while pending:
+                    done, pending = wait(pending, timeout=PROGRESS_POLL_SECONDS, return_when=FIRST_EXCEPTION)
+                    for future in done:
+                        if future.exception() is not None:
+                            raise future.exception()
+                    if progress is not None:
+                        progress(sum(counts), total)
+            except BaseException:
+                stop.set()
+                raise
+            results = [future.result() for future in futures]
+
+    stats = {"decoded": 0, "skipped": 0, "seeks": 0, "frames": []}
+    for result in results:
+        for key in ("decoded", "skipped", "seeks"):
+            stats[key] += result[key]
+        stats["frames"].extend(result["frames"])
+    with FrameIndex(output_dir) as index:
+        index.write((n, path, offset, n / fps if fps else 0.0, nbytes)
+                    for result in results for n, path, offset, nbytes in result["rows"])
+    if fmt == STORE_FORMAT:
+        write_store_header(output_dir, [result["part"] for result in results], fps=fps)
+    if detect_shots:
+        stats["shots"] = merge_shot_tables([result["detector"] for result in results])
+        save_shots(output_dir, stats["shots"])
+
+    tracing.count("frames_decoded", stats["decoded"])
+    tracing.count("frames_extracted", len(stats["frames"]))
+    tracing.count("extract_bytes_written", sum(row[3] for result in results for row in result["rows"]))
+    print(f"[INFO] Extracted {stats['decoded']} frames (skipped {stats['skipped']}, seeks {stats['seeks']}, "
+          f"segments {len(jobs)})")
+    return stats
@@ -0,0 +1,149 @@
+import functools
+import hashlib
+import json
+import math
+import os
+import shutil
+import time
+
+from core import tracing
+from core.intent_engine import STYLE_PRESETS
+
+from .extract_frames import extract_frames
+
+
+DEFAULT_BUDGET_BYTES = 4 * 1024 ** 3
+META_FILE = "cache.json"
+# Extractions keep every BASE_STEP-th frame (the largest step dividing every
+# style preset's), so one extraction serves whichever style is asked for next.
+BASE_STEP = functools.reduce(math.gcd, (preset["step"] for _, preset in STYLE_PRESETS))
+
+
+def video_digest(video_path, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of the video file contents."""
+    h = hashlib.sha256()
+    with open(video_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _dir_size(path) -> int:
+    total = 0
+    for entry in os.scandir(path):
+        if entry.is_file(follow_symlinks=False):
+            total += entry.stat(follow_symlinks=False).st_size
+    return total
+
+
+class FrameCache:
+    """Content-addressed store of extracted frames under `root/<digest>/`.
+
+    Entries are keyed by the digest of the source video plus the extraction
+    parameters (size, format, step). An entry extracted with step `s` also
+    serves any request whose step is a multiple of `s`, since traversal selects
+    by source frame number; misses are extracted at `gcd(step, BASE_STEP)`
+    so the next style's step is a hit too. Least-recently-used entries are
+    evicted once the total size exceeds `budget_bytes`.
+    """
+
+    def __init__(self, root, budget_bytes: int = DEFAULT_BUDGET_BYTES, workers: int = 1):
+        self.root = root
+        self.budget_bytes = budget_bytes
+        # Parallel extraction produces identical frames, so it is not part of the key.
+        self.workers = workers
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def entry_key(digest: str, params: dict) -> str:
+        payload = json.dumps({"video": digest, **params}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def _entries(self):
+        for name in os.listdir(self.root):
+            meta_path = os.path.join(self.root, name, META_FILE)
+            try:
+                with open(meta_path, "r") as f:
+                    yield name, json.load(f)
+            except (OSError, ValueError):
+                continue
+
+    def _touch(self, key, meta):
+        meta["last_used"] = time.time()
+        meta_path = os.path.join(self.root, key, META_FILE)
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def lookup(self, digest: str, step: int = 1, size=None, fmt: str = "jpg"):
+        """Return the frame dir of a cached extraction usable for `step`, or None."""
+        best = None
+        for key, meta in self._entries():
+            params = meta.get("params", {})
+            if meta.get("video") != digest or params.get("fmt") != fmt or params.get("size") != size:
+                continue
+            cached_step = params.get("step", 1)
+            if step % cached_step:
+                continue
+            if best is None or cached_step > best[1]["params"]["step"]:
+                best = (key, meta)
+
+        if best is None:
+            return None
+        key, meta = best
+        self._touch(key, meta)
+        return os.path.join(self.root, key)
+
+    def get_or_extract(self, video_path, step: int = 1, size=None, fmt: str = "jpg", progress=None, digest=None):
+        """Return a frame dir for `video_path`, extracting only on a cache miss.
+
+        `progress` is passed through to `extract_frames`. Pass the video's
+        `digest` if it is already known to skip hashing the file again.
+        """
+        if digest is None:
+            with tracing.span("ingest"):
+                digest = video_digest(video_path)
+        size = list(size) if size else None
+        cached = self.lookup(digest, step=step, size=size, fmt=fmt)
+        if cached:
+            tracing.count("frame_cache_hits")
+            print(f"[INFO] Frame cache hit: {cached}")
+            return cached
+        tracing.count("frame_cache_misses")
+
+        params = {"step": math.gcd(step, BASE_STEP), "size": size, "fmt": fmt}
+        key = self.entry_key(digest, params)
+        frame_dir = os.path.join(self.root, key)
+        tmp_dir = f"{frame_dir}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        try:
+            extract_frames(video_path, tmp_dir, step=params["step"], size=size, fmt=fmt, workers=self.workers,
+                           progress=progress)
+        except BaseException:
+            # Failed or cancelled (JobCancelled): drop the partial extraction
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        meta = {"video": digest, "params": params, "bytes": _dir_size(tmp_dir)}
+        with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+            json.dump(meta, f)
+        shutil.rmtree(frame_dir, ignore_errors=True)
+        os.replace(tmp_dir, frame_dir)
+        self._touch(key, meta)
+
+        self.evict(keep=key)
+        return frame_dir
+
+    def evict(self, keep=None):
+        """Drop least-recently-used entries until the cache fits its budget."""
+        entries = sorted(self._entries(), key=lambda e: e[1].get("last_used", 0))
+        total = sum(meta.get("bytes", 0) for _, meta in entries)
+        for key, meta in entries:
+            if total <= self.budget_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+            total -= meta.get("bytes", 0)
+            print(f"[INFO] Evicted cached frames {key} ({meta.get('bytes', 0) / 1e6:.1f} MB)")
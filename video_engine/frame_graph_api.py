@@ -1,14 +1,292 @@
+import bisect
+import math
 import os
+import re
 
+import numpy as np
+
+from core import tracing
+
+from .frame_features import compute_features, knn_graph
+from .frame_index import FrameIndex, has_frame_index
+from .frame_store import FrameStore, is_frame_store
+
+_FRAME_NUMBER_RE = re.compile(r"(\d+)")
+_FRAME_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+SEMANTIC_CACHE_FILE = "semantic_graph.npz"
+DEFAULT_NEIGHBORS = 8
+
+# How strongly each pace rewards visual continuity (negative favours contrast)
+# and penalises straying from the intent's nominal step.
+_PACE_WEIGHTS = {
+    "slow": {"similarity": 1.0, "gap": 0.6},
+    "medium": {"similarity": 0.4, "gap": 0.4},
+    "fast": {"similarity": -0.5, "gap": 0.2},
+}
+
+
+@tracing.traced("build_frame_graph")
 def build_frame_graph(frame_dir):
-    frames = sorted(os.listdir(frame_dir))
+    # Frame stores are addressed by source frame number rather than file name.
+    if is_frame_store(frame_dir):
+        return FrameStore(frame_dir).frame_numbers.tolist()
+
+    # The manifest written at extraction time is already in frame order.
+    if has_frame_index(frame_dir):
+        with FrameIndex(frame_dir) as index:
+            return index.paths()
+
+    # Fallback: scan for image files (sidecars may live alongside) and order
+    # them numerically, so frame_10 comes after frame_2.
+    frames = [f for f in os.listdir(frame_dir) if f.lower().endswith(_FRAME_EXTENSIONS)]
+    frames.sort(key=lambda f: (frame_number(f) is None, frame_number(f) or 0, f))
     return frames
 
 
-def traverse_frame_graph(frames, intent):
+def frame_number(name):
+    """Return the source frame number encoded in a frame file name, or None."""
+    if isinstance(name, int):
+        return name
+    m = _FRAME_NUMBER_RE.search(name)
+    return int(m.group(1)) if m else None
+
+
+def _stride(numbers, step):
+    """Positions to advance per `step` source frames, given the frames' spacing."""
+    spacing = 1
+    if None not in numbers and len(numbers) > 1:
+        spacing = max(1, int(np.median(np.diff(numbers))))
+    return max(1, round(step / spacing))
+
+
+def _allocate(weights, caps, budget):
+    """Split `budget` picks across items proportionally to `weights`.
+
+    Every non-empty item gets at least one pick when the budget allows, and
+    no item gets more than its `caps` entry.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    caps = np.asarray(caps, dtype=np.int64)
+    counts = np.zeros(len(caps), dtype=np.int64)
+    budget = int(min(budget, caps.sum()))
+
+    nonempty = np.flatnonzero(caps > 0)
+    if budget < len(nonempty):
+        counts[nonempty[np.argsort(-weights[nonempty], kind="stable")[:budget]]] = 1
+        return counts
+    counts[nonempty] = 1
+
+    remaining = budget - int(counts.sum())
+    while remaining > 0:
+        room = caps - counts
+        active = room > 0
+        share = np.zeros(len(caps))
+        share[active] = weights[active] / weights[active].sum() * remaining
+        add = np.minimum(np.floor(share).astype(np.int64), room)
+        if not add.any():
+            top = np.argsort(-share, kind="stable")[:remaining]
+            add[top[active[top]]] = 1
+        counts += add
+        remaining -= int(add.sum())
+    return counts
+
+
+def group_shots(shots, scene_count: int):
+    """Group consecutive shots into `scene_count` scenes of similar length.
+
+    Returns a list of scenes, each a list of shot dicts. When there are fewer
+    shots than scenes, the longest shots are split so the counts match.
+    """
+    shots = [dict(shot) for shot in shots]
+    if not shots or scene_count <= 0:
+        return [shots] if shots else []
+
+    while len(shots) < scene_count:
+        longest = max(range(len(shots)), key=lambda i: shots[i]["end"] - shots[i]["start"])
+        shot = shots[longest]
+        if shot["end"] - shot["start"] < 2:
+            break
+        middle = (shot["start"] + shot["end"]) // 2
+        shots[longest:longest + 1] = [dict(shot, end=middle), {"start": middle, "end": shot["end"], "score": 0.0}]
+
+    ends = np.cumsum([shot["end"] - shot["start"] for shot in shots])
+    bounds = [0]
+    for i in range(1, scene_count):
+        target = ends[-1] * i / scene_count
+        cut = int(np.argmin(np.abs(ends[:-1] - target))) + 1 if len(shots) > 1 else 0
+        if cut > bounds[-1]:
+            bounds.append(cut)
+    bounds.append(len(shots))
+    return [shots[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def _traverse_shots(frames, numbers, intent, shots, scene_count):
+    """Sample the frame path shot by shot, giving each screenplay scene equal time."""
+    order = sorted(range(len(frames)), key=lambda i: numbers[i])
+    frames = [frames[i] for i in order]
+    numbers = [numbers[i] for i in order]
+    target = math.ceil(len(frames) / _stride(numbers, intent["step"]))
+
+    scenes = group_shots(shots, scene_count) if scene_count else [[shot] for shot in shots]
+
+    def span(shot):
+        return bisect.bisect_left(numbers, shot["start"]), bisect.bisect_left(numbers, shot["end"])
+
+    scene_sizes = [sum(b - a for a, b in map(span, scene)) for scene in scenes]
+    scene_budgets = _allocate([1] * len(scenes), scene_sizes, target)
+
+    selected_path = []
+    for scene, budget in zip(scenes, scene_budgets):
+        spans = [span(shot) for shot in scene]
+        sizes = [b - a for a, b in spans]
+        for (a, b), count in zip(spans, _allocate(sizes, sizes, budget)):
+            # Evenly spaced, always starting on the shot's first frame
+            selected_path.extend(frames[a + (i * (b - a)) // count] for i in range(count))
+    return selected_path
+
+
+class FrameGraph:
+    """k-nearest-neighbour similarity graph over per-frame descriptors.
+
+    `frames` are the entries returned by `build_frame_graph`; `features` holds
+    the arrays from `frame_features.compute_features` and
+    `neighbors`/`similarity` the `(N, k)` adjacency.
+    """
+
+    def __init__(self, frames, features, neighbors, similarity):
+        self.frames = list(frames)
+        self.features = features
+        self.neighbors = neighbors
+        self.similarity = similarity
+
+    def __len__(self):
+        return len(self.frames)
+
+    def _preference(self, intent):
+        """Per-frame bonus for frames that suit the intent's mood and grade."""
+        def z(values):
+            return (values - values.mean()) / (values.std() + 1e-6)
+
+        pref = np.zeros(len(self), dtype=np.float32)
+        if not len(self):
+            return pref
+        if intent.get("mood") == "dramatic":
+            pref += z(self.features["edge_energy"])
+        grade = intent.get("color_grade")
+        if grade == "bright":
+            pref += z(self.features["brightness"]) + 0.5 * z(self.features["saturation"])
+        elif grade == "dark":
+            pref -= z(self.features["brightness"])
+        return pref
+
+    def walk(self, intent):
+        """Walk forward through the graph, returning an intent-shaped frame path.
+
+        The path has as many frames as a plain `step` traversal. Each hop picks
+        among the next `2 * stride` frames and any kNN neighbours up to
+        `4 * stride` ahead, scoring similarity to the current frame (by pace),
+        mood/grade preference and distance from the nominal stride.
+        """
+        count = len(self)
+        if not count:
+            return []
+
+        stride = _stride([frame_number(f) for f in self.frames], intent["step"])
+        target = math.ceil(count / stride)
+
+        weights = _PACE_WEIGHTS.get(intent.get("pace"), _PACE_WEIGHTS["medium"])
+        preference = self._preference(intent)
+        descriptor = self.features["descriptor"]
+
+        path = [0]
+        cur = 0
+        while len(path) < target:
+            remaining = target - len(path)
+            hi = count - remaining
+            window = np.arange(cur + 1, min(cur + 2 * stride, hi) + 1)
+            jumps = self.neighbors[cur]
+            jumps = jumps[(jumps > cur) & (jumps <= min(cur + 4 * stride, hi))]
+            candidates = np.union1d(window, jumps)
+            if not len(candidates):
+                break
+
+            score = (weights["similarity"] * (descriptor[candidates] @ descriptor[cur])
+                     + 0.5 * preference[candidates]
+                     - weights["gap"] * np.abs(candidates - cur - stride) / stride)
+            cur = int(candidates[int(np.argmax(score))])
+            path.append(cur)
+
+        return [self.frames[i] for i in path]
+
+
+def build_semantic_graph(frame_dir, frames=None, k: int = DEFAULT_NEIGHBORS, video_digest: str = None):
+    """Build (or load from `frame_dir`) the semantic graph for `frames`.
+
+    Features and adjacency are cached in `SEMANTIC_CACHE_FILE` next to the
+    frames and reused while the frame list, `k` and the source video's
+    `video_digest` are unchanged (pass it when `frame_dir` is reused across
+    videos).
+    """
+    if frames is None:
+        frames = build_frame_graph(frame_dir)
+    # The walk is temporal, so order by source frame number when it is known
+    if None not in [frame_number(f) for f in frames]:
+        frames = sorted(frames, key=frame_number)
+    keys = np.asarray([str(f) for f in frames])
+    cache_path = os.path.join(frame_dir, SEMANTIC_CACHE_FILE)
+
+    try:
+        with np.load(cache_path) as cached:
+            if (int(cached["k"]) == k and str(cached["video"]) == (video_digest or "")
+                    and np.array_equal(cached["frames"], keys)):
+                features = {name: cached[name] for name in ("descriptor", "brightness", "saturation", "edge_energy")}
+                return FrameGraph(frames, features, cached["neighbors"], cached["similarity"])
+    except (OSError, KeyError, ValueError):
+        pass
+
+    features = compute_features(frame_dir, frames)
+    neighbors, similarity = knn_graph(features["descriptor"], k=k)
+    try:
+        np.savez(cache_path, frames=keys, k=k, video=video_digest or "", neighbors=neighbors, similarity=similarity, **features)
+    except OSError as exc:
+        print(f"[WARN] Could not cache semantic graph: {exc}")
+    return FrameGraph(frames, features, neighbors, similarity)
+
+
+@tracing.traced("traverse_frame_graph")
+def traverse_frame_graph(frames, intent, graph=None, shots=None, scene_count=None):
+    """Select the ordered frame path for `intent`.
+
+    With a semantic `graph` the path comes from `FrameGraph.walk`. With a shot
+    table (see `shot_detector.load_shots`) frames are sampled per shot, and
+    `scene_count` groups shots into that many equally weighted scenes, e.g.
+    to match the screenplay. Otherwise every `step`-th source frame is kept.
+    """
+    if graph is not None:
+        return graph.walk(intent)
+
     step = intent["step"]
 
-    # MVP logic: intent-driven traversal
-    selected_path = frames[::step]
+    # MVP logic: intent-driven traversal. Select by source frame number so a
+    # step-aware extraction (which only wrote the kept frames) yields the same
+    # path as a full one.
+    numbers = [frame_number(f) for f in frames]
+    if None in numbers:
+        return frames[::step]
+
+    if shots:
+        return _traverse_shots(frames, numbers, intent, shots, scene_count)
+
+    selected_path = [f for f, n in zip(frames, numbers) if n % step == 0]
 
     return selected_path
+
+
+def iter_frame_path(frames, intent):
+    """Lazy counterpart of `traverse_frame_graph` for `(frame_id, frame)` pairs.
+
+    Works on generators (e.g. decoded frames streaming out of
+    `extract_frames.iter_frames`) so selection never materialises the input.
+    """
+    step = intent["step"]
+    return (item for item in frames if item[0] % step == 0)
@@ -0,0 +1,72 @@
+import os
+import sqlite3
+
+
+INDEX_FILE = "index.sqlite"
+
+
+def has_frame_index(frame_dir) -> bool:
+    return os.path.isfile(os.path.join(frame_dir, INDEX_FILE))
+
+
+class FrameIndex:
+    """SQLite manifest of extracted frames: number -> path, offset, timestamp, size.
+
+    Written once by `extract_frames`; afterwards lookups by frame number
+    (primary key) or timestamp (indexed) never touch the frame directory.
+    `path` is relative to the frame dir; `offset` is the byte offset inside
+    `path` (0 for one-image-per-frame directories).
+    """
+
+    def __init__(self, frame_dir):
+        self.frame_dir = frame_dir
+        self.conn = sqlite3.connect(os.path.join(frame_dir, INDEX_FILE))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS frames ("
+            "n INTEGER PRIMARY KEY, path TEXT NOT NULL, offset INTEGER NOT NULL, "
+            "ts REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS frames_ts ON frames (ts)")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, rows):
+        """Replace the manifest with `(n, path, offset, ts, size)` rows."""
+        with self.conn:
+            self.conn.execute("DELETE FROM frames")
+            self.conn.executemany("INSERT INTO frames VALUES (?, ?, ?, ?, ?)", rows)
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM frames").fetchone()[0]
+
+    def frame_numbers(self):
+        return [row[0] for row in self.conn.execute("SELECT n FROM frames ORDER BY n")]
+
+    def paths(self):
+        """Frame paths ordered by frame number."""
+        return [row[0] for row in self.conn.execute("SELECT path FROM frames ORDER BY n")]
+
+    def lookup(self, n: int):
+        """Return `{"n", "path", "offset", "ts", "size"}` for frame `n`, or None."""
+        row = self.conn.execute("SELECT n, path, offset, ts, size FROM frames WHERE n = ?", (n,)).fetchone()
+        return self._row(row)
+
+    def at_time(self, ts: float):
+        """Return the last frame shown at or before `ts` seconds, or None."""
+        row = self.conn.execute(
+            "SELECT n, path, offset, ts, size FROM frames WHERE ts <= ? ORDER BY ts DESC LIMIT 1", (ts,)
+        ).fetchone()
+        return self._row(row)
+
+    @staticmethod
+    def _row(row):
+        if row is None:
+            return None
+        return dict(zip(("n", "path", "offset", "ts", "size"), row))
@@ -0,0 +1,106 @@
+import collections
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from .frame_index import FrameIndex, has_frame_index
+from .frame_store import FrameStore, is_frame_store
+
+
+DEFAULT_PREFETCH = 32
+
+# Decode-time downscale flags: libjpeg scales by 1/2, 1/4 or 1/8 while decoding,
+# which is much cheaper than a full decode followed by a resize.
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+_JPEG_EOI = b"\xff\xd9"
+
+
+def _result(position, frame, path, status, image=None, error=None):
+    return {"position": position, "frame": frame, "path": path, "status": status, "image": image, "error": error}
+
+
+def _decode_file(position, frame, path, reduce=1):
+    """Read and decode one image file, validating it in the same pass."""
+    try:
+        data = np.fromfile(path, dtype=np.uint8)
+    except OSError as exc:
+        return _result(position, frame, path, "missing", error=str(exc))
+    if path.lower().endswith((".jpg", ".jpeg")) and data[-2:].tobytes() != _JPEG_EOI:
+        return _result(position, frame, path, "corrupt", error="truncated JPEG (no end-of-image marker)")
+
+    image = cv2.imdecode(data, _REDUCED_FLAGS[reduce])
+    if image is None:
+        return _result(position, frame, path, "corrupt", error="undecodable image data")
+    return _result(position, frame, path, "ok", image=cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
+
+def _decode_store(store, position, frame, reduce=1):
+    try:
+        image = store.proxy(store.position(frame)) if reduce > 1 else store.frame(frame)
+    except (KeyError, TypeError) as exc:
+        return _result(position, frame, store.path, "missing", error=str(exc))
+    return _result(position, frame, store.path, "ok", image=cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
+
+def load_frames(frame_dir, frame_path, workers: int = None, prefetch: int = DEFAULT_PREFETCH,
+                reduce: int = 1):
+    """Yield one result dict per entry of `frame_path`, in order.
+
+    Each frame is read and decoded exactly once on a thread pool that runs up
+    to `prefetch` frames ahead of the consumer. Results carry `status`
+    ("ok", "missing", "corrupt" or "mismatch" for a frame whose size differs
+    from the first good one) and, when ok, the RGB `image`.
+
+    `frame_dir` may be an image directory (entries are file names, or frame
+    numbers resolved through the extraction manifest) or a frame store.
+    `reduce` (2, 4 or 8) loads preview-sized frames: images are downscaled
+    while decoding and frame stores serve their proxy plane.
+    """
+    if reduce not in _REDUCED_FLAGS:
+        raise ValueError(f"reduce must be one of {sorted(_REDUCED_FLAGS)}, got {reduce}")
+    frame_path = list(frame_path)
+    store = FrameStore(frame_dir) if is_frame_store(frame_dir) else None
+    paths = None
+    if store is None:
+        names = frame_path
+        if has_frame_index(frame_dir) and any(isinstance(f, int) for f in frame_path):
+            with FrameIndex(frame_dir) as index:
+                rows = [index.lookup(f) if isinstance(f, int) else None for f in frame_path]
+            names = [row["path"] if row else f for f, row in zip(frame_path, rows)]
+        paths = [os.path.join(frame_dir, str(name)) for name in names]
+
+    def task(position):
+        if store is not None:
+            return _decode_store(store, position, frame_path[position], reduce)
+        return _decode_file(position, frame_path[position], paths[position], reduce)
+
+    shape = None
+    pending = collections.deque()
+    with ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1)) as pool:
+        positions = iter(range(len(frame_path)))
+        for position in positions:
+            pending.append(pool.submit(task, position))
+            if len(pending) >= prefetch:
+                break
+
+        while pending:
+            result = pending.popleft().result()
+            next_position = next(positions, None)
+            if next_position is not None:
+                pending.append(pool.submit(task, next_position))
+
+            if result["status"] == "ok":
+                if shape is None:
+                    shape = result["image"].shape
+                elif result["image"].shape != shape:
+                    result = _result(result["position"], result["frame"], result["path"], "mismatch",
+                                     error=f"size {result['image'].shape} differs from {shape}")
+            yield result
@@ -0,0 +1,182 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+
+STORE_FORMAT = "store"
+HEADER_FILE = "store.json"
+INDEX_FILE = "frames.npy"
+STORE_VERSION = 1
+DEFAULT_CHUNK_FRAMES = 256
+DEFAULT_PROXY_WIDTH = 320
+
+
+def is_frame_store(path) -> bool:
+    return os.path.isfile(os.path.join(path, HEADER_FILE))
+
+
+class FrameStoreWriter:
+    """Append frames to raw chunk files of a frame store.
+
+    Each chunk holds up to `chunk_frames` frames back to back as raw uint8
+    arrays; a second, optional plane holds `proxy_width`-wide copies. Several
+    writers with distinct `prefix`es can fill the same directory (one per
+    extraction segment); `close()` returns the part description that
+    `write_store_header` merges into the final header.
+    """
+
+    def __init__(self, path, chunk_frames: int = DEFAULT_CHUNK_FRAMES,
+                 proxy_width: int = DEFAULT_PROXY_WIDTH, prefix: str = "chunk"):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.proxy_width = proxy_width
+        self.prefix = prefix
+        self.shape = None
+        self.proxy_shape = None
+        self.chunks = []
+        self.frame_numbers = []
+        self._file = None
+        self._proxy_file = None
+
+    def _open_chunk(self):
+        self._close_chunk()
+        name = f"{self.prefix}_{len(self.chunks):05d}"
+        chunk = {"file": f"{name}.bin", "count": 0}
+        self._file = open(os.path.join(self.path, chunk["file"]), "wb")
+        if self.proxy_shape:
+            chunk["proxy_file"] = f"{name}.proxy.bin"
+            self._proxy_file = open(os.path.join(self.path, chunk["proxy_file"]), "wb")
+        self.chunks.append(chunk)
+
+    def _close_chunk(self):
+        for f in (self._file, self._proxy_file):
+            if f is not None:
+                f.close()
+        self._file = self._proxy_file = None
+
+    def append(self, frame_id: int, frame):
+        """Store `frame`; returns its `(chunk file, byte offset, size)`."""
+        if self.shape is None:
+            self.shape = list(frame.shape)
+            if self.proxy_width and frame.shape[1] > self.proxy_width:
+                proxy_height = max(1, round(frame.shape[0] * self.proxy_width / frame.shape[1]))
+                self.proxy_shape = [proxy_height, self.proxy_width, frame.shape[2]]
+        elif list(frame.shape) != self.shape:
+            raise ValueError(f"Frame {frame_id} has shape {frame.shape}, store expects {tuple(self.shape)}")
+
+        if self._file is None or self.chunks[-1]["count"] >= self.chunk_frames:
+            self._open_chunk()
+
+        data = np.ascontiguousarray(frame, dtype=np.uint8)
+        location = (self.chunks[-1]["file"], self.chunks[-1]["count"] * data.nbytes, data.nbytes)
+        self._file.write(data.data)
+        if self._proxy_file is not None:
+            proxy = cv2.resize(frame, (self.proxy_shape[1], self.proxy_shape[0]), interpolation=cv2.INTER_AREA)
+            self._proxy_file.write(proxy.data)
+        self.chunks[-1]["count"] += 1
+        self.frame_numbers.append(frame_id)
+        return location
+
+    def close(self) -> dict:
+        self._close_chunk()
+        return {
+            "shape": self.shape,
+            "proxy_shape": self.proxy_shape,
+            "chunks": self.chunks,
+            "frame_numbers": self.frame_numbers,
+        }
+
+
+def write_store_header(path, parts, fps: float = 0.0):
+    """Merge writer parts (in frame order) into the store header and frame index."""
+    parts = [p for p in parts if p["chunks"]]
+    shape = parts[0]["shape"] if parts else None
+    proxy_shape = parts[0]["proxy_shape"] if parts else None
+    chunks, frame_numbers = [], []
+    for part in parts:
+        if part["shape"] != shape:
+            raise ValueError("All store parts must share the same frame shape")
+        chunks.extend(part["chunks"])
+        frame_numbers.extend(part["frame_numbers"])
+
+    np.save(os.path.join(path, INDEX_FILE), np.asarray(frame_numbers, dtype=np.int64))
+    header = {
+        "version": STORE_VERSION,
+        "dtype": "uint8",
+        "shape": shape,
+        "proxy_shape": proxy_shape,
+        "fps": fps,
+        "count": len(frame_numbers),
+        "chunks": chunks,
+    }
+    with open(os.path.join(path, HEADER_FILE), "w") as f:
+        json.dump(header, f)
+    return header
+
+
+class FrameStore:
+    """Read-only, memory-mapped view of a frame store written by `FrameStoreWriter`.
+
+    `store[i]` returns the i-th stored frame (BGR, as decoded) as a zero-copy
+    view into the mapped chunk; `store.frame(n)` looks a frame up by its source
+    frame number and `store.proxy(i)` reads the low-resolution plane.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, HEADER_FILE), "r") as f:
+            self.header = json.load(f)
+        if self.header.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported frame store version: {self.header.get('version')}")
+
+        self.fps = self.header["fps"]
+        self.shape = tuple(self.header["shape"] or ())
+        proxy_shape = self.header.get("proxy_shape")
+        self.proxy_shape = tuple(proxy_shape) if proxy_shape else None
+        self.frame_numbers = np.load(os.path.join(path, INDEX_FILE))
+
+        counts = [c["count"] for c in self.header["chunks"]]
+        self._offsets = np.cumsum([0] + counts)
+        self._maps = [None] * len(counts)
+        self._proxy_maps = [None] * len(counts)
+
+    def __len__(self):
+        return int(self.header["count"])
+
+    def _locate(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"Frame index {i} out of range")
+        chunk = int(np.searchsorted(self._offsets, i, side="right")) - 1
+        return chunk, i - int(self._offsets[chunk])
+
+    def _map(self, maps, chunk, key, shape):
+        if maps[chunk] is None:
+            info = self.header["chunks"][chunk]
+            maps[chunk] = np.memmap(os.path.join(self.path, info[key]), dtype=np.uint8, mode="r",
+                                    shape=(info["count"], *shape))
+        return maps[chunk]
+
+    def __getitem__(self, i):
+        chunk, offset = self._locate(i)
+        return self._map(self._maps, chunk, "file", self.shape)[offset]
+
+    def proxy(self, i):
+        if not self.proxy_shape:
+            return self[i]
+        chunk, offset = self._locate(i)
+        return self._map(self._proxy_maps, chunk, "proxy_file", self.proxy_shape)[offset]
+
+    def position(self, frame_number: int) -> int:
+        """Return the store index holding source frame `frame_number`."""
+        i = int(np.searchsorted(self.frame_numbers, frame_number))
+        if i >= len(self) or self.frame_numbers[i] != frame_number:
+            raise KeyError(f"Frame {frame_number} is not in the store")
+        return i
+
+    def frame(self, frame_number: int):
+        return self[self.position(frame_number)]
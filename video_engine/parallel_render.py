@@ -0,0 +1,171 @@
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .color_grade import grader_for
+from .encoders import _ffmpeg_exe, encode_frames, encoder_options, rendition_paths
+from .frame_loader import load_frames
+from .shot_detector import load_shots
+from .transitions import TransitionEngine, shot_cuts, transition_for
+
+
+# Keyframe interval used for chunked renders when the intent sets no `gop`, in seconds
+DEFAULT_GOP_SECONDS = 2
+# Chunks per worker: more than one keeps every worker busy when chunks finish unevenly
+CHUNKS_PER_WORKER = 2
+# Chunks are MP4: each starts at timestamp zero, so the concat demuxer lays them
+# end to end at exactly one frame duration apart
+CHUNK_EXT = ".mp4"
+# Chunk workers start from a fresh interpreter: forking a parent that runs
+# other threads (the LLM pool, loader read-ahead, a web server) can leave a
+# lock held in the child and hang it
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def plan_chunks(total: int, gop: int, workers: int, cuts=None, window=None):
+    """Split `[0, total)` into ranges whose lengths are whole GOPs (the last may be shorter).
+
+    With `cuts` (a flag per position) and a transition `window` (`(before,
+    after)`, see `TransitionEngine.window`), a chunk that would start inside
+    a transition starts right after it instead, so no transition is split.
+    """
+    if total <= 0:
+        return []
+    gops = -(-total // gop)
+    per_chunk = max(1, -(-gops // (workers * CHUNKS_PER_WORKER))) * gop
+    starts = list(range(0, total, per_chunk))
+    if cuts and window is not None:
+        before, after = window
+        blocked = {}
+        for position, cut in enumerate(cuts):
+            if cut:
+                for blocked_start in range(max(1, position - before), position + after + 1):
+                    blocked[blocked_start] = position + after + 1
+        shifted = [0]
+        for start in starts[1:]:
+            while start in blocked:
+                start = blocked[start]
+            if shifted[-1] < start < total:
+                shifted.append(start)
+        starts = shifted
+    return list(zip(starts, starts[1:] + [total]))
+
+
+def _encode_chunk(args):
+    frame_dir, frame_path, output_path, fps, intent, shape, cuts = args
+    skipped = []
+    grader = grader_for(intent)
+    transitions = TransitionEngine(*transition_for(intent))
+
+    def valid_frames():
+        # The first frame of a chunk never opens a transition: its shot started in the chunk before
+        cut = False
+        for result in load_frames(frame_dir, frame_path):
+            cut = cut or (cuts[result["position"]] and result["position"] > 0)
+            if result["status"] == "ok" and result["image"].shape != shape:
+                result = dict(result, status="mismatch", image=None,
+                              error=f"size {result['image'].shape} differs from {shape}")
+            if result["status"] == "ok":
+                if grader is not None:
+                    grader.apply(result["image"], out=result["image"])
+                yield cut, result["image"]
+                cut = False
+            else:
+                skipped.append({k: result[k] for k in ("frame", "path", "status", "error")})
+
+    count, paths = encode_frames(transitions.apply(valid_frames()), output_path, fps, intent)
+    return {"frames_written": count, "renditions": paths, "skipped": skipped}
+
+
+def concat_chunks(chunk_paths, output_path):
+    """Join encoded chunks into `output_path` with ffmpeg's concat demuxer (stream copy)."""
+    list_path = f"{output_path}.concat.txt"
+    with open(list_path, "w") as f:
+        for path in chunk_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    cmd = [_ffmpeg_exe(), "-y", "-hide_banner", "-loglevel", "error", "-f", "concat", "-safe", "0",
+           "-i", list_path, "-c", "copy", "-movflags", "+faststart", output_path]
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    finally:
+        os.remove(list_path)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg concat exited with status {proc.returncode}: "
+                           f"{proc.stderr.decode('utf-8', errors='replace').strip()}")
+
+
+def first_frame_shape(frame_dir, frame_path):
+    """Shape of the first readable frame of `frame_path`, or None."""
+    for result in load_frames(frame_dir, frame_path, prefetch=4):
+        if result["status"] == "ok":
+            return result["image"].shape
+    return None
+
+
+def render_chunked(frame_dir, frame_path, output_path, fps, intent, progress=None) -> dict:
+    """Encode `frame_path` as GOP-aligned chunks on a process pool, then concatenate them.
+
+    Every chunk is a separate ffmpeg encode with keyframes fixed every `gop`
+    frames and chunk lengths a whole number of GOPs, so the joined stream has
+    the same keyframe layout as a single encode with that `gop`; the joins
+    are stream copies, nothing is encoded twice. Frames whose size differs
+    from the first readable one are skipped as "mismatch", as on the serial
+    path. Chunk starts are moved out of shot transitions, so every
+    transition is blended within one chunk. Each worker gets an equal share
+    of the CPU threads unless the intent sets `threads`.
+
+    Returns the same report as `regenerate_api._render`; `progress(done,
+    total)` is called as chunks finish.
+    """
+    options = encoder_options(intent)
+    frame_path = list(frame_path)
+    total = len(frame_path)
+    report = {"output_path": output_path, "renditions": {}, "frames_written": 0, "skipped": []}
+    shape = first_frame_shape(frame_dir, frame_path)
+    if shape is None:
+        report["skipped"] = [{"frame": f, "path": None, "status": "missing", "error": "no readable frame"}
+                             for f in frame_path]
+        return report
+
+    gop = int(options["gop"] or max(1, round(fps * DEFAULT_GOP_SECONDS)))
+    workers = options["workers"]
+    chunk_intent = dict(intent, encoder="ffmpeg", gop=gop, render_workers=1,
+                        threads=options["threads"] or max(1, (os.cpu_count() or 1) // workers))
+    transitions = TransitionEngine(*transition_for(intent))
+    cuts = shot_cuts(frame_path, load_shots(frame_dir)) if transitions.kind != "cut" else [False] * total
+    chunks = plan_chunks(total, gop, workers, cuts, transitions.window())
+
+    tmp_dir = tempfile.mkdtemp(prefix="chunks_", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        jobs = [(frame_dir, frame_path[start:stop], os.path.join(tmp_dir, f"chunk_{i:04d}{CHUNK_EXT}"),
+                 fps, chunk_intent, shape, cuts[start:stop]) for i, (start, stop) in enumerate(chunks)]
+        results = [None] * len(jobs)
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(jobs)),
+                                   mp_context=multiprocessing.get_context(START_METHOD))
+        try:
+            futures = {pool.submit(_encode_chunk, job): i for i, job in enumerate(jobs)}
+            done = 0
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                done += chunks[i][1] - chunks[i][0]
+                if progress is not None:
+                    progress(done, total)
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+        for result in results:
+            report["frames_written"] += result["frames_written"]
+            report["skipped"].extend(result["skipped"])
+        paths = rendition_paths(output_path, options["renditions"])
+        for name, path in paths.items():
+            concat_chunks([r["renditions"][name] for r in results if r["frames_written"]], path)
+        report["renditions"] = paths
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    print(f"[INFO] Encoded {report['frames_written']} frames as {len(chunks)} chunks on {workers} workers")
+    return report
@@ -1,38 +1,128 @@
-from moviepy.editor import ImageSequenceClip
-from PIL import Image
 import os
 
+from core import tracing
 
-def regenerate_video(frame_dir, frame_path, output_path, intent):
-    """Assemble a video from frames locally using `intent` for parameters.
+from .frame_loader import load_frames
+from .color_grade import grader_for
+from .encoders import encode_frames, encoder_options
+from .parallel_render import render_chunked
+from .shot_detector import load_shots
+from .transitions import TransitionEngine, shot_cuts, transition_for
 
-    `intent` is expected to be a dict produced by `core.intent_engine.interpret_intent`.
-    """
-    images = [os.path.join(frame_dir, f) for f in frame_path]
-
-    # Filter out corrupted frames
-    valid_images = []
-    for img_path in images:
-        try:
-            with Image.open(img_path) as img:
-                img.verify()
-            valid_images.append(img_path)
-        except Exception as e:
-            print(f"[WARN] Skipping corrupted frame: {img_path} ({str(e)})")
-
-    if not valid_images:
-        print("[ERROR] No valid frames found!")
-        return
 
-    print(f"[INFO] Using {len(valid_images)} valid frames (skipped {len(images) - len(valid_images)})")
+PROXY_REDUCE = 4
+PROXY_ENCODER = {"encoder": "ffmpeg", "preset": "ultrafast", "crf": 32, "renditions": ["full"]}
 
+
+def _render(frame_dir, frame_path, output_path, intent, reduce=1, progress=None):
     fps = None
     if isinstance(intent, dict):
         fps = intent.get("fps")
     if not fps:
         fps = 24
 
-    clip = ImageSequenceClip(valid_images, fps=fps)
-    clip.write_videofile(output_path, codec="libx264", verbose=False, logger=None)
+    frame_path = list(frame_path)
+    total = len(frame_path)
+    if encoder_options(intent)["workers"] > 1 and reduce == 1 and total:
+        report = render_chunked(frame_dir, frame_path, output_path, fps, intent, progress=progress)
+        _count_render(report)
+        return report
+
+    report = {"output_path": output_path, "renditions": {}, "frames_written": 0, "skipped": []}
+    grader = grader_for(intent)
+    transitions = TransitionEngine(*transition_for(intent))
+    cuts = shot_cuts(frame_path, load_shots(frame_dir)) if transitions.kind != "cut" else [False] * total
+
+    consumed = [0]
+
+    def valid_frames():
+        # A cut on a skipped frame moves to the next good one
+        cut = False
+        for result in load_frames(frame_dir, frame_path, reduce=reduce):
+            consumed[0] = result["position"] + 1
+            cut = cut or cuts[result["position"]]
+            if result["status"] == "ok":
+                if grader is not None:
+                    grader.apply(result["image"], out=result["image"])
+                yield cut, result["image"]
+                cut = False
+            else:
+                report["skipped"].append({k: result[k] for k in ("frame", "path", "status", "error")})
+
+    # Transitions add or drop frames, so progress follows the frame path, not the encoded count
+    encoded = (lambda count: progress(consumed[0], total)) if progress is not None else None
+    report["frames_written"], report["renditions"] = encode_frames(transitions.apply(valid_frames()), output_path,
+                                                                   fps, intent, progress=encoded)
+    _count_render(report)
+    return report
+
+
+def _count_render(report):
+    tracing.count("frames_encoded", report["frames_written"])
+    tracing.count("render_bytes_written", sum(os.path.getsize(path) for path in report["renditions"].values()
+                                              if os.path.exists(path)))
+
+
+@tracing.traced("regenerate_video")
+def regenerate_video(frame_dir, frame_path, output_path, intent, progress=None):
+    """Assemble a video from frames locally using `intent` for parameters.
+
+    `intent` is expected to be a dict produced by `core.intent_engine.interpret_intent`.
+    `frame_path` entries are file names, or source frame numbers when
+    `frame_dir` has an extraction manifest. `frame_dir` may also be a frame
+    store, in which case frames are read straight from the mapped chunks.
+
+    Frames are decoded once, validated during that decode and prefetched on a
+    thread pool ahead of the encoder. The encoder backend, its settings and
+    the renditions to produce come from `intent` (see
+    `encoders.encoder_options`); `intent["encoder"] = "ffmpeg"` pipes raw frames
+    into one ffmpeg process that can write full, 720p and 9:16 reel outputs.
+    With `intent["render_workers"] > 1` the frame path is encoded as
+    GOP-aligned chunks on that many processes and joined without
+    re-encoding (see `parallel_render.render_chunked`). Frames are colour
+    graded in place from the intent's `color_grade`/`mood` or `lut` file
+    (see `color_grade.grader_for`). Shot changes in the path (from the shot
+    table next to the frames) get the intent's transition (see
+    `transitions.transition_for`); `frames_written` counts the frames
+    actually encoded, blends included.
+
+    Returns a report dict with `output_path`, `renditions` (name -> path),
+    `frames_written` and `skipped`, the loader results (frame, path, status,
+    error) of every frame left out.
+
+    `progress(done, total)` is called after each frame is encoded, with the
+    number of `frame_path` entries consumed so far; an exception raised from
+    it stops the render.
+    """
+    report = _render(frame_dir, frame_path, output_path, intent, progress=progress)
+
+    if not report["frames_written"]:
+        print("[ERROR] No valid frames found!")
+        return report
+
+    print(f"[INFO] Video regenerated at {output_path} "
+          f"({report['frames_written']} frames, skipped {len(report['skipped'])})")
+    return report
+
+
+@tracing.traced("render_proxy")
+def render_proxy(frame_dir, frame_path, output_path, intent, reduce: int = PROXY_REDUCE):
+    """Render a quick low-resolution preview of `frame_path`.
+
+    Frames come from the same extracted frames as the full render, downscaled
+    by `reduce` while decoding (or from the proxy plane of a frame store), and
+    are encoded with ffmpeg's `ultrafast` preset to a single output. Returns
+    the same report dict as `regenerate_video`.
+    """
+    proxy_intent = dict(intent) if isinstance(intent, dict) else {}
+    proxy_intent.update(PROXY_ENCODER)
+    report = _render(frame_dir, frame_path, output_path, proxy_intent, reduce=reduce)
+    if report["frames_written"]:
+        print(f"[INFO] Proxy preview at {output_path} ({report['frames_written']} frames)")
+    return report
+
 
-    print(f"[INFO] Video regenerated at {output_path}")
+def proxy_path(output_path) -> str:
+    """Preview file name next to `output_path`."""
+    stem, ext = os.path.splitext(output_path)
+    return f"{stem}_proxy{ext}"
@@ -0,0 +1,197 @@
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+
+from core import tracing
+
+from .encoders import encoder_options
+from .regenerate_api import regenerate_video
+
+
+DEFAULT_BUDGET_BYTES = 2 * 1024 ** 3
+INDEX_FILE = "index.sqlite"
+# Intent fields besides fps and the encoder settings that change the rendered pixels
+# (the style picks the default transition)
+GRADING_KEYS = ("color_grade", "mood", "transitions", "transition_frames", "style")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS renders (
+    key TEXT PRIMARY KEY,
+    report TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS renders_last_used ON renders (last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def _file_digest(path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def render_key(video_digest: str, frame_path, output_path: str, intent) -> str:
+    """Key for one render: source video, exact frame list, fps, encoder and grading settings."""
+    intent = intent if isinstance(intent, dict) else {}
+    options = encoder_options(intent)
+    # Thread and worker counts change how fast the encode runs, not what a viewer sees
+    options.pop("threads", None)
+    options.pop("workers", None)
+    payload = json.dumps({
+        "video": video_digest,
+        "frames": list(frame_path),
+        "fps": intent.get("fps") or 24,
+        "encoder": options,
+        "grading": {k: intent.get(k) for k in GRADING_KEYS},
+        # A .cube LUT is keyed by its contents, wherever the upload was saved
+        "lut": _file_digest(intent["lut"]) if intent.get("lut") else None,
+        "ext": os.path.splitext(output_path)[1].lower(),
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class RenderCache:
+    """Finished renders under `root/<key>/`, reused when the same render is asked for again.
+
+    `regenerate(...)` wraps `regenerate_video`: on a hit the stored report
+    (pointing at the cached outputs) is returned without decoding or
+    encoding anything. Least-recently-used renders are evicted once their
+    outputs exceed `budget_bytes`. Hits, misses, evictions and the bytes a
+    hit did not have to encode are counted in the index database, so they
+    add up across render workers.
+    """
+
+    def __init__(self, root, budget_bytes: int = DEFAULT_BUDGET_BYTES):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self.path = os.path.join(root, INDEX_FILE)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _count(conn, name, amount=1):
+        conn.execute("INSERT INTO counters (name, value) VALUES (?, ?) "
+                     "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, amount))
+
+    def lookup(self, key: str):
+        """The stored report for `key` if all its outputs are still on disk, else None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT report, bytes FROM renders WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._count(conn, "misses")
+                return None
+            report = json.loads(row[0])
+            if not all(os.path.exists(path) for path in report["renditions"].values()):
+                conn.execute("DELETE FROM renders WHERE key = ?", (key,))
+                self._count(conn, "misses")
+                return None
+            conn.execute("UPDATE renders SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._count(conn, "hits")
+            self._count(conn, "bytes_saved", row[1])
+        return report
+
+    def contains(self, video_digest, frame_path, output_path, intent) -> bool:
+        """Whether this render is cached (without counting a lookup)."""
+        key = render_key(video_digest, frame_path, output_path, intent)
+        with self._connect() as conn:
+            row = conn.execute("SELECT report FROM renders WHERE key = ?", (key,)).fetchone()
+        return row is not None and all(os.path.exists(p) for p in json.loads(row[0])["renditions"].values())
+
+    def regenerate(self, video_digest, frame_dir, frame_path, output_path, intent, progress=None) -> dict:
+        """`regenerate_video` through the cache; the report gains `cache` ("hit" or "miss").
+
+        Outputs are written inside the cache entry, named after
+        `output_path`; the returned report points at them. Renders that
+        skipped unreadable frames are not stored: their outputs are moved to
+        `output_path` (and the rendition paths derived from it).
+        """
+        frame_path = list(frame_path)
+        key = render_key(video_digest, frame_path, output_path, intent)
+        report = self.lookup(key)
+        if report is not None:
+            tracing.count("render_cache_hits")
+            print(f"[INFO] Render cache hit: {report['output_path']}")
+            if progress is not None:
+                progress(report["frames_written"], len(frame_path))
+            return dict(report, cache="hit")
+        tracing.count("render_cache_misses")
+
+        entry_dir = os.path.join(self.root, key)
+        tmp_dir = f"{entry_dir}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        name = os.path.basename(output_path)
+        try:
+            report = regenerate_video(frame_dir, frame_path, os.path.join(tmp_dir, name), intent, progress=progress)
+        except BaseException:
+            # Failed or cancelled (JobCancelled): nothing of this render is kept
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        if not report["frames_written"] or report["skipped"]:
+            directory = os.path.dirname(output_path)
+            os.makedirs(directory or ".", exist_ok=True)
+            renditions = {}
+            for rendition, path in report["renditions"].items():
+                renditions[rendition] = os.path.join(directory, os.path.basename(path))
+                shutil.move(path, renditions[rendition])
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return dict(report, output_path=output_path, renditions=renditions, cache="miss")
+
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+        report = dict(report, output_path=os.path.join(entry_dir, name),
+                      renditions={r: os.path.join(entry_dir, os.path.basename(p)) for r, p in report["renditions"].items()})
+        size = sum(os.path.getsize(path) for path in report["renditions"].values())
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO renders (key, report, bytes, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                         (key, json.dumps(report), size, now, now))
+        self.evict(keep=key)
+        return dict(report, cache="miss")
+
+    def evict(self, keep=None):
+        """Drop least-recently-used renders until the outputs fit the budget."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT key, bytes FROM renders ORDER BY last_used").fetchall()
+            total = sum(size for _, size in rows)
+            for key, size in rows:
+                if total <= self.budget_bytes:
+                    break
+                if key == keep:
+                    continue
+                conn.execute("DELETE FROM renders WHERE key = ?", (key,))
+                self._count(conn, "evictions")
+                total -= size
+                shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+                print(f"[INFO] Evicted cached render {key} ({size / 1e6:.1f} MB)")
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM renders").fetchone()
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        stats = {"entries": entries, "bytes": size, "budget_bytes": self.budget_bytes}
+        for name in ("hits", "misses", "evictions", "bytes_saved"):
+            stats[name] = counters.get(name, 0)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,105 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+
+SHOTS_FILE = "shots.json"
+DETECT_SIZE = (64, 36)  # (width, height)
+HUE_BINS = 16
+SAT_BINS = 4
+DEFAULT_THRESHOLD = 0.3
+DEFAULT_MIN_SHOT_FRAMES = 6
+
+
+def frame_signature(frame):
+    """Low-resolution signature of a BGR frame: `(grey thumbnail, HSV histogram)`."""
+    small = cv2.resize(frame, DETECT_SIZE, interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+    bins = (hsv[..., 0].astype(np.int32) * HUE_BINS // 180) * SAT_BINS + hsv[..., 1].astype(np.int32) * SAT_BINS // 256
+    hist = np.bincount(bins.ravel(), minlength=HUE_BINS * SAT_BINS).astype(np.float32)
+    hist /= hist.sum()
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return gray, hist
+
+
+def signature_distance(a, b) -> float:
+    """Cut score in [0, 1]: mean of histogram L1 distance and mean pixel difference."""
+    hist_dist = 0.5 * float(np.abs(a[1] - b[1]).sum())
+    pixel_dist = float(cv2.absdiff(a[0], b[0]).mean()) / 255.0
+    return 0.5 * hist_dist + 0.5 * pixel_dist
+
+
+class ShotDetector:
+    """Single-pass shot-boundary detector fed with frames as they are decoded.
+
+    Call `update(frame_id, frame)` for every decoded frame in order, then
+    `finish()` to get the shot table: a list of `{"start", "end", "score"}`
+    dicts in source frame numbers (`end` exclusive), where `score` is the cut
+    score that opened the shot.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, min_shot_frames: int = DEFAULT_MIN_SHOT_FRAMES):
+        self.threshold = threshold
+        self.min_shot_frames = min_shot_frames
+        self.shots = []
+        self.first_signature = None
+        self.last_signature = None
+        self.last_frame_id = None
+
+    def update(self, frame_id: int, frame):
+        signature = frame_signature(frame)
+        if self.last_signature is None:
+            self.first_signature = signature
+            self.shots.append({"start": frame_id, "end": frame_id + 1, "score": 0.0})
+        else:
+            score = signature_distance(self.last_signature, signature)
+            current = self.shots[-1]
+            if score >= self.threshold and frame_id - current["start"] >= self.min_shot_frames:
+                current["end"] = frame_id
+                self.shots.append({"start": frame_id, "end": frame_id + 1, "score": round(score, 4)})
+        self.shots[-1]["end"] = frame_id + 1
+        self.last_signature = signature
+        self.last_frame_id = frame_id
+
+    def finish(self):
+        return self.shots
+
+
+def merge_shot_tables(detectors, threshold: float = DEFAULT_THRESHOLD):
+    """Join the tables of detectors that ran over consecutive frame ranges.
+
+    Adjacent ranges are compared by their boundary frame signatures, so a cut
+    that falls exactly on a range boundary is still reported.
+    """
+    shots = []
+    previous = None
+    for detector in detectors:
+        if not detector.shots:
+            continue
+        table = [dict(shot) for shot in detector.shots]
+        if previous is not None:
+            score = signature_distance(previous.last_signature, detector.first_signature)
+            if score >= threshold:
+                table[0]["score"] = round(score, 4)
+            else:
+                shots[-1]["end"] = table[0]["end"]
+                table = table[1:]
+        shots.extend(table)
+        previous = detector
+    return shots
+
+
+def save_shots(frame_dir, shots):
+    with open(os.path.join(frame_dir, SHOTS_FILE), "w") as f:
+        json.dump({"shots": shots}, f)
+
+
+def load_shots(frame_dir):
+    """Return the shot table stored next to the frames, or None if there is none."""
+    try:
+        with open(os.path.join(frame_dir, SHOTS_FILE), "r") as f:
+            return json.load(f)["shots"]
+    except (OSError, ValueError, KeyError):
+        return None
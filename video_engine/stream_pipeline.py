@@ -0,0 +1,124 @@
+import queue
+import threading
+
+import cv2
+
+from core import tracing
+
+from .color_grade import grader_for
+from .encoders import encode_frames
+from .extract_frames import iter_frames
+from .frame_graph_api import iter_frame_path
+from .shot_detector import ShotDetector
+from .transitions import TransitionEngine, transition_for
+
+
+DEFAULT_QUEUE_SIZE = 32
+
+_DONE = object()
+
+
+class _Stage(threading.Thread):
+    """Background thread that drains `source` into a bounded queue.
+
+    Any exception raised while producing items is stored on `error` and the
+    queue is always terminated with the `_DONE` sentinel so consumers never
+    block forever.
+    """
+
+    def __init__(self, source, maxsize, name):
+        super().__init__(name=name, daemon=True)
+        self.source = source
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.error = None
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            for item in self.source:
+                if self.stopped.is_set():
+                    break
+                self.queue.put(item)
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self.queue.put(_DONE)
+
+    def __iter__(self):
+        while True:
+            item = self.queue.get()
+            if item is _DONE:
+                break
+            yield item
+        if self.error is not None:
+            raise self.error
+
+    def stop(self):
+        """Ask the producer to stop and unblock it if it is waiting on a full queue."""
+        self.stopped.set()
+        try:
+            while True:
+                self.queue.get_nowait()
+        except queue.Empty:
+            pass
+
+
+@tracing.traced("streaming_pipeline")
+def run_streaming_pipeline(video_path, output_path, intent, queue_size: int = DEFAULT_QUEUE_SIZE, progress=None):
+    """Decode, select and encode `video_path` in one pass without writing frames to disk.
+
+    Frames are pulled from `cv2.VideoCapture` on a decoder thread (skipping the
+    ones the intent drops without decoding them), selected lazily with
+    `iter_frame_path`, checked for shot changes, converted to RGB, colour
+    graded (see `color_grade.grader_for`) and handed to an encoder
+    thread. Both hand-offs go through queues bounded by `queue_size`, so memory
+    stays flat regardless of the clip length. The encoder backend follows
+    `intent` (see `encoders.encoder_options`); shot changes get the intent's
+    transition (see `transitions.transition_for`).
+
+    `progress(encoded, None)` is called after each frame is encoded (the
+    total is not known up front). Returns the number of frames written to
+    `output_path`.
+    """
+    fps = None
+    if isinstance(intent, dict):
+        fps = intent.get("fps")
+    if not fps:
+        fps = 24
+
+    decoder = _Stage(iter_frames(video_path, step=intent["step"]), queue_size, "scriptoria-decode")
+    grader = grader_for(intent)
+    transitions = TransitionEngine(*transition_for(intent))
+    # Shot changes are only looked for when there is a transition to put on them
+    detector = ShotDetector() if transitions.kind != "cut" else None
+
+    def selected():
+        for frame_id, frame in iter_frame_path(decoder, intent):
+            cut = False
+            if detector is not None:
+                shots = len(detector.shots)
+                detector.update(frame_id, frame)
+                cut = 0 < shots < len(detector.shots)
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            if grader is not None:
+                grader.apply(frame, out=frame)
+            yield cut, frame
+
+    converter = _Stage(selected(), queue_size, "scriptoria-select")
+
+    decoder.start()
+    converter.start()
+    try:
+        encoded = (lambda count: progress(count, None)) if progress is not None else None
+        # Blends are made on this thread, so each ring buffer is encoded before it is reused
+        count, _ = encode_frames(transitions.apply(converter), output_path, fps, intent, progress=encoded)
+    finally:
+        converter.stop()
+        decoder.stop()
+
+    if not count:
+        print("[ERROR] No frames decoded from input video!")
+        return 0
+
+    print(f"[INFO] Streamed {count} frames to {output_path}")
+    return count
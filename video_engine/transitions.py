@@ -0,0 +1,170 @@
+import bisect
+import collections
+import math
+
+import cv2
+import numpy as np
+
+from .frame_graph_api import frame_number
+
+
+TRANSITION_KINDS = ("cut", "dissolve", "crossfade")
+# Transition used between shots when the intent does not pick one, and its
+# length in output frames, per intent style. Crossfades shorten the output, so
+# they are only used when the intent asks for one.
+STYLE_TRANSITIONS = {
+    "cinematic": {"kind": "cut", "frames": 6},
+    "trailer": {"kind": "cut", "frames": 2},
+    "reel": {"kind": "cut", "frames": 3},
+}
+DEFAULT_TRANSITION = {"kind": "cut", "frames": 4}
+# Blend buffers per engine; a blended frame stays valid until this many more are produced
+DEFAULT_RING_SIZE = 2
+# A crossfade overlaps at most this fraction of either adjacent shot, so it
+# removes at most this fraction of the frames it is given
+CROSSFADE_SHOT_FRACTION = 0.25
+
+
+def transition_for(intent):
+    """`(kind, frames)` for an intent: `transitions` / `transition_frames` over the style's defaults."""
+    intent = intent if isinstance(intent, dict) else {}
+    style = STYLE_TRANSITIONS.get(intent.get("style"), DEFAULT_TRANSITION)
+    kind = intent.get("transitions") or style["kind"]
+    frames = int(intent.get("transition_frames") or style["frames"])
+    if kind not in TRANSITION_KINDS:
+        print(f"[WARN] Unknown transition {kind!r}, using cuts")
+        kind = "cut"
+    if frames <= 0:
+        kind = "cut"
+    return kind, frames
+
+
+def shot_cuts(frame_path, shots):
+    """One flag per `frame_path` entry: True where it starts a different shot than the entry before."""
+    if not shots:
+        return [False] * len(frame_path)
+    starts = [shot["start"] for shot in shots]
+    cuts, previous = [], None
+    for entry in frame_path:
+        number = frame_number(entry)
+        shot = bisect.bisect_right(starts, number) - 1 if number is not None else previous
+        cuts.append(previous is not None and shot != previous)
+        previous = shot
+    return cuts
+
+
+class TransitionEngine:
+    """Blend between shots of a frame stream with `cv2.addWeighted` into preallocated buffers.
+
+    `apply` takes `(cut, frame)` pairs, `cut` marking the first frame of a
+    new shot, and yields the frames to encode:
+
+    - "cut" passes frames through.
+    - "dissolve" inserts `frames` blends from the last frame of the outgoing
+      shot to the first frame of the incoming one.
+    - "crossfade" overlaps the shots: the last frames of the outgoing shot
+      fade out over the first ones of the incoming shot, so each transition
+      shortens the output by its overlap. The overlap is `frames`, capped at
+      `CROSSFADE_SHOT_FRACTION` of both shots; the start of each shot is
+      held back (up to `lookahead` frames) until its length is known. No
+      frame is dropped and the output keeps at least
+      `1 - CROSSFADE_SHOT_FRACTION` of the input.
+
+    Blends are written into a ring of `ring_size` buffers allocated on the
+    first blend (a crossfade holds back up to `frames` blends, so its ring
+    has at least `frames + 2`), so a long stream allocates nothing per
+    frame; source frames are held by reference, so the source must yield a
+    new array per frame.
+    """
+
+    def __init__(self, kind: str = "cut", frames: int = DEFAULT_TRANSITION["frames"],
+                 ring_size: int = DEFAULT_RING_SIZE):
+        if kind not in TRANSITION_KINDS:
+            raise ValueError(f"Unknown transition: {kind}")
+        self.kind = kind
+        self.frames = frames
+        self.ring_size = max(ring_size, frames + 2) if kind == "crossfade" else ring_size
+        self.lookahead = math.ceil(frames / CROSSFADE_SHOT_FRACTION)
+        self._ring = []
+        self._next = 0
+        self.transitions = 0
+
+    def window(self):
+        """`(before, after)`: a stream split within this many positions of a cut breaks its transition."""
+        if self.kind == "crossfade":
+            # The overlap depends on this many frames of both shots
+            return self.lookahead - 1, self.lookahead - 1
+        return (0, 0) if self.kind == "dissolve" else None
+
+    def blend(self, a, b, weight: float):
+        """`a * (1 - weight) + b * weight` into the next ring buffer."""
+        if not self._ring or self._ring[0].shape != a.shape:
+            self._ring = [np.empty_like(a) for _ in range(self.ring_size)]
+        out = self._ring[self._next]
+        self._next = (self._next + 1) % self.ring_size
+        cv2.addWeighted(a, 1.0 - weight, b, weight, 0.0, dst=out)
+        return out
+
+    def apply(self, items):
+        if self.kind == "dissolve":
+            return self._dissolve(items)
+        if self.kind == "crossfade":
+            return self._crossfade(items)
+        return (frame for _, frame in items)
+
+    def _dissolve(self, items):
+        last = None
+        for cut, frame in items:
+            if cut and last is not None and last.shape == frame.shape:
+                self.transitions += 1
+                for i in range(self.frames):
+                    yield self.blend(last, frame, (i + 1) / (self.frames + 1))
+            yield frame
+            last = frame
+
+    def _crossfade(self, items):
+        # `tail` holds back the last `frames` frames of the current shot so
+        # they can fade out under the next one; `incoming` buffers the start
+        # of the next shot until its length (or `lookahead` of it) is known
+        tail = collections.deque()
+        shot, incoming, outgoing_length = 0, None, 0
+        for cut, frame in items:
+            if cut and tail:
+                if incoming is not None:
+                    yield from self._overlap(tail, incoming, outgoing_length)
+                    shot = len(incoming)
+                incoming, outgoing_length = [frame], shot
+            elif incoming is not None:
+                incoming.append(frame)
+            else:
+                shot += 1
+                tail.append(frame)
+                if len(tail) > self.frames:
+                    yield tail.popleft()
+                continue
+            if len(incoming) == self.lookahead:
+                yield from self._overlap(tail, incoming, outgoing_length)
+                shot, incoming = len(incoming), None
+        if incoming is not None:
+            yield from self._overlap(tail, incoming, outgoing_length)
+        yield from tail
+
+    def _overlap(self, tail, incoming, outgoing_length):
+        """Fade the end of `tail` into `incoming`, leaving the new shot's last frames in `tail`."""
+        overlap = min(self.frames, len(tail), int(outgoing_length * CROSSFADE_SHOT_FRACTION),
+                      int(len(incoming) * CROSSFADE_SHOT_FRACTION))
+        while len(tail) > overlap:
+            yield tail.popleft()
+        outgoing = list(tail)
+        tail.clear()
+        if outgoing and any(a.shape != b.shape for a, b in zip(outgoing, incoming)):
+            yield from outgoing
+            outgoing = []
+        if outgoing:
+            self.transitions += 1
+        for i, frame in enumerate(incoming):
+            if i < len(outgoing):
+                frame = self.blend(outgoing[i], frame, (i + 1) / (len(outgoing) + 1))
+            tail.append(frame)
+            if len(tail) > self.frames:
+                yield tail.popleft()